@@ -10,6 +10,10 @@
 # Note:
 # - Initial version produced with Gemini-3-Pro.
 # - It was in the context of filtering Android deployment logs
+# - The --stream option makes two passes over the input with bounded memory for
+#   large logs: a sketch pass estimates the path and substring counts (via a
+#   Count-Min sketch for a bounded set of candidates), and then the filter pass
+#   samples the lines and applies all of the substitutions with a single regex.
 # TODO (lossy):
 # - Collapse repeated command templates and emit occurrence counts.
 # - Throttle dense DEBUG runs (keep first K and every Nth line per phase).
@@ -24,9 +28,11 @@ Sample usage:
 """
 
 # Standard modules
-from typing import Optional, List, Dict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
 import collections
 import os
+import shutil
+import zlib
 
 # Local modules
 from mezcla import debug
@@ -41,6 +47,13 @@ COLLAPSE_OPT = "collapse"
 ADAPTIVE_OPT = "adaptive"
 SAMPLE_OPT = "sample"
 SUBSTR_OPT = "substr"
+STREAM_OPT = "stream"
+# Long directory paths (e.g., python-for-android NDK paths)
+## TODO2: strip final slash
+PATH_PATTERN = r'(/[a-zA-Z0-9\._\-]+(?:/[a-zA-Z0-9\._\-]+){4,}/)'
+INTEREST_PATTERN = r'error|fail|warning|critical|exception'
+# Characters affected by collapsing: carriage return, escape, backspace, and bell
+CONTROL_CHARS = "\r\x1b\x08\x07"
 
 # Environment options
 ## OLD: MIN_PATH_LEN = system.getenv_bool(
@@ -72,6 +85,71 @@ SAMPLE_TAIL_SIZE = system.getenv_int(
 SAMPLE_MAX_INTEREST = system.getenv_int(
      "SAMPLE_MAX_INTEREST", 800,
      description="Maximum number of middle error/warning lines retained during sampling")
+SKETCH_WIDTH = system.getenv_int(
+     "SKETCH_WIDTH", 2 ** 16,
+     description="Number of counters per row in Count-Min sketch for --stream")
+SKETCH_DEPTH = system.getenv_int(
+     "SKETCH_DEPTH", 4,
+     description="Number of hash rows in Count-Min sketch for --stream")
+MAX_CANDIDATES = system.getenv_int(
+     "MAX_CANDIDATES", 10000,
+     description="Maximum number of path or substring candidates tracked for --stream")
+
+#-------------------------------------------------------------------------------
+
+class CountMinSketch:
+    """Count-Min sketch for approximate frequencies in fixed space (n.b., overestimates only)"""
+
+    def __init__(self, width: int = SKETCH_WIDTH, depth: int = SKETCH_DEPTH) -> None:
+        """Initializer: WIDTH counters for each of DEPTH hash functions"""
+        self.width = width
+        self.depth = depth
+        self.counts = [0] * (width * depth)
+
+    def _get_cells(self, item: str) -> List[int]:
+        """Return counter offsets for ITEM, one per row
+        Note: uses double hashing via crc32 and adler32 (i.e., deterministic across runs)"""
+        data = item.encode("UTF-8")
+        hash1 = zlib.crc32(data)
+        hash2 = zlib.adler32(data) | 1
+        return [(row * self.width) + ((hash1 + row * hash2) % self.width)
+                for row in range(self.depth)]
+
+    def add(self, item: str, count: int = 1) -> int:
+        """Add COUNT for ITEM, returning the new estimate"""
+        estimate = None
+        for cell in self._get_cells(item):
+            self.counts[cell] += count
+            if (estimate is None) or (self.counts[cell] < estimate):
+                estimate = self.counts[cell]
+        return estimate
+
+    def estimate(self, item: str) -> int:
+        """Return estimated count for ITEM"""
+        return min(self.counts[cell] for cell in self._get_cells(item))
+
+
+class HeavyHitters:
+    """Tracks the most frequent items in bounded space using a Count-Min sketch
+    Note: candidates are pruned to MAX_SIZE by estimate once twice that size"""
+
+    def __init__(self, max_size: int = MAX_CANDIDATES) -> None:
+        """Initializer: keep at most about MAX_SIZE candidates"""
+        self.max_size = max_size
+        self.sketch = CountMinSketch()
+        self.candidates: Dict[str, int] = {}
+
+    def add(self, item: str) -> None:
+        """Count occurrence of ITEM"""
+        self.candidates[item] = self.sketch.add(item)
+        if (len(self.candidates) > (2 * self.max_size)):
+            top = sorted(self.candidates.items(), key=lambda pair: pair[1], reverse=True)
+            self.candidates = dict(top[:self.max_size])
+            debug.trace(TL.VERBOSE, f"HeavyHitters: pruned to {len(self.candidates)} candidates")
+
+    def get_counts(self) -> Dict[str, int]:
+        """Return estimated counts for the candidates"""
+        return dict(self.candidates)
 
 #-------------------------------------------------------------------------------
 
@@ -93,13 +171,15 @@ class LogRefiner:
         """Identifies the most frequent long directory paths."""
         # Focus on paths containing common build artifacts to avoid replacing small system paths
         # Designed for long paths in python-for-android (e.g., NDK)
-        ## TODO2: strip final slash
-        path_pattern = r'(/[a-zA-Z0-9\._\-]+(?:/[a-zA-Z0-9\._\-]+){4,}/)'
         all_matches = []
         for line in lines:
-            all_matches.extend(my_re.findall(path_pattern, line))
+            all_matches.extend(my_re.findall(PATH_PATTERN, line))
         
         counts = collections.Counter(all_matches)
+        return self._select_common_paths(counts, min_len=min_len, limit=limit)
+
+    def _select_common_paths(self, counts: Dict[str, int], min_len: int = MIN_PATH_LEN, limit: int = MAX_PATHS) -> List[str]:
+        """Selects paths to substitute given path COUNTS (e.g., estimates from sketch pass)."""
         # Also count shared path prefixes to avoid overfitting to one-off deep paths.
         # This helps large Android logs where full paths vary at the deepest levels.
         prefix_counts = collections.Counter()
@@ -135,7 +215,10 @@ class LogRefiner:
             for token in line.split():
                 if len(token) >= min_len:
                     token_counts[token] += 1
+        return self._select_common_substrings(token_counts, min_len=min_len, min_freq=min_freq, limit=limit)
 
+    def _select_common_substrings(self, token_counts: Dict[str, int], min_len: int = MIN_SUBSTR_LEN, min_freq: int = MIN_SUBSTR_FREQ, limit: int = MAX_SUBSTRS) -> List[str]:
+        """Selects substrings to substitute given long TOKEN_COUNTS (e.g., estimates from sketch pass)."""
         # Sort ALL long tokens lexicographically for prefix grouping
         all_long_tokens = sorted(token_counts.keys())
         debug.trace_expr(TL.VERBOSE, len(all_long_tokens), prefix="_get_common_substrings: ")
@@ -190,6 +273,54 @@ class LogRefiner:
         debug.trace_expr(TL.VERBOSE, result, prefix="_get_common_substrings => ")
         return result
 
+    def _collapse_line(self, line: str) -> Optional[str]:
+        """Collapse progress bars in LINE and strip control codes, returning None if blank"""
+        if not line.strip():
+            return None
+        # note: avoids regex substitutions for typical lines
+        if not any((char in line) for char in CONTROL_CHARS):
+            return line
+        # Handle end-of-line \r (frequent in typescripts)
+        line = line.rstrip('\r')
+        # Collapse progress bars
+        line = my_re.sub(r'.*\r', '', line)
+
+        # Strip OSC (Operating System Command) sequences (e.g., window titles)
+        line = my_re.sub(r'\x1b\].*?(?:\x07|\x1b\\)', '', line)
+        # Strip CSI sequences (covers colors, movements, bracketed paste)
+        line = my_re.sub(r'\x1b\[[0-9;?]*[A-Za-z@~]', '', line)
+
+        # Apply backspaces
+        while '\x08' in line:
+            new_line = my_re.sub(r'[^\x08]\x08', '', line)
+            if new_line == line:
+                break
+            line = new_line
+        line = line.replace('\x08', '')
+
+        # Strip any remaining standalone BEL or ESC
+        line = line.replace('\x07', '')
+        line = line.replace('\x1b', '')
+
+        return (line if line.strip() else None)
+
+    def _get_substituter(self) -> Optional[Callable[[str], str]]:
+        """Return function applying all path and substring substitutions in one scan, or None if none
+        Note: The alternatives are longest first, so longer text is preferred at a given offset."""
+        all_subs = {}
+        if self.adaptive and self.path_map:
+            all_subs.update(self.path_map)
+        if self.substr and self.substr_map:
+            all_subs.update(self.substr_map)
+        if not all_subs:
+            return None
+        ordered_texts = sorted(all_subs.keys(), key=len, reverse=True)
+        regex = my_re.compile("|".join(my_re.escape(text) for text in ordered_texts))
+        def substitute(line: str) -> str:
+            """Replace each path or substring in LINE with its token"""
+            return regex.sub(lambda match: all_subs[match.group(0)], line)
+        return substitute
+
     def process(self, raw_lines: List[str]) -> List[str]:
         """Applies filters to the log lines."""
         processed = raw_lines
@@ -200,31 +331,9 @@ class LogRefiner:
             ## TODO3: make sure the stripped segments overlap
             new_processed = []
             for line in processed:
-                if not line.strip():
-                    continue
-                # Handle end-of-line \r (frequent in typescripts)
-                line = line.rstrip('\r')
-                # Collapse progress bars
-                line = my_re.sub(r'.*\r', '', line)
-                
-                # Strip OSC (Operating System Command) sequences (e.g., window titles)
-                line = my_re.sub(r'\x1b\].*?(?:\x07|\x1b\\)', '', line)
-                # Strip CSI sequences (covers colors, movements, bracketed paste)
-                line = my_re.sub(r'\x1b\[[0-9;?]*[A-Za-z@~]', '', line)
-                
-                # Apply backspaces
-                while '\x08' in line:
-                    new_line = my_re.sub(r'[^\x08]\x08', '', line)
-                    if new_line == line:
-                        break
-                    line = new_line
-                line = line.replace('\x08', '')
-                
-                # Strip any remaining standalone BEL or ESC
-                line = line.replace('\x07', '')
-                line = line.replace('\x1b', '')
-                
-                if line.strip():
+                ## OLD: (inline version of _collapse_line)
+                line = self._collapse_line(line)
+                if line is not None:
                     new_processed.append(line)
             processed = new_processed
 
@@ -258,7 +367,7 @@ class LogRefiner:
                 middle = processed[head_size:-tail_size]
                 ## OLD: interest = [l for l in middle if my_re.search(r'error|fail|warning|critical|exception|debug', l, my_re.I)]
                 ## Note: 'debug' removed to avoid retaining every [DEBUG] line in buildozer logs
-                interest = [l for l in middle if my_re.search(r'error|fail|warning|critical|exception', l, my_re.I)]
+                interest = [l for l in middle if my_re.search(INTEREST_PATTERN, l, my_re.I)]
                 if len(interest) > max_interest:
                     interest = interest[:max_interest]
                 
@@ -266,24 +375,83 @@ class LogRefiner:
                 processed = head + [msg] + interest + [msg] + tail
 
         # 4. Final Substitution Pass
-        all_subs = {}
-        if self.adaptive and self.path_map:
-            all_subs.update(self.path_map)
-        if self.substr and self.substr_map:
-            all_subs.update(self.substr_map)
-        if all_subs:
-            final_output = []
-            ordered_subs = sorted(all_subs.items(), key=lambda pair: len(pair[0]), reverse=True)
-            for line in processed:
-                new_line = line
-                ## OLD: for text, token in all_subs.items():
-                for text, token in ordered_subs:
-                    new_line = new_line.replace(text, token)
-                final_output.append(new_line)
-            processed = final_output
+        # note: uses single regex for all substitutions (see _get_substituter)
+        ## OLD:
+        ## ordered_subs = sorted(all_subs.items(), key=lambda pair: len(pair[0]), reverse=True)
+        ## for line in processed:
+        ##     new_line = line
+        ##     for text, token in ordered_subs:
+        ##         new_line = new_line.replace(text, token)
+        substitute = self._get_substituter()
+        if substitute:
+            processed = [substitute(line) for line in processed]
 
         return processed
 
+    def analyze_stream(self, raw_lines: Iterable[str]) -> None:
+        """Sketch pass for streaming mode: determine path and substring substitutions over RAW_LINES
+        Note: Uses bounded memory, with counts approximated via HeavyHitters."""
+        if not (self.adaptive or self.substr):
+            return
+        path_counts = HeavyHitters()
+        token_counts = HeavyHitters()
+        path_regex = my_re.compile(PATH_PATTERN)
+        num_lines = 0
+        for line in raw_lines:
+            if self.collapse:
+                line = self._collapse_line(line)
+                if line is None:
+                    continue
+            num_lines += 1
+            if self.adaptive:
+                for path in path_regex.findall(line):
+                    path_counts.add(path)
+            if self.substr:
+                for token in line.split():
+                    if len(token) >= MIN_SUBSTR_LEN:
+                        token_counts.add(token)
+        debug.trace(TL.VERBOSE, f"analyze_stream: {num_lines} lines")
+        if self.adaptive:
+            for i, path in enumerate(self._select_common_paths(path_counts.get_counts()), 1):
+                self.path_map[path] = f"{{path{i}}}"
+        if self.substr:
+            for i, substr in enumerate(self._select_common_substrings(token_counts.get_counts()), 1):
+                self.substr_map[substr] = f"{{sub{i}}}"
+
+    def filter_stream(self, raw_lines: Iterable[str]) -> Iterator[str]:
+        """Filter pass for streaming mode: generator for refined RAW_LINES (see process)
+        Note: analyze_stream should be invoked first if adaptive or substr; also, only the head, tail and interest lines are buffered when sampling."""
+        substitute = (self._get_substituter() or (lambda line: line))
+        head_size = SAMPLE_HEAD_SIZE
+        tail_size = SAMPLE_TAIL_SIZE
+        max_interest = SAMPLE_MAX_INTEREST
+        interest_regex = my_re.compile(INTEREST_PATTERN, my_re.I)
+        tail: collections.deque = collections.deque(maxlen=tail_size)
+        interest = []
+        num_lines = num_middle = 0
+        for line in raw_lines:
+            if self.collapse:
+                line = self._collapse_line(line)
+                if line is None:
+                    continue
+            num_lines += 1
+            if (not self.sample) or (num_lines <= head_size):
+                yield substitute(line)
+                continue
+            # note: lines bumped from the tail are in the middle
+            if (len(tail) == tail_size):
+                middle_line = tail[0]
+                num_middle += 1
+                if ((len(interest) < max_interest) and interest_regex.search(middle_line)):
+                    interest.append(middle_line)
+            tail.append(line)
+        if num_middle:
+            msg = f"\n... [SNIP: {num_middle - len(interest)} lines removed] ...\n"
+            for line in [msg] + interest + [msg]:
+                yield substitute(line)
+        for line in tail:
+            yield substitute(line)
+
 #-------------------------------------------------------------------------------
 
 def main() -> None:
@@ -299,23 +467,40 @@ def main() -> None:
             ## BAD: (SAMPLE_OPT, "Keep head/tail/errors only (10% target)")
             ## TODO2: check for other issues with argparse option text
             (SAMPLE_OPT, "Keep head/tail/errors only (10%% target)"),
-            (SUBSTR_OPT, "Replace frequent substrings with tokens (generalizes --adaptive)")
+            (SUBSTR_OPT, "Replace frequent substrings with tokens (generalizes --adaptive)"),
+            (STREAM_OPT, "Use two streaming passes with bounded memory (e.g., for multi-GB logs)")
         ],
     ) 
     debug.reference_var(FILENAME) 
     debug.assertion(main_app.parsed_args) 
-
-    # Read input lines
-    input_data = main_app.read_entire_input().split("\n")
-
-    # Apply filters
     refiner = LogRefiner(
         collapse=main_app.get_parsed_option(COLLAPSE_OPT),
         adaptive=main_app.get_parsed_option(ADAPTIVE_OPT),
         sample=main_app.get_parsed_option(SAMPLE_OPT),
         substr=main_app.get_parsed_option(SUBSTR_OPT)
     )
-    result = refiner.process(input_data)
+
+    # Read input lines and apply filters
+    if main_app.get_parsed_option(STREAM_OPT):
+        main_app.init_input()
+        input_stream = main_app.input_stream
+        # note: standard input copied to temp file for second pass, which is read
+        # without newline translation as with stdin (e.g., so \r not treated as line delim)
+        if ((refiner.adaptive or refiner.substr) and not input_stream.seekable()):
+            with system.open_file(main_app.temp_file, mode="w", newline="") as temp_handle:
+                shutil.copyfileobj(input_stream, temp_handle)
+            input_stream = system.open_file(main_app.temp_file, newline="\n")
+        def read_lines() -> Iterator[str]:
+            """Generator for input lines without newlines"""
+            for line in input_stream:
+                yield (line[:-1] if line.endswith("\n") else line)
+        refiner.analyze_stream(read_lines())
+        if (refiner.adaptive or refiner.substr):
+            input_stream.seek(0)
+        result = refiner.filter_stream(read_lines())
+    else:
+        input_data = main_app.read_entire_input().split("\n")
+        result = refiner.process(input_data)
 
     # Output Legend at the top (e.g., for AI context)
     if refiner.path_map or refiner.substr_map:
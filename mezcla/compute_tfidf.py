@@ -37,6 +37,7 @@ from mezcla import tfidf
 from mezcla.tfidf import MIN_NGRAM_SIZE, MAX_NGRAM_SIZE
 from mezcla.tfidf.corpus import Corpus as tfidf_corpus
 from mezcla.tfidf.preprocess import Preprocessor as tfidf_preprocessor
+from mezcla.tfidf.preprocess import USE_SIMPLE_SENT_SPLITTER
 
 # Local packages
 from mezcla import debug
@@ -95,6 +96,11 @@ TSV = "--tsv"
 TEXT = "--text"
 VERBOSE_OPT = "--verbose"
 HEADER_OPT = "--header"
+MATRIX_OPT = "--matrix"
+STREAM_OPT = "--stream"
+WORKERS_OPT = "--workers"
+LOAD_CORPUS_OPT = "--load-corpus"
+SAVE_CORPUS_OPT = "--save-corpus"
 TEXT_DELIMITER = "\xFF"
 
 #...............................................................................
@@ -106,20 +112,26 @@ def show_usage_and_quit(verbose=False):
 Usage: {prog} [options] file1 [... fileN]
 
 Options: [--help] [{ngram_size_opt}=N] [{top_terms_opt}=N] [{subscores}] [{frequencies}]
-         [{all}] [{csv} | {tsv} | {text}] [{header}]
+         [{all}] [{csv} | {tsv} | {text}] [{header}] [{matrix}] [{stream}] [{workers}=N]
+         [{load_corpus}=file] [{save_corpus}=file]
 
 Notes:
 - Derives TF-IDF for set of documents, using single word tokens (unigrams), by default. 
 - By default, the document ID is the position of the file on the command line (e.g., N for fileN above). The document text is the entire file.
 - However, with {csv}, the document ID is taken from the first column, and the document text from the second columns (i.e., each row is a distinct document).
 - With {text}, the document ID is taken from the line number.
+- With {stream}, rows with the same ID are appended incrementally without retaining the text (i.e., memory bounded by vocabulary).
+  With TFIDF_SENT_SPLITTER, ngrams spanning rows are not included.
+- With {workers}, the documents are preprocessed by N processes (n.b., not with {stream}).
+- With {load_corpus}, the corpus is first loaded from file saved via {save_corpus} (memory-mapped binary format), and the filename arguments are optional.
+- With {matrix}, the scores are computed via vectorized sparse-matrix operations (requires numpy and scipy).
 - Use following environment options:
       DEFAULT_NUM_TOP_TERMS ({default_topn})
       MIN_NGRAM_SIZE ({min_ngram_size})
       MAX_NGRAM_SIZE ({max_ngram_size})
       TF_WEIGHTING ({tf_weighting}): {{log, norm_50, binary, basic, freq}}
       IDF_WEIGHTING ({idf_weighting}): {{smooth, max, prob, basic, freq}}
-""".format(prog=sys.argv[0], ngram_size_opt=NGRAM_SIZE_OPT, top_terms_opt=NUM_TOP_TERMS_OPT, subscores=SHOW_SUBSCORES, frequencies=SHOW_FREQUENCY, all=SHOW_ALL, default_topn=DEFAULT_NUM_TOP_TERMS, min_ngram_size=MIN_NGRAM_SIZE, max_ngram_size=MAX_NGRAM_SIZE, tf_weighting=TF_WEIGHTING, idf_weighting=IDF_WEIGHTING, csv=CSV, tsv=TSV, text=TEXT, header=HEADER_OPT)
+""".format(prog=sys.argv[0], ngram_size_opt=NGRAM_SIZE_OPT, top_terms_opt=NUM_TOP_TERMS_OPT, subscores=SHOW_SUBSCORES, frequencies=SHOW_FREQUENCY, all=SHOW_ALL, default_topn=DEFAULT_NUM_TOP_TERMS, min_ngram_size=MIN_NGRAM_SIZE, max_ngram_size=MAX_NGRAM_SIZE, tf_weighting=TF_WEIGHTING, idf_weighting=IDF_WEIGHTING, csv=CSV, tsv=TSV, text=TEXT, header=HEADER_OPT, matrix=MATRIX_OPT, stream=STREAM_OPT, workers=WORKERS_OPT, load_corpus=LOAD_CORPUS_OPT, save_corpus=SAVE_CORPUS_OPT)
     print(usage)
     if verbose:
         print("- Full set of environment options")
@@ -201,6 +213,11 @@ def main():
     is_text = False
     verbose = False
     include_text_header = False
+    use_matrix = None
+    streaming = False
+    num_workers = None
+    load_corpus_file = None
+    save_corpus_file = None
     global DELIMITER
     ## TODO2: use main.Script for argument parsing
     while ((i < len(args)) and args[i].startswith("-")):
@@ -235,16 +252,29 @@ def main():
             DELIMITER = TEXT_DELIMITER
         elif (option == HEADER_OPT):
             include_text_header = True
+        elif (option == MATRIX_OPT):
+            use_matrix = True
+        elif (option == STREAM_OPT):
+            streaming = True
+        elif (option == WORKERS_OPT):
+            i += 1
+            num_workers = int(args[i])
+        elif (option == LOAD_CORPUS_OPT):
+            i += 1
+            load_corpus_file = args[i]
+        elif (option == SAVE_CORPUS_OPT):
+            i += 1
+            save_corpus_file = args[i]
         else:
             sys.stderr.write("Error: unknown option '{o}'\n".format(o=option))
             show_usage_and_quit()
         i += 1
     debug.assertion((not (csv_file and is_text) or (DELIMITER == TEXT_DELIMITER)))
     args = args[i:]
-    if (len(args) < 1):
+    if ((len(args) < 1) and (not load_corpus_file)):
         system.print_stderr("Error: missing filename(s)\n")
         show_usage_and_quit()
-    if ((len(args) < 2) and (not csv_file) and (not show_frequency)):
+    if ((len(args) < 2) and (not load_corpus_file) and (not csv_file) and (not show_frequency)):
         ## TODO: only issue warning if include-frequencies not specified
         system.print_stderr("Warning: TF-IDF not relevant with only one document")
 
@@ -264,7 +294,11 @@ def main():
     # Note: disables stemming via no-op lambda by default
     stemmer_fn = None if INCLUDE_STEMMING else (lambda x: x)
     my_pp = tfidf_preprocessor(language=LANGUAGE, gramsize=max_ngram_size, min_ngram_size=MIN_NGRAM_SIZE, all_ngrams=False, stemmer=stemmer_fn)
-    corpus = tfidf_corpus(gramsize=max_ngram_size, min_ngram_size=MIN_NGRAM_SIZE, all_ngrams=False, preprocessor=my_pp)
+    if load_corpus_file:
+        corpus = tfidf_corpus.load(load_corpus_file, preprocessor=my_pp, use_matrix=use_matrix)
+    else:
+        corpus = tfidf_corpus(gramsize=max_ngram_size, min_ngram_size=MIN_NGRAM_SIZE, all_ngrams=False, preprocessor=my_pp,
+                              use_matrix=use_matrix)
 
     # Overide the maxium field size if specified
     if MAX_FIELD_SIZE > -1:
@@ -274,14 +308,24 @@ def main():
         debug.trace(4, f"Set max field size to {MAX_FIELD_SIZE}; was {old_limit}")
 
     # Process each of the filename arguments
+    # note: with multiple workers, the text is collected first for corpus.add_documents
     doc_filenames = {}
+    use_workers = ((num_workers or 1) > 1)
+    if (use_workers and streaming):
+        system.print_stderr(f"Warning: ignoring {WORKERS_OPT} with {STREAM_OPT}")
+        use_workers = False
+    if (streaming and not USE_SIMPLE_SENT_SPLITTER):
+        # note: trailing context for ngrams across rows only supported for simple sentence splitter
+        system.print_error(f"Warning: ngrams spanning rows with same ID are omitted with {STREAM_OPT} and TFIDF_SENT_SPLITTER")
+    doc_texts = {}
     for i, filename in enumerate(args):
         # If CSV file, treat each row as separate document, using ID from first column and data from second
         # Note: Special case with one-line per document using delimited 0xFF.
         if csv_file:
             text_col = 0 if is_text else 1
             with system.open_file(filename) as fh:
-                csv_reader = csv.reader(iter(fh.readlines()), delimiter=DELIMITER, quotechar='"')
+                # note: rows are read lazily (i.e., not via readlines)
+                csv_reader = csv.reader(fh, delimiter=DELIMITER, quotechar='"')
                 line = 0
                 for r, row in enumerate(csv_reader):
                     debug.trace(6, f"{line}: {r=} {row}")
@@ -295,15 +339,22 @@ def main():
                     except:
                         debug.trace_fmt(5, "Exception processing line {l}", l=line)
                         doc_text = ""
-                    ## TODO: use defaultdict-type hash
-                    if doc_id not in corpus:
-                        corpus[doc_id] = ""
+                    # Add tokens for text incrementally (e.g., for repeated IDs)
+                    if streaming:
+                        corpus.append_text(doc_id, doc_text, keep_text=False)
+                    elif use_workers:
+                        doc_texts[doc_id] = ((doc_texts[doc_id] + " " + doc_text)
+                                             if (doc_id in doc_texts) else doc_text)
                     else:
-                        ## TODO: corpus[doc_id] += " "
-                        corpus[doc_id] = (corpus[doc_id].text + " ")
-                    # Appends text to corpus document
-                    ## TODO: corpus[doc_id] += doc_text
-                    corpus[doc_id] = (corpus[doc_id].text + doc_text)
+                        ## TODO: use defaultdict-type hash
+                        if doc_id not in corpus:
+                            corpus[doc_id] = ""
+                        else:
+                            ## TODO: corpus[doc_id] += " "
+                            corpus[doc_id] = (corpus[doc_id].text + " ")
+                        # Appends text to corpus document
+                        ## TODO: corpus[doc_id] += doc_text
+                        corpus[doc_id] = (corpus[doc_id].text + doc_text)
                     ## OLD: doc_filenames[doc_id] = filename + ":" + str(i + 1)
                     doc_filenames[doc_id] = f"{filename}:{r + 1}"
                     line += 1
@@ -311,11 +362,18 @@ def main():
         else:
             doc_id = str(i + 1)
             doc_text = system.read_entire_file(filename)
-            corpus[doc_id] = doc_text
+            if use_workers:
+                doc_texts[doc_id] = doc_text
+            else:
+                corpus[doc_id] = doc_text
             doc_filenames[doc_id] = filename
+    if use_workers:
+        corpus.add_documents(doc_texts.items(), workers=num_workers)
     debug.trace_object(7, corpus, "corpus")
     if CORPUS_DUMP:
         system.save_object(CORPUS_DUMP, corpus)
+    if save_corpus_file:
+        corpus.save(save_corpus_file)
 
     # Derive headers
     headers = ["term"]
@@ -335,7 +393,7 @@ def main():
     # Output the top terms per document with scores
     # TODO: change the IDF weighting
     for doc_id in corpus.keys():        # pylint: disable=consider-using-dict-items
-        print("{id} [{filename}]".format(id=doc_id, filename=doc_filenames[doc_id]))
+        print("{id} [{filename}]".format(id=doc_id, filename=doc_filenames.get(doc_id, load_corpus_file)))
         if TAB_FORMAT:
             print("\t".join(headers))
         else:
@@ -10,6 +10,9 @@
 # - Have option for setting delim to tab to avoid awkward spec under bash (e.g., --output-delim $'\t').
 # - The CSV dialect defaults to Excel as with csv module (see csv.py).
 # - Warning: by default quotes are added to all values --csv output (a la QUOTE_ALL) unless Excel dialect used.
+# - The default bulk engine selects the columns for chunks of rows and writes output
+#   in chunks; the pandas engine also uses chunked reads limited to the needed columns.
+#   Both produce the same output as the row-by-row csv engine (--engine csv).
 #
 # TODO:
 # - ** Make --csv output default to pyspark dialect.
@@ -23,12 +26,15 @@
 # Standard modules
 import argparse
 import csv
+import io
 import re
 import sys
 
 # Installed modules
 import functools
+import itertools
 import operator
+import pandas as pd
 
 # Local modules
 from mezcla import data_utils as du
@@ -60,6 +66,7 @@ DELIM = "delim"                         # input delimiter
 OUT_DELIM = "output-delim"              # output delimiter if not same for input
 ALL_FIELDS = "all-fields"               # use all fields in output (e.g., for delimiter conversion)
 TAB = "\t"
+BOM = "\ufeff"                          # byte order mark
 SPACE = " "
 COMMA = ","
 ## TODO: make -style suffix optional (e.g., --tab[-style])
@@ -80,6 +87,11 @@ SNIFFER_LOOKAHEAD = 65536               # buffer size for guessing dialect (64k)
 TAB_DIALECT = "tab"                     # dialect option for TSV
 SINGLE_LINE = "single-line"             # collapse multi-line fields into one
 MAX_FIELD_LEN = "max-field-len"         # value length before elided
+ENGINE_OPT = "engine"                   # engine for column extraction
+CSV_ENGINE = "csv"                      # row-by-row csv processing (original)
+BULK_ENGINE = "bulk"                    # csv reading with bulk column selection
+PANDAS_ENGINE = "pandas"                # chunked pandas reads with column projection
+ENGINES = [CSV_ENGINE, BULK_ENGINE, PANDAS_ENGINE]
 ## TODO: TODO_ARG = "TODO-arg"          # TODO: comment
 NEW_FIX = system.getenv_bool(
     "NEW_FIX", False,
@@ -91,6 +103,12 @@ CSV_FORMAT = system.getenv_bool(
 MAX_FIELD_SIZE = system.getenv_int(
     "MAX_FIELD_SIZE", -1,
     desc="Overide for default max field size (128k)")
+CUT_ENGINE = system.getenv_text(
+    "CUT_ENGINE", BULK_ENGINE,
+    desc=f"Default engine for column extraction: {', '.join(ENGINES)}")
+CUT_CHUNK_SIZE = system.getenv_int(
+    "CUT_CHUNK_SIZE", 10000,
+    desc="Number of rows per chunk for the bulk and pandas engines")
 
 #...............................................................................
 
@@ -191,6 +209,8 @@ class Script(Main):
     run_sniffer = False
     single_line = False
     max_field_len = None
+    engine = CUT_ENGINE
+    transform_values = False
     ## TODO: todo_arg = ...
 
     def setup(self):
@@ -246,6 +266,9 @@ class Script(Main):
         self.output_delimiter = self.get_parsed_option(OUT_DELIM, (self.output_delimiter or self.delimiter))
         self.single_line = self.get_parsed_option(SINGLE_LINE, self.single_line)
         self.max_field_len = self.get_parsed_option(MAX_FIELD_LEN, self.max_field_len)
+        self.transform_values = bool(self.single_line or self.max_field_len or self.encode_values)
+        self.engine = self.get_parsed_option(ENGINE_OPT, self.engine)
+        debug.assertion(self.engine in ENGINES)
         # self.todo_arg = self.get_parsed_option(TODO_ARG, self.todo_arg)
 
         # Check CSV dialet options
@@ -404,6 +427,26 @@ class Script(Main):
         debug.trace_object(5, csv_writer, "csv_writer")
         debug.trace_object(5, csv_writer.dialect, "csv_writer.dialect")
 
+        # Use faster engine unless hacked fix in effect
+        engine = self.engine
+        if (NEW_FIX and (self.delimiter == TAB)):
+            engine = CSV_ENGINE
+        debug.trace_expr(4, engine)
+        num_rows = None
+        if engine == PANDAS_ENGINE:
+            num_rows, num_cols = self.run_pandas_engine(csv_writer)
+            if num_rows is None:
+                debug.trace(4, "FYI: Using bulk engine as pandas not applicable")
+                engine = BULK_ENGINE
+        if engine == BULK_ENGINE:
+            num_rows, num_cols = self.run_bulk_engine(self.csv_reader, csv_writer)
+            if num_rows is None:
+                engine = CSV_ENGINE
+        if engine != CSV_ENGINE:
+            if debug.verbose_debugging():
+                self.check_dimensions(num_rows, num_cols)
+            return
+
         # Iterate through the rows, outputting subset of columns
         last_row_length = None
         num_rows = 0
@@ -419,16 +462,7 @@ class Script(Main):
                 row = line.split(TAB)
                 debug.assertion(not any(SPACE in field for field in row))
             if i == 0:
-                # note: Byte order mark (BOM) is removed
-                # TODO3: warn about delimiter mismatch
-                columns = row
-                BOM = '\ufeff'
-                if columns and columns[0].startswith(BOM):
-                    columns[0] = columns[0][len(BOM):]
-                if self.inclusion_spec:
-                    self.fields = self.parse_field_spec(self.inclusion_spec, columns)
-                if self.exclusion_spec:
-                    self.exclude_fields = self.parse_field_spec(self.exclusion_spec, columns)
+                columns = self.init_columns(row)
             debug.trace_fmt(6, "R{n}: {r}", n=(i + 1), r=row)
             debug.trace_fmt(5, "R{n}: len(row)={l} [{rspec}]", n=(i + 1), l=len(row), rspec=elide_values(row))
             debug.assertion((len(row) == last_row_length) or (not last_row_length))
@@ -470,8 +504,15 @@ class Script(Main):
                 system.print_exception_info("row output")
 
         # Do sanity checks
-        # Note: this compares row extraction against Pandas dataframe
-        if (debug.debugging() and (self.input_stream != sys.stdin)):
+        if debug.debugging():
+            self.check_dimensions(num_rows, num_cols)
+
+        return
+
+    def check_dimensions(self, num_rows, num_cols):
+        """Sanity check comparing NUM_ROWS and NUM_COLS from extraction against Pandas dataframe
+        Note: this re-reads the entire file, so it is only done when debugging"""
+        if (self.input_stream != sys.stdin):
             debug.trace(4, "note: csv vs. pandas row count sanity check")
             dataframe = du.read_csv(self.filename, delimiter=self.delimiter, dialect=self.dialect)
             valid_dataframe = (dataframe is not None)
@@ -484,7 +525,156 @@ class Script(Main):
                 debug.assertion(num_rows == df_num_rows)
                 debug.assertion(num_cols == df_num_cols)
 
-        return
+    def init_columns(self, row):
+        """Resolve the field specifications using first ROW, which is returned as the columns
+        Note: Byte order mark (BOM) is removed from ROW"""
+        # TODO3: warn about delimiter mismatch
+        columns = row
+        if columns and columns[0].startswith(BOM):
+            columns[0] = columns[0][len(BOM):]
+        if self.inclusion_spec:
+            self.fields = self.parse_field_spec(self.inclusion_spec, columns)
+        if self.exclusion_spec:
+            self.exclude_fields = self.parse_field_spec(self.exclusion_spec, columns)
+        return columns
+
+    def transform_value(self, column):
+        """Apply --single-line, --max-field-len and --encode conversions to COLUMN value"""
+        if self.single_line:
+            column = re.sub(r"\s", SPACE, column)
+        if self.max_field_len:
+            column = gh.elide(column, max_len=self.max_field_len)
+        if self.encode_values:
+            ## TODO4: maxcount of 1 for left and right
+            column = repr(column).strip("'")
+        return column
+
+    def select_fields(self, row):
+        """Return fields from ROW, using empty string for invalid field numbers (as with csv engine)"""
+        output_row = []
+        for f in self.fields:
+            valid_field_number = (1 <= f <= len(row))
+            debug.assertion(valid_field_number, f"field {f}")
+            output_row.append(row[f - 1] if valid_field_number else "")
+        return output_row
+
+    def write_rows(self, csv_writer, rows):
+        """Output ROWS in bulk using dialect for CSV_WRITER
+        Note: the rows are formatted into a buffer, so that problematic rows can be skipped"""
+        buffer = io.StringIO()
+        try:
+            csv.writer(buffer, dialect=csv_writer.dialect).writerows(rows)
+        except:
+            buffer = io.StringIO()
+            row_writer = csv.writer(buffer, dialect=csv_writer.dialect)
+            for row in rows:
+                try:
+                    row_writer.writerow(row)
+                except:
+                    ## TODO2: add ignore-errors option
+                    system.print_exception_info("row output")
+        sys.stdout.write(buffer.getvalue())
+
+    def run_bulk_engine(self, rows, csv_writer, num_rows=0):
+        """Extract columns from csv ROWS in chunks via bulk selection, outputting via CSV_WRITER dialect.
+        Returns tuple with number of rows (including NUM_ROWS already processed) and number of columns,
+        with former None if no fields to extract (i.e., csv engine needed).
+        Note: Unlike the csv engine, mismatched row lengths are checked per chunk rather than per row."""
+        debug.trace(4, f"run_bulk_engine(_, _, {num_rows})")
+        rows = iter(rows)
+        num_cols = None
+        if num_rows == 0:
+            first_row = next(rows, None)
+            if first_row is None:
+                return (num_rows, num_cols)
+            self.init_columns(first_row)
+            num_cols = len(first_row)
+            rows = itertools.chain([first_row], rows)
+            if ((not self.fields) and self.all_fields):
+                self.fields = [(c + 1) for c in range(num_cols) if (c + 1) not in self.exclude_fields]
+        if not self.fields:
+            # note: leaves rows for csv engine, which re-derives fields per row
+            debug.trace(4, "FYI: Using csv engine as no fields")
+            self.csv_reader = rows
+            return (None, None)
+        debug.trace_expr(5, self.fields)
+
+        # Derive selector for fields, with short rows handled separately
+        indices = [(f - 1) for f in self.fields]
+        min_length = (1 + max(indices)) if (min(indices) >= 0) else sys.maxsize
+        select = operator.itemgetter(*indices)
+        if len(indices) == 1:
+            select = lambda row: [row[indices[0]]]    # pylint: disable=unnecessary-lambda-assignment
+        #
+        while True:
+            chunk = list(itertools.islice(rows, CUT_CHUNK_SIZE))
+            if not chunk:
+                break
+            lengths = set(map(len, chunk))
+            if num_cols is None:
+                num_cols = len(chunk[0])
+            debug.assertion(lengths == {num_cols}, f"row lengths {sorted(lengths)} in rows {num_rows + 1}-{num_rows + len(chunk)}")
+            if min(lengths) >= min_length:
+                output_rows = list(map(select, chunk))
+            else:
+                output_rows = [(select(row) if (len(row) >= min_length) else self.select_fields(row))
+                               for row in chunk]
+            if self.transform_values:
+                output_rows = [[self.transform_value(column) for column in row] for row in output_rows]
+            self.write_rows(csv_writer, output_rows)
+            num_rows += len(chunk)
+            debug.trace(6, f"{num_rows} rows processed")
+        return (num_rows, num_cols)
+
+    def run_pandas_engine(self, csv_writer):
+        """Extract columns via chunked pandas reads with column projection, outputting via CSV_WRITER dialect.
+        Returns tuple with number of rows and columns, with former None if not applicable (e.g., stdin).
+        Note: If the parser fails midway (e.g., row with extra fields), the remaining rows are processed by the bulk engine."""
+        debug.trace(4, "run_pandas_engine(_)")
+        dialect = csv.get_dialect(self.dialect or EXCEL_DIALECT) if (not isinstance(self.dialect, type)) else self.dialect
+        if ((self.input_stream == sys.stdin) or (dialect.quoting == csv.QUOTE_NONNUMERIC)):
+            return (None, None)
+
+        # Resolve fields via first row, making sure all are valid
+        # note: byte order mark not supported as pandas treats quotes after it differently
+        with system.open_file(self.filename, newline="") as stream:
+            first_row = next(csv.reader(stream, delimiter=self.delimiter, dialect=self.dialect), None)
+        if ((first_row is None) or (first_row and first_row[0].startswith(BOM))):
+            return (None, None)
+        self.init_columns(first_row)
+        num_cols = len(first_row)
+        if ((not self.fields) and self.all_fields):
+            self.fields = [(c + 1) for c in range(num_cols) if (c + 1) not in self.exclude_fields]
+        if not (self.fields and all((1 <= f <= num_cols) for f in self.fields)):
+            return (None, None)
+        usecols = sorted(set((f - 1) for f in self.fields))
+        positions = [usecols.index(f - 1) for f in self.fields]
+
+        # Read in chunks with just the needed columns as text
+        # note: quoting for output (e.g., QUOTE_ALL) is same as minimal for input
+        quoting = (dialect.quoting if (dialect.quoting != csv.QUOTE_ALL) else csv.QUOTE_MINIMAL)
+        read_kwargs = {"sep": (self.delimiter or dialect.delimiter), "header": None, "usecols": usecols,
+                       "dtype": str, "na_filter": False, "skip_blank_lines": False, "quoting": quoting,
+                       "doublequote": dialect.doublequote, "escapechar": dialect.escapechar,
+                       "skipinitialspace": dialect.skipinitialspace, "chunksize": CUT_CHUNK_SIZE}
+        if dialect.quotechar:
+            read_kwargs["quotechar"] = dialect.quotechar
+        num_rows = 0
+        try:
+            for chunk in pd.read_csv(self.input_stream, **read_kwargs):
+                output_rows = chunk.iloc[:, positions].fillna("").to_numpy().tolist()
+                if self.transform_values:
+                    output_rows = [[self.transform_value(column) for column in row] for row in output_rows]
+                self.write_rows(csv_writer, output_rows)
+                num_rows += len(output_rows)
+        except (pd.errors.ParserError, ValueError):
+            debug.trace_exception(3, "pandas engine")
+            system.print_stderr(f"Warning: using bulk engine after row {num_rows} due to pandas error")
+            with system.open_file(self.filename, newline="") as stream:
+                rows = csv.reader(stream, delimiter=self.delimiter, dialect=self.dialect)
+                num_rows, _num_cols = self.run_bulk_engine(itertools.islice(rows, num_rows, None),
+                                                           csv_writer, num_rows=num_rows)
+        return (num_rows, num_cols)
 
 if __name__ == '__main__':
     debug.trace_current_context()
@@ -516,6 +706,7 @@ if __name__ == '__main__':
              ]),
         int_options = [(MAX_FIELD_LEN, "Maximum length per field")],
         text_options=[(DELIM, "Input field separator"),
+                      (ENGINE_OPT, f"Engine for column extraction: {', '.join(ENGINES)} (default {CUT_ENGINE})"),
                       (DIALECT, "CSV module dialect: standard (i.e., excel, excel-tab, or unix) or adhoc (e.g., pyspark, hive)"),
                       (OUTPUT_DIALECT, "dialect for output--defaults to input one"),
                       (FIELDS, "Field specification (1-based or label): single column, range of columns, or comma-separated columns"),
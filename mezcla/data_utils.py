@@ -8,6 +8,10 @@
 #   with Pandas, along with tracing.
 # - It is a little idiosyncratic with a bias towards Unix assumptions
 #   (e.g., comments more likely in CSV files).
+# - The faster C parser (or pyarrow if installed) is used unless the options
+#   require the python parser, such as delimiter sniffing (see READ_CSV_ENGINE).
+#   One difference is that the C parser fills in missing trailing fields with ''
+#   rather than NaN (given keep_default_na=False).
 #
 # TODO:
 # - Add simple wrapper class for commonly used idioms, such as len(df.columns) for number of columns.
@@ -19,8 +23,12 @@
 """Utility functions for work with data (e.g., pandas wrappers)"""
 
 # Standard module
-import pandas as pd
 import csv
+import importlib.util
+import weakref
+
+# Installed modules
+import pandas as pd
 
 # Local modules
 from mezcla import debug
@@ -39,6 +47,23 @@ DIALECT = 'dialect'
 EXCEL = 'excel'
 DELIMITER = 'delimiter'
 SEP = 'sep'
+ENGINE = 'engine'
+CHUNKSIZE = 'chunksize'
+AUTO_ENGINE = 'auto'
+C_ENGINE = 'c'
+PYARROW_ENGINE = 'pyarrow'
+PYTHON_ENGINE = 'python'
+CSV_ENGINES = [AUTO_ENGINE, C_ENGINE, PYARROW_ENGINE, PYTHON_ENGINE]
+# Options not supported by the pyarrow parser (n.b., comment is enabled by default)
+PYARROW_UNSUPPORTED = [CHUNKSIZE, 'iterator', COMMENT, DIALECT, 'quoting', 'nrows',
+                       'skipfooter', 'thousands', 'decimal', 'converters', 'low_memory',
+                       'memory_map', 'float_precision', 'verbose']
+READ_CSV_ENGINE = system.getenv_text(
+    "READ_CSV_ENGINE", AUTO_ENGINE,
+    desc=f"Pandas parser for read_csv: {', '.join(CSV_ENGINES)}")
+READ_CSV_CHUNK_SIZE = system.getenv_int(
+    "READ_CSV_CHUNK_SIZE", 10000,
+    desc="Number of rows per chunk for read_csv_chunks")
 
 #--------------------------------------------------------------------------------
 
@@ -49,9 +74,32 @@ if (version_as_float(pd.__version__) < version_as_float(MIN_PANDAS_VERSION)):
 
 #-------------------------------------------------------------------------------
 
+def choose_engine(kw, engine=None):
+    """Return pandas parser to use for read_csv keyword options KW given preferred ENGINE
+    Note: The C parser is used unless the python one is required (e.g., sniffing with SEP of None or regex delimiter); and, pyarrow is used if installed and no unsupported options are specified (e.g., comment or chunksize)."""
+    # EX: choose_engine({"sep": None}) => "python"
+    # EX: choose_engine({"sep": ",", "comment": "#"}, engine="pyarrow") => "c"
+    if engine is None:
+        engine = READ_CSV_ENGINE
+    debug.assertion(engine in CSV_ENGINES)
+    result = engine
+    sep = kw.get(SEP)
+    needs_python = ((not sep) or ((len(sep) > 1) and (sep != r"\s+"))
+                    or kw.get('skipfooter') or callable(kw.get('on_bad_lines')))
+    if (engine == PYTHON_ENGINE) or needs_python:
+        result = PYTHON_ENGINE
+    elif engine in [AUTO_ENGINE, PYARROW_ENGINE]:
+        pyarrow_ok = (not any((kw.get(opt) is not None) for opt in PYARROW_UNSUPPORTED)
+                      and (importlib.util.find_spec("pyarrow") is not None))
+        result = (PYARROW_ENGINE if pyarrow_ok else C_ENGINE)
+    debug.trace(6, f"choose_engine(_, {engine}) => {result}")
+    return result
+
+
 def read_csv(filename, **in_kw):
     """Wrapper around pandas read_csv
     Note: delimiter SEP defaults to DELIM env. var (n.b., uses sniffing if unset), dtype to str, and both error_bad_lines & keep_default_na to False. (Override these via keyword parameters.)
+    The ENGINE keyword defaults to READ_CSV_ENGINE env. var (see choose_engine), with the python parser used as a fallback. Other pandas options like usecols and chunksize are passed along: the latter returns an iterator over data frames (see read_csv_chunks).
     """
     ## TODO2: make the defaults more unintuitive and add option to disable
     # EX: df = read_csv("examples/iris.csv"); df.shape => (150, 5)
@@ -72,7 +120,7 @@ def read_csv(filename, **in_kw):
             kw[SEP] = "\t"
     # Overide settings based on explicit keyword arguments
     kw.update(**in_kw)
-    kw['engine'] = 'python'
+    ## OLD: kw['engine'] = 'python'
     # Turn off quoting if tab delimited
     if kw[SEP] == "\t":
         kw['quoting'] = csv.QUOTE_NONE
@@ -80,19 +128,50 @@ def read_csv(filename, **in_kw):
     if ((COMMENT not in kw) and (kw.get(DIALECT) != EXCEL)):
         debug.trace(4, "FYI: Enabling comments in data_utils.read_csv")
         kw[COMMENT] = "#"
+    # note: delimiter-related options filtered (e.g., alias set to None above)
+    kw[ENGINE] = choose_engine({k: v for (k, v) in kw.items() if v is not None}, kw.get(ENGINE))
     debug.trace_fmt(4, "in data_utils.read_csv({f}, [in_kw={ikw}])", f=filename, ikw=in_kw)
     debug.trace_fmt(4, "\tFYI: kw={k}", k=kw)
     df = None
     try:
-        df = pd.read_csv(filename, **kw)
-        debug.assertion(not(any(c.startswith(" ") for c in list(df.columns))),
-                        'make sure CSV FILE delim not ", "')
+        try:
+            df = pd.read_csv(filename, **kw)
+        except (ValueError, pd.errors.ParserError):
+            # note: retries with the slower but more lenient parser (e.g., for quirky quoting)
+            if kw[ENGINE] == PYTHON_ENGINE:
+                raise
+            debug.trace(4, f"FYI: retrying read_csv with python engine: {system.get_exception()}")
+            if hasattr(filename, "seek"):
+                filename.seek(0)
+            kw[ENGINE] = PYTHON_ENGINE
+            df = pd.read_csv(filename, **kw)
+        if isinstance(df, pd.DataFrame):
+            debug.assertion(not(any(str(c).startswith(" ") for c in list(df.columns))),
+                            'make sure CSV FILE delim not ", "')
     except:
         debug.trace(3, f"Exception during read_csv: {system.get_exception()}")
     debug.trace(4, f"read_csv({filename}) =>\n{df}")
     return df
 
 
+def read_csv_chunks(filename, chunksize=None, **in_kw):
+    """Generator over data frames for FILENAME with CHUNKSIZE rows each (defaults to READ_CSV_CHUNK_SIZE env. var)
+    Note: uses the read_csv defaults; also, yields nothing if the file cannot be read."""
+    # EX: sum(len(df) for df in read_csv_chunks("examples/iris.csv", chunksize=100)) => 150
+    if chunksize is None:
+        chunksize = READ_CSV_CHUNK_SIZE
+    reader = read_csv(filename, chunksize=chunksize, **in_kw)
+    if reader is None:
+        return
+    try:
+        with reader:
+            for df in reader:
+                debug.trace(6, f"read_csv_chunks: yielding {len(df)} rows")
+                yield df
+    except:
+        debug.trace(3, f"Exception during read_csv_chunks: {system.get_exception()}")
+
+
 def to_csv(filename, data_frame, strict=False, **in_kw):
     """Wrapper around pandas DATA_FRAME.to_csv with FILENAME
     Note: by default, the index is omitted;
@@ -116,22 +195,62 @@ write_csv = to_csv
 
 
 def lookup_df_value(data_frame, return_field, lookup_field, lookup_value):
-    """Return value for DATA_FRAME's RETURN_FIELD given LOOKUP_FIELD value LOOKUP_VALUE"""
+    """Return value for DATA_FRAME's RETURN_FIELD given LOOKUP_FIELD value LOOKUP_VALUE
+    Note: This scans the rows for each call: use lookup_df_value_indexed for repeated lookups."""
     # EX: lookup_df_value(df, "sepal_length", "petal_length", "3.8") => "5.5"
-    ## TODO: rework in terms of Pandas primitives
     value = None
     try:
-        # TODO: trace out index location
-        matches = [row[return_field] for index, row in data_frame.iterrows() 
-                   if (row[lookup_field] == lookup_value)]
-        if matches:
-            value = matches[0]
+        ## OLD:
+        ## matches = [row[return_field] for index, row in data_frame.iterrows() 
+        ##            if (row[lookup_field] == lookup_value)]
+        matches = data_frame.loc[data_frame[lookup_field] == lookup_value, return_field]
+        debug.trace(8, f"match index: {list(matches.index)}")
+        if len(matches):
+            value = matches.iloc[0]
     except:
         debug.trace(4, f"Exception during lookup_df_value: {system.get_exception()}")
     debug.trace(7, f"lookup_df_value(_, {return_field}, {lookup_field}, {lookup_value}) => {value}")
     return value
 
 
+# Cache of lookup field value positions: (id(df), field) => (weakref(df), num_rows, positions)
+# note: entries are removed when the data frame is garbage collected
+_lookup_index_cache = {}
+
+
+def get_lookup_index(data_frame, lookup_field, refresh=False):
+    """Return hash map from DATA_FRAME's LOOKUP_FIELD values to (first) row position
+    Note: The map is cached until the frame is deleted or its length changes. Use REFRESH after in-place cell updates."""
+    # EX: get_lookup_index(pd.DataFrame({"k": ["a", "b", "a"]}), "k") => {"a": 0, "b": 1}
+    key = (id(data_frame), lookup_field)
+    entry = _lookup_index_cache.get(key)
+    if (refresh or (not entry) or (entry[0]() is not data_frame)
+            or (entry[1] != len(data_frame))):
+        positions = {}
+        for (pos, value) in enumerate(data_frame[lookup_field].tolist()):
+            positions.setdefault(value, pos)
+        frame_ref = weakref.ref(data_frame, lambda _ref, key=key: _lookup_index_cache.pop(key, None))
+        entry = (frame_ref, len(data_frame), positions)
+        _lookup_index_cache[key] = entry
+        debug.trace(5, f"get_lookup_index: indexed {len(positions)} values for {lookup_field!r}")
+    return entry[2]
+
+
+def lookup_df_value_indexed(data_frame, return_field, lookup_field, lookup_value, refresh=False):
+    """Indexed version of lookup_df_value, using O(1) lookups after the first call for LOOKUP_FIELD
+    Note: REFRESH is needed if DATA_FRAME values are modified in place (see get_lookup_index)."""
+    # EX: lookup_df_value_indexed(df, "sepal_length", "petal_length", "3.8") => "5.5"
+    value = None
+    try:
+        pos = get_lookup_index(data_frame, lookup_field, refresh=refresh).get(lookup_value)
+        if pos is not None:
+            value = data_frame[return_field].iat[pos]
+    except:
+        debug.trace(4, f"Exception during lookup_df_value_indexed: {system.get_exception()}")
+    debug.trace(7, f"lookup_df_value_indexed(_, {return_field}, {lookup_field}, {lookup_value}) => {value}")
+    return value
+
+
 def main():
     """Entry point for script"""
     system.print_stderr("Error: Not intended to be invoked directly")
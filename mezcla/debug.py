@@ -121,6 +121,27 @@ QUITE_VERBOSE = int(TL.QUITE_VERBOSE)
 MOST_DETAILED = int(TL.MOST_DETAILED)
 MOST_VERBOSE = int(TL.MOST_VERBOSE)
 
+# Cached flags for whether tracing is enabled at the usual levels (see enabled_at).
+# Note: These are for zero-overhead checks in hot loops, as in following:
+#    if debug.DETAILED_ENABLED: debug.trace(debug.DETAILED, f"...")
+# They are updated via set_level (but not if trace_level is modified directly).
+ENABLED_FLAG_LEVELS = {
+    "USUAL_ENABLED": USUAL,
+    "DETAILED_ENABLED": DETAILED,
+    "VERBOSE_ENABLED": VERBOSE,
+    "QUITE_DETAILED_ENABLED": QUITE_DETAILED,
+    "QUITE_VERBOSE_ENABLED": QUITE_VERBOSE,
+    "MOST_DETAILED_ENABLED": MOST_DETAILED,
+    "MOST_VERBOSE_ENABLED": MOST_VERBOSE,
+}
+USUAL_ENABLED = False
+DETAILED_ENABLED = False
+VERBOSE_ENABLED = False
+QUITE_DETAILED_ENABLED = False
+QUITE_VERBOSE_ENABLED = False
+MOST_DETAILED_ENABLED = False
+MOST_VERBOSE_ENABLED = False
+
 # Other constants
 UTF8 = "UTF-8"
 STRING_TYPES = six.string_types
@@ -327,6 +348,7 @@ if __debug__:
             """Set new trace level"""
             global trace_level
             trace_level = level
+            _update_enabled_flags()
             return
 
         def get_level(self) -> IntOrTraceLevel:
@@ -1268,8 +1290,34 @@ if __debug__:
             skip_sanity_checks: Optional[bool] = None
         ) -> str:
         """Print TEXT if at trace LEVEL or higher"""
+        # note: fast path avoids method call when disabled (see enabled_at)
+        if ((trace_level < level) and (empty_arg is None)):
+            return ""
         return _debug.trace(level, text, empty_arg, no_eol, indentation, max_len, skip_sanity_checks)
 
+    def enabled_at(level: IntOrTraceLevel) -> bool:
+        """Whether tracing is enabled at LEVEL
+        Note: Like debugging but without the function call overhead for get_level."""
+        return (trace_level >= level)
+
+    def trace_lazy(level: IntOrTraceLevel, text_function: Callable[[], str], **kwargs) -> str:
+        """Print result of TEXT_FUNCTION if at trace LEVEL or higher, with KWARGS for trace.
+        This avoids formatting costs when disabled, as in following:
+            trace_lazy(DETAILED, lambda: f"row={row!r}")
+        """
+        if (trace_level < level):
+            return ""
+        return _debug.trace(level, text_function(), **kwargs)
+
+    def trace_pct(level: IntOrTraceLevel, text: str, *args) -> str:
+        """Print TEXT formatted %-style with ARGS if at trace LEVEL or higher.
+        This avoids formatting costs when disabled, as in following:
+            trace_pct(DETAILED, "row=%r", row)
+        """
+        if (trace_level < level):
+            return ""
+        return _debug.trace(level, ((text % args) if args else text))
+
     def check_keyword_args(level: IntOrTraceLevel, expected: str, kwargs: Dict[str, Any],
                            function: str, format_text: OptStr = None, add_underscore: bool = False) -> None:
         """Make sure KWARGS in EXPECTED list for FUNCTION at trace LEVEL"""
@@ -1278,6 +1326,8 @@ if __debug__:
     @docstring_parameter(max_len=max_trace_value_len)
     def trace_fmtd(level: IntOrTraceLevel, text: str, **kwargs) -> None:
         """Print TEXT with formatting using optional format KWARGS if at trace LEVEL or higher"""
+        if (trace_level < level):
+            return ""
         return _debug.trace_fmtd(level, text, **kwargs)
 
     def trace_object(
@@ -1294,6 +1344,9 @@ if __debug__:
             regular_standard: bool = False
         ) -> None:
         """Trace out OBJ's members to stderr if at trace LEVEL or higher"""
+        # note: trace_object has internal tracing at MOST_VERBOSE
+        if ((trace_level < level) and (trace_level < MOST_VERBOSE)):
+            return None
         return _debug.trace_object(level, obj, label, show_all, show_private, show_methods_etc,
                                    indentation, pretty_print, max_value_len, max_depth, regular_standard)
 
@@ -1307,12 +1360,17 @@ if __debug__:
             max_len: Optional[int] = None
         ) -> None:
         """Trace out elements of array or hash COLLECTION if at trace LEVEL or higher"""
+        if ((trace_level < level) and (trace_level < MOST_VERBOSE)):
+            return None
         return _debug.trace_values(level, collection, label, indentation, use_repr, max_len)
 
     @docstring_parameter(max_len=max_trace_value_len)
     def trace_expr(level: IntOrTraceLevel, *values, **kwargs) -> str:
         """Trace each of the argument VALUES (if at trace LEVEL or higher).
         Note: _caller_depth=1 is passed to account for this wrapper frame."""
+        # note: trace_expr checks keyword arguments at VERBOSE
+        if ((trace_level < level) and (trace_level < VERBOSE)):
+            return ""
         return _debug.trace_expr(level, *values, _caller_depth=1, **kwargs)
 
     def trace_frame(level: IntOrTraceLevel, frame: Optional[FrameType], label: str = "frame") -> None:
@@ -1426,6 +1484,14 @@ else:
 
     trace_fmtd = non_debug_stub
 
+    trace_lazy = non_debug_stub
+
+    trace_pct = non_debug_stub
+
+    def enabled_at(_level: IntOrTraceLevel) -> bool:
+        """Non-debug stub: tracing never enabled"""
+        return False
+
     trace_object = non_debug_stub
 
     trace_values = non_debug_stub
@@ -1507,6 +1573,17 @@ def timestamp() -> str:
     return (str(datetime.now()))
     
 
+def enabled_flags(level: IntOrTraceLevel) -> Dict[str, bool]:
+    """Return hash from cached flag name (e.g., DETAILED_ENABLED) to whether enabled at trace LEVEL"""
+    # EX: enabled_flags(4)["DETAILED_ENABLED"] => True
+    return {name: (level >= flag_level) for (name, flag_level) in ENABLED_FLAG_LEVELS.items()}
+
+
+def _update_enabled_flags() -> None:
+    """Update cached flags like DETAILED_ENABLED for the current trace level"""
+    globals().update(enabled_flags(get_level()))
+
+
 def debugging(level: IntOrTraceLevel = USUAL) -> bool:
     """Whether debugging at specified trace LEVEL (e.g., 3 for usual)"""
     ## NOTE: Gotta hate python/pylint (no warning about docstring)
@@ -1796,6 +1873,7 @@ if __debug__:
 
     # Do the initialization
     _debug.debug_init()
+    _update_enabled_flags()
 
 #-------------------------------------------------------------------------------
 
@@ -0,0 +1,85 @@
+#! /usr/bin/env python3
+#
+# Micro-benchmark for the per-call overhead of disabled debug tracing (see debug.py),
+# comparing the regular tracing functions with the fast-path variants: the
+# enabled_at check, cached flags like VERBOSE_ENABLED, trace_lazy, and trace_pct.
+#
+# Note:
+# - The traces are at VERBOSE (5) level, and the trace level is lowered if needed
+#   so that they are disabled.
+# - The "method" case goes directly through the DebugWrapper method, which was the
+#   path for the module-level functions prior to the fast-path checks.
+#
+
+"""Benchmark per-call overhead for disabled debug tracing
+
+Sample usage:
+   {script} --num-calls 100000
+"""
+
+# Standard modules
+import timeit
+
+# Local modules
+from mezcla import debug
+from mezcla.main import Main
+
+# Constants
+NUM_CALLS_ARG = "num-calls"
+TRACE_LEVEL = debug.VERBOSE
+
+# Statements to time, with row and value variables as in typical hot loops
+BENCHMARK_STATEMENTS = [
+    ("method", "debug._debug.trace_fmtd(TRACE_LEVEL, 'row={r} value={v}', r=row, v=value)"),
+    ("trace", "debug.trace(TRACE_LEVEL, f'row={row} value={value}')"),
+    ("trace_fmtd", "debug.trace_fmtd(TRACE_LEVEL, 'row={r} value={v}', r=row, v=value)"),
+    ("trace_expr", "debug.trace_expr(TRACE_LEVEL, row, value)"),
+    ("trace_lazy", "debug.trace_lazy(TRACE_LEVEL, lambda: f'row={row} value={value}')"),
+    ("trace_pct", "debug.trace_pct(TRACE_LEVEL, 'row=%s value=%s', row, value)"),
+    ("enabled_at", "debug.enabled_at(TRACE_LEVEL) and debug.trace(TRACE_LEVEL, f'row={row} value={value}')"),
+    ("cached_flag", "debug.VERBOSE_ENABLED and debug.trace(TRACE_LEVEL, f'row={row} value={value}')"),
+    ("no_trace", "pass"),
+]
+
+#-------------------------------------------------------------------------------
+
+def time_statement(statement, num_calls):
+    """Return nanoseconds per call for STATEMENT over NUM_CALLS"""
+    timer = timeit.Timer(statement, globals={"debug": debug, "TRACE_LEVEL": TRACE_LEVEL,
+                                             "row": 123, "value": "some value"})
+    # note: takes best of a few runs to reduce noise
+    seconds = min(timer.repeat(repeat=3, number=num_calls))
+    return (1e9 * seconds / num_calls)
+
+
+class Script(Main):
+    """Input processing class"""
+    num_calls = 100000
+
+    def setup(self):
+        """Check results of command line processing"""
+        debug.trace_fmtd(5, "Script.setup(): self={s}", s=self)
+        self.num_calls = self.get_parsed_option(NUM_CALLS_ARG, self.num_calls)
+        debug.trace_object(5, self, label="Script instance")
+
+    def run_main_step(self):
+        """Main processing step"""
+        debug.trace_fmtd(5, "Script.run_main_step(): self={s}", s=self)
+        old_level = debug.get_level()
+        if debug.enabled_at(TRACE_LEVEL):
+            debug.set_level(TRACE_LEVEL - 1)
+        print("method\tns")
+        for (label, statement) in BENCHMARK_STATEMENTS:
+            print(f"{label}\t{time_statement(statement, self.num_calls):.1f}")
+        debug.set_level(old_level)
+
+#-------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    debug.trace_current_context(level=debug.QUITE_DETAILED)
+    app = Script(
+        description=__doc__.format(script=__file__),
+        skip_input=True,
+        manual_input=True,
+        int_options=[(NUM_CALLS_ARG, "Number of calls per timing run")])
+    app.run()
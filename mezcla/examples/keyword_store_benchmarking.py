@@ -0,0 +1,100 @@
+#! /usr/bin/env python3
+#
+# Benchmark for the TF-IDF document keyword representations: the regular
+# dict of DocKeyword objects versus the compact array-based KeywordStore
+# (see tfidf/dockeyword.py).
+#
+# Note:
+# - Memory is that retained by the keywordset after the build (via tracemalloc),
+#   along with the peak allocation during the build.
+# - Uses a small vocabulary by default so that ngrams repeat often, which was
+#   the quadratic case for the DocKeyword merging.
+#
+
+"""Benchmark memory and time for building TF-IDF document keywords
+
+Sample usage:
+   {script} --num-words 100000
+"""
+
+# Standard modules
+import random
+import tracemalloc
+
+# Local modules
+from mezcla import debug
+from mezcla.main import Main
+from mezcla import misc_utils
+from mezcla import system
+from mezcla.tfidf.document import Document
+from mezcla.tfidf.preprocess import Preprocessor
+
+# Constants
+NUM_WORDS_ARG = "num-words"
+VOCAB_SIZE_ARG = "vocab-size"
+MAX_NGRAM_ARG = "max-ngram"
+
+# Environment options
+BENCHMARK_SEED = system.getenv_int(
+    "BENCHMARK_SEED", 13,
+    description="Random seed for synthetic document")
+
+#-------------------------------------------------------------------------------
+
+def build_keywords(text, preprocessor, compact):
+    """Build keywordset for TEXT using PREPROCESSOR, returning (document, ms, retained bytes, peak bytes)"""
+    doc = Document(text, preprocessor, compact=compact)
+    tracemalloc.start()
+    ms = misc_utils.time_function(lambda: doc.keywordset)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    debug.trace(5, f"build_keywords(compact={compact}) => {ms}ms {current} {peak} bytes")
+    return (doc, ms, current, peak)
+
+
+class Script(Main):
+    """Input processing class"""
+    num_words = 10000
+    vocab_size = 100
+    max_ngram = 2
+
+    def setup(self):
+        """Check results of command line processing"""
+        debug.trace_fmtd(5, "Script.setup(): self={s}", s=self)
+        self.num_words = self.get_parsed_option(NUM_WORDS_ARG, self.num_words)
+        self.vocab_size = self.get_parsed_option(VOCAB_SIZE_ARG, self.vocab_size)
+        self.max_ngram = self.get_parsed_option(MAX_NGRAM_ARG, self.max_ngram)
+        debug.trace_object(5, self, label="Script instance")
+
+    def run_main_step(self):
+        """Main processing step"""
+        debug.trace_fmtd(5, "Script.run_main_step(): self={s}", s=self)
+        random.seed(BENCHMARK_SEED)
+        words = [f"w{i}" for i in range(self.vocab_size)]
+        text = " ".join(random.choice(words) for _i in range(self.num_words))
+        pp = Preprocessor(min_ngram_size=1, max_ngram_size=self.max_ngram, stemmer=lambda x: x)
+
+        # Build keywords both ways and make sure they agree
+        regular_doc, regular_ms, regular_bytes, regular_peak = build_keywords(text, pp, compact=False)
+        compact_doc, compact_ms, compact_bytes, compact_peak = build_keywords(text, pp, compact=True)
+        debug.assertion(len(regular_doc) == len(compact_doc))
+        debug.assertion(regular_doc.max_raw_frequency == compact_doc.max_raw_frequency)
+
+        # Show results
+        print("method\tms\tKB\tpeak-KB")
+        for (method, ms, num_bytes, peak_bytes) in [("regular", regular_ms, regular_bytes, regular_peak),
+                                                    ("compact", compact_ms, compact_bytes, compact_peak)]:
+            print(f"{method}\t{ms}\t{round(num_bytes / 1024)}\t{round(peak_bytes / 1024)}")
+
+#-------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    debug.trace_current_context(level=debug.QUITE_DETAILED)
+    app = Script(
+        description=__doc__.format(script=__file__),
+        skip_input=True,
+        manual_input=True,
+        int_options=[(NUM_WORDS_ARG, "Number of words in synthetic document"),
+                     (VOCAB_SIZE_ARG, "Number of distinct words"),
+                     (MAX_NGRAM_ARG, "Maximum ngram size")])
+    app.run()
@@ -0,0 +1,47 @@
+#! /usr/bin/env python3
+#
+# Test(s) for ../debug_tracing_benchmarking.py
+#
+# Notes:
+# - This can be run as follows (e.g., from root of repo):
+#   $ pytest ./mezcla/examples/tests/test_debug_tracing_benchmarking.py
+#
+
+"""Tests for debug_tracing_benchmarking module"""
+
+# Standard modules
+## NOTE: this is empty for now
+
+# Installed modules
+import pytest
+
+# Local modules
+from mezcla.unittest_wrapper import TestWrapper
+from mezcla import debug
+from mezcla.my_regex import my_re
+
+# Note: Two references are used for the module to be tested:
+#    THE_MODULE:                        global module object
+#    TestIt.script_module:              path to file
+import mezcla.examples.debug_tracing_benchmarking as THE_MODULE
+
+#------------------------------------------------------------------------
+
+class TestIt(TestWrapper):
+    """Class for command-line based testcase definition"""
+    script_module = TestWrapper.get_testing_module_name(__file__, THE_MODULE)
+
+    def test_01_few_calls(self):
+        """Tests run_script with small number of calls"""
+        debug.trace(4, f"TestIt.test_01_few_calls(); self={self}")
+        output = self.run_script(options="--num-calls 1000", skip_stdin=True)
+        # ex: trace_pct    163.6
+        self.do_assert(my_re.search(r"^trace_fmtd\t[0-9.]+$", output, flags=my_re.MULTILINE))
+        self.do_assert(my_re.search(r"^cached_flag\t[0-9.]+$", output, flags=my_re.MULTILINE))
+        return
+
+#------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    debug.trace_current_context()
+    pytest.main([__file__])
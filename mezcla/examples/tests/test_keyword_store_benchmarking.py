@@ -0,0 +1,47 @@
+#! /usr/bin/env python3
+#
+# Test(s) for ../keyword_store_benchmarking.py
+#
+# Notes:
+# - This can be run as follows (e.g., from root of repo):
+#   $ pytest ./mezcla/examples/tests/test_keyword_store_benchmarking.py
+#
+
+"""Tests for keyword_store_benchmarking module"""
+
+# Standard modules
+## NOTE: this is empty for now
+
+# Installed modules
+import pytest
+
+# Local modules
+from mezcla.unittest_wrapper import TestWrapper
+from mezcla import debug
+from mezcla.my_regex import my_re
+
+# Note: Two references are used for the module to be tested:
+#    THE_MODULE:                        global module object
+#    TestIt.script_module:              path to file
+import mezcla.examples.keyword_store_benchmarking as THE_MODULE
+
+#------------------------------------------------------------------------
+
+class TestIt(TestWrapper):
+    """Class for command-line based testcase definition"""
+    script_module = TestWrapper.get_testing_module_name(__file__, THE_MODULE)
+
+    def test_01_small_document(self):
+        """Tests run_script over small synthetic document"""
+        debug.trace(4, f"TestIt.test_01_small_document(); self={self}")
+        output = self.run_script(options="--num-words 500", skip_stdin=True)
+        # ex: compact    4.512    12    48
+        self.do_assert(my_re.search(r"^regular\t[0-9.]+\t\d+\t\d+$", output, flags=my_re.MULTILINE))
+        self.do_assert(my_re.search(r"^compact\t[0-9.]+\t\d+\t\d+$", output, flags=my_re.MULTILINE))
+        return
+
+#------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    debug.trace_current_context()
+    pytest.main([__file__])
@@ -3,10 +3,18 @@
 # Filters lines in input file, based on random numbers
 # TODO: use iterator for input (see ???)
 #
+# Note:
+# - With --skip-sampling, the number of lines to skip before the next one kept
+#   is drawn from a geometric distribution. The skipped lines are counted at the
+#   byte level over large blocks (i.e., not decoded), so that small ratios are
+#   mostly I/O bound. This uses a different random sequence than the regular
+#   per-line mode, so the output will differ for a given seed.
+#
 
 """Filter lines randomly"""
 
 # Standard packages
+import math
 import random
 import sys
 
@@ -15,24 +23,55 @@ import sys
 #
 # "local" packages (n.b., check for customized version)
 from mezcla import debug
-from mezcla.main import Main
+from mezcla.main import Main, BLOCK_INPUT_SIZE
 from mezcla import system
 
 INCLUDE_HEADER = "include-header"
 RATIO = "ratio"
 SEED = "seed"
 QUIET_MODE = "quiet"
+SKIP_SAMPLING = "skip-sampling"
 ## TODO: ALT_TODO_ARG = "alt-todo-arg"
 DEFAULT_RATIO = system.getenv_number("DEFAULT_RATIO", 0.10,
                                      "Ratio of input to use (i.e., percent/100)")
 RANDOM_SEED = system.getenv_integer("RANDOM_SEED", 15485863,
                                     "Integral seed for randoom number generation")
+SKIP_SAMPLING_DEFAULT = system.getenv_bool(
+    "SKIP_SAMPLING", False,
+    desc="Use geometric skip-ahead sampling over raw input bytes")
+# Range size below which newlines are located one at a time (see find_nth_newline)
+MIN_COUNT_RANGE = 4096
+
+#-------------------------------------------------------------------------------
+
+def find_nth_newline(buffer, start, num):
+    """Return offset of NUM-th newline in bytes BUFFER from START (n.b., must exist)
+    Note: the range is narrowed by bisection using bytes.count, so that large
+    skips don't require a find call per line."""
+    # EX: find_nth_newline(b"a\nb\nc\n", 0, 2) => 3
+    end = len(buffer)
+    while ((end - start) > MIN_COUNT_RANGE):
+        mid = (start + end) // 2
+        num_newlines = buffer.count(b"\n", start, mid)
+        if (num_newlines >= num):
+            end = mid
+        else:
+            num -= num_newlines
+            start = mid
+    offset = start - 1
+    for _i in range(num):
+        offset = buffer.find(b"\n", offset + 1)
+    debug.assertion(offset >= 0)
+    return offset
+
+#-------------------------------------------------------------------------------
 
 class Filter(Main):
     """Input processing class"""
     include_header = False
     ratio = 0.10
     quiet_mode = False
+    skip_sampling = False
     ## alt_todo_arg = ""
 
     def setup(self):
@@ -43,6 +82,7 @@ class Filter(Main):
         if seed:
             random.seed(seed)
         self.quiet_mode = self.get_parsed_option(QUIET_MODE, self.quiet_mode)
+        self.skip_sampling = self.get_parsed_option(SKIP_SAMPLING, SKIP_SAMPLING_DEFAULT)
         ## TODO: self.alt_todo_arg = self.get_parsed_option(alt_todo_arg, self.alt_todo_arg)
         debug.trace_object(6, self, "filter instance")
         debug.trace(4, "ratio={self.ratio}, seed={seed}")
@@ -50,6 +90,7 @@ class Filter(Main):
         self.status(f"Print header: {self.include_header}")
         self.status(f"Ratio: {self.ratio}")
         self.status(f"Random seed: {seed}")
+        self.status(f"Skip sampling: {self.skip_sampling}")
         debug.trace_object(5, self, label="Filter instance")
         return
 
@@ -69,6 +110,73 @@ class Filter(Main):
             print(line)
         return
 
+    def get_skip(self):
+        """Return number of lines to skip before next one kept (geometric distribution)
+        Note: returns None if no further lines are to be kept (i.e., ratio of 0)"""
+        if (self.ratio >= 1):
+            return 0
+        if (self.ratio <= 0):
+            return None
+        # note: 1.0 - random() is in (0, 1], avoiding log(0)
+        return int(math.log(1.0 - random.random()) / math.log1p(-self.ratio))
+
+    def sample_raw_lines(self, stream):
+        """Generator for lines kept from binary STREAM, including the header if applicable
+        Note: lines are bytes without the newline"""
+        buffer = stream.read(BLOCK_INPUT_SIZE)
+        offset = 0
+        skip = (0 if self.include_header else self.get_skip())
+        while (buffer and (skip is not None)):
+            # Skip over lines, counting newlines a block at a time
+            while skip:
+                num_newlines = buffer.count(b"\n", offset)
+                if (num_newlines < skip):
+                    skip -= num_newlines
+                    buffer = stream.read(BLOCK_INPUT_SIZE)
+                    offset = 0
+                    if not buffer:
+                        return
+                else:
+                    offset = find_nth_newline(buffer, offset, skip) + 1
+                    skip = 0
+
+            # Extract the line to keep, which might span blocks
+            pieces = []
+            end = buffer.find(b"\n", offset)
+            while (end == -1):
+                pieces.append(buffer[offset:])
+                buffer = stream.read(BLOCK_INPUT_SIZE)
+                offset = 0
+                if not buffer:
+                    break
+                end = buffer.find(b"\n")
+            if buffer:
+                pieces.append(buffer[offset:end])
+                offset = end + 1
+            line = b"".join(pieces)
+            if (line or buffer):
+                yield line
+            skip = self.get_skip()
+            if (buffer and (offset >= len(buffer))):
+                buffer = stream.read(BLOCK_INPUT_SIZE)
+                offset = 0
+        return
+
+    def process_input(self):
+        """Process input, using skip sampling if applicable (see sample_raw_lines)"""
+        raw_stream = getattr(self.input_stream, "buffer", None)
+        if not (self.skip_sampling and self.is_line_mode() and raw_stream):
+            debug.trace(5, f"Using regular input processing: skip_sampling={self.skip_sampling}")
+            super().process_input()
+            return
+        encoding = self.input_stream.encoding
+        errors = self.input_stream.errors
+        for raw_line in self.sample_raw_lines(raw_stream):
+            if raw_line.endswith(b"\r"):
+                raw_line = raw_line[:-1]
+            print(raw_line.decode(encoding, errors))
+        return
+
 if __name__ == '__main__':
     ## debug.trace_fmt(3, "Environment options: {eo}",
     ##                 eo=system.formatted_environment_option_descriptions())
@@ -76,7 +184,8 @@ if __name__ == '__main__':
                  # TODO: use Main.read_input directly w/ manual_input=True
                  # TODO: mention USE_PARAGRAPH_MODE env. option
                  boolean_options=[(INCLUDE_HEADER, "Include header line"),
-                                  (QUIET_MODE, "Don't print status messages")],
+                                  (QUIET_MODE, "Don't print status messages"),
+                                  (SKIP_SAMPLING, "Skip over lines via geometric distribution--faster for small ratios")],
                  ## TODO: text_options=[(alt_todo_arg, "TODO-desc")],
                  float_options=[(RATIO, "Random threshold in range [0, 1] for lines to be incorporated", DEFAULT_RATIO), 
                                 (SEED, "Random seed", RANDOM_SEED)])
@@ -59,13 +59,22 @@
 """HTML utility functions"""
 
 # Standard packages
+import atexit
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 import html
+import json
+import os
 import sys
+import threading
 import time
 import traceback
+import urllib.parse
 import urllib.request
 from urllib.error import HTTPError, URLError
 from http.client import HTTPMessage
+from http.cookiejar import DefaultCookiePolicy
 try:
     # pylint: disable=no-name-in-module
     from typing_extensions import Any, Callable, Dict, List, Optional, Union
@@ -79,6 +88,7 @@ except:
 # Installed packages
 # Note: selenium import now optional; BeautifulSoup also optional
 import requests
+from requests.adapters import HTTPAdapter
 
 # Local packages
 from mezcla import debug
@@ -108,6 +118,12 @@ SKIP_BROWSER_CACHE = system.getenv_boolean(
     "SKIP_BROWSER_CACHE", False,
     description="Don't use cached webdriver browsers")
 USE_BROWSER_CACHE = not SKIP_BROWSER_CACHE
+BROWSER_POOL_SIZE = system.getenv_int(
+    "BROWSER_POOL_SIZE", 2,
+    description="Maximum number of selenium browsers kept for reuse across URLs")
+BROWSER_MAX_PAGES = system.getenv_int(
+    "BROWSER_MAX_PAGES", 100,
+    description="Pages loaded per pooled browser before it is recycled (0 for no limit)")
 DOWNLOAD_DIR = system.getenv_text(
     "DOWNLOAD_DIR", "downloads",
     description="Default download directory")
@@ -118,6 +134,31 @@ DOWNLOAD_VIA_REQUESTS = (not DOWNLOAD_VIA_URLLIB)
 DOWNLOAD_TIMEOUT = system.getenv_float(
     "DOWNLOAD_TIMEOUT", 5,
     description="Timeout in seconds for request-based as with download_web_document")
+REUSE_CONNECTIONS = system.getenv_bool(
+    "REUSE_CONNECTIONS", True,
+    description="Use pooled requests session with keep-alive for retrieve_web_document (without cookies)")
+DOWNLOAD_WORKERS = system.getenv_int(
+    "DOWNLOAD_WORKERS", 8,
+    description="Default number of threads for download_web_documents")
+PER_HOST_LIMIT = system.getenv_int(
+    "PER_HOST_LIMIT", 2,
+    description="Maximum concurrent requests per host for download_web_documents")
+DOWNLOAD_CACHE_TTL = system.getenv_float(
+    "DOWNLOAD_CACHE_TTL", 3600,
+    description="Seconds cached downloads are used without revalidation, unless Cache-Control max-age given")
+DOWNLOAD_CACHE_MAX_BYTES = system.getenv_int(
+    "DOWNLOAD_CACHE_MAX_BYTES", 1024 * 1024 * 1024,
+    description="Size bound for files downloaded with use_cached, with LRU eviction (0 for no bound)")
+DOWNLOAD_CACHE_SAVE_INTERVAL = system.getenv_int(
+    "DOWNLOAD_CACHE_SAVE_INTERVAL", 100,
+    description="Number of download cache index updates between saves (also saved at exit)")
+SKIP_DOWNLOAD_CACHE_INDEX = system.getenv_bool(
+    "SKIP_DOWNLOAD_CACHE_INDEX", False,
+    description="Don't maintain download cache index with HTTP validators (i.e., use_cached just checks for file)")
+USE_DOWNLOAD_CACHE_INDEX = not SKIP_DOWNLOAD_CACHE_INDEX
+PER_HOST_DELAY_SECONDS = system.getenv_float(
+    "PER_HOST_DELAY_SECONDS", POST_DOWNLOAD_SLEEP_SECONDS,
+    description="Minimum interval between request starts to the same host with download_web_documents")
 HEADLESS_WEBDRIVER = system.getenv_bool(
     "HEADLESS_WEBDRIVER", True,
     description="Whether Selenium webdriver is hidden")
@@ -173,6 +214,9 @@ BROWSER_TIMEOUT = system.getenv_value(
 
 HEADERS = "headers"
 FILENAME = "filename"
+STATUS_CODE = "status_code"
+CACHE_INDEX_FILENAME = ".download-cache-index.json"
+NOT_MODIFIED = 304
 USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36'
 
 # Custom Types
@@ -208,93 +252,202 @@ except:
 #-------------------------------------------------------------------------------
 # HTML utility functions
 
-browser_cache : Dict[str, WebDriver] = {}
+def create_browser(timeout : Optional[float] = None) -> Optional[WebDriver]:
+    """Create new selenium webdriver browser, honoring options like HEADLESS_WEBDRIVER and BROWSER_DIMENSIONS
+    Note: Use get_browser instead to get one from browser_pool."""
+    if timeout is None:
+        timeout = BROWSER_TIMEOUT
+    debug.trace(4, f"in create_browser(); {timeout=}")
+    browser : Optional[WebDriver] = None
+    if webdriver is None:
+        print("Error: Selenium library is not installed. Please install it using 'pip install selenium'.")
+        return None
+    try:
+        # Make the browser hidden by default (i.e., headless)
+        # See https://stackoverflow.com/questions/46753393/how-to-make-firefox-headless-programmatically-in-selenium-with-python.
+        options_module = (webdriver.firefox.options if FIREFOX_WEBDRIVER else webdriver.chrome.options)
+        webdriver_options = options_module.Options()
+
+        if BROWSER_PATH:
+            webdriver_options.binary_location = BROWSER_PATH
+            debug.assertion(system.file_exists(BROWSER_PATH))
+            debug.trace(4, f"Warning: overriding webdriver path: {webdriver_options.binary_location=}")
+        if HEADLESS_WEBDRIVER:
+            webdriver_options.add_argument('-headless')
+        if KIOSK_MODE:
+            webdriver_options.add_argument('-kiosk')
+        if FIREFOX_PROFILE:
+            webdriver_options.add_argument('-profile')
+            webdriver_options.add_argument(FIREFOX_PROFILE)
+        if CHROME_PROFILE:
+            webdriver_options.add_argument(f'--user-data-dir={CHROME_PROFILE}')
+        debug.trace_object(5, webdriver_options)
+        debug.assertion(not (FIREFOX_WEBDRIVER and CHROME_WEBDRIVER))
+        if FIREFOX_WEBDRIVER:
+            service = FirefoxService(executable_path=WEBDRIVER_PATH) if WEBDRIVER_PATH else None
+            browser = webdriver.Firefox(service=service, options=webdriver_options)
+        else:                        # CHROME_WEBDRIVER
+            service = ChromeService(executable_path=WEBDRIVER_PATH) if WEBDRIVER_PATH else None
+            browser = webdriver.Chrome(service=service, options=webdriver_options)
+        if BROWSER_DIMENSIONS:
+            dims = [system.to_float(d) for d in misc_utils.extract_string_list(BROWSER_DIMENSIONS)]
+            debug.assertion(len(dims) == 2)
+            browser.set_window_size(*dims)
+        if debug.get_level() >= 6:
+            debug.trace_fmt(1, "Window dimensions: {w}x{h}",
+                            w=browser.execute_script("return window.outerWidth"),
+                            h=browser.execute_script("return window.outerHeight"))
+        if timeout:
+            ## TODO2: determine way for timeout to honored without timeout exception during get below
+            debug.assertion(False, "Selenium timeout support not functional")
+            browser.set_page_load_timeout(system.to_float(timeout))
+        debug.trace_object(5, browser)
+    except:
+        browser = None
+        debug.raise_exception(6)
+        system.print_exception_info("create_browser")
+        ## UPDATE: 5/10/2026: Diagnostics based on Gemini 3.1 tips
+        exc_info = str(system.get_exception())
+        debug.trace(4, f"Error initializing Selenium WebDriver: {exc_info}")
+        if my_re.search(r"geckodriver|firefox", exc_info.lower()):
+            debug.trace(4, "Hint: You may need to install geckodriver or set WEBDRIVER_PATH.")
+        elif my_re.search(r"chrome(driver)?", exc_info.lower()):
+            debug.trace(4, "Hint: You may need to install chromedriver or set WEBDRIVER_PATH.")
+        else:
+            debug.trace(4, "FYI: You might need more selenium diagnostics")
+
+    debug.trace_fmt(5, "create_browser() => {b}", b=browser)
+    return browser
+
+
+class BrowserPool:
+    """Bounded pool of selenium browsers reused across URLs via navigation.
+    Notes:
+    - Each browser shows one page at a time, so the pool maps the URL currently loaded to its browser,
+      in least-recently used order. Requests for a URL already loaded reuse the page as is.
+    - When MAX_SIZE browsers are in use, the least-recently used one is navigated to the new URL.
+    - Browsers failing a health check or having loaded MAX_PAGES pages are recycled.
+    - Browsers obtained previously for other URLs might be renavigated, so get them again as needed (e.g., by URL)."""
+
+    def __init__(self, max_size: Optional[int] = None, max_pages: Optional[int] = None,
+                 factory: Optional[Callable[..., Any]] = None) -> None:
+        """Initializer: see class docstring (defaults from BROWSER_POOL_SIZE and BROWSER_MAX_PAGES).
+        Note: The FACTORY (defaults to create_browser) is called with timeout keyword."""
+        self.max_size = max(1, (max_size if max_size is not None else BROWSER_POOL_SIZE))
+        self.max_pages = (max_pages if max_pages is not None else BROWSER_MAX_PAGES)
+        self.factory = (factory or create_browser)
+        self.url_browser: OrderedDict[str, WebDriver] = OrderedDict()
+        self.page_counts: Dict[int, int] = {}
+        self.lock = threading.RLock()
+        self.num_created = 0
+        self.num_recycled = 0
+
+    def __len__(self) -> int:
+        """Number of browsers in pool"""
+        return len(self.url_browser)
+
+    def get(self, url: str) -> Optional[WebDriver]:
+        """Return existing browser for URL if any and healthy (n.b., no navigation)"""
+        with self.lock:
+            browser = self.url_browser.get(url)
+            if browser is not None:
+                if self.is_healthy(browser):
+                    self.url_browser.move_to_end(url)
+                else:
+                    debug.trace(4, f"Discarding unhealthy browser for {url!r}")
+                    self.discard(url)
+                    browser = None
+        return browser
+
+    def acquire(self, url: str, timeout: Optional[float] = None) -> Optional[WebDriver]:
+        """Get browser for loading URL, reusing least-recently used one if pool full.
+        Note: The caller should navigate to URL (see get_browser)."""
+        with self.lock:
+            browser = None
+            if len(self.url_browser) >= self.max_size:
+                (old_url, browser) = self.url_browser.popitem(last=False)
+                debug.trace(5, f"Reusing browser for {old_url!r}")
+                if (self.max_pages and (self.page_counts.get(id(browser), 0) >= self.max_pages)) or not self.is_healthy(browser):
+                    debug.trace(4, f"Recycling browser: pages={self.page_counts.get(id(browser))}")
+                    self.retire(browser)
+                    self.num_recycled += 1
+                    browser = None
+            if browser is None:
+                browser = self.factory(timeout=timeout)
+                if browser is None:
+                    return None
+                self.num_created += 1
+                self.page_counts[id(browser)] = 0
+            self.url_browser[url] = browser
+            self.page_counts[id(browser)] += 1
+        return browser
+
+    @staticmethod
+    def is_healthy(browser: WebDriver) -> bool:
+        """Whether BROWSER is responsive"""
+        try:
+            ok = (browser.execute_script("return 1") == 1)
+        except:
+            debug.trace_exception(5, "browser health check")
+            ok = False
+        return ok
+
+    def retire(self, browser: WebDriver) -> None:
+        """Shut down BROWSER (n.b., already removed from url_browser)"""
+        self.page_counts.pop(id(browser), None)
+        shutdown_browser(browser)
+
+    def discard(self, url: str) -> None:
+        """Remove browser for URL from pool and shut it down"""
+        with self.lock:
+            browser = self.url_browser.pop(url, None)
+            if browser is not None:
+                self.retire(browser)
+
+    def clear(self) -> None:
+        """Shut down all browsers in pool"""
+        with self.lock:
+            for url in list(self.url_browser):
+                self.discard(url)
+
+
+browser_pool = BrowserPool()
+## OLD: browser_cache : Dict[str, WebDriver] = {}
+## NOTE: browser_cache maps URL to browser as before, but it is now bounded (see BrowserPool)
+browser_cache = browser_pool.url_browser
+atexit.register(browser_pool.clear)
 ##
 def get_browser(url : str, timeout : Optional[float] = None) -> Optional[WebDriver]:
-    """Get existing browser for URL or create new one
+    """Get existing browser for URL or load URL in one from browser_pool
     Notes: 
     - This is for use in web automation (e.g., via selenium).
     - A large log file might be produced (e.g., geckodriver.log).
     - If TIMEOUT specified, it only waits specified seconds.
+    - Browsers are reused for other URLs when the pool is full (see BrowserPool).
     - Warning: can return null browser object.
     """
-    ## TODO3: create a class-based interface to simplify repeated us
-    if timeout is None:
-        timeout = BROWSER_TIMEOUT
     debug.trace(4, f"in get_browser({url}); {timeout=}")
     browser : Optional[WebDriver] = None
-    global browser_cache
 
-    # Check for cached version of browser. If none, create one and access page.
-    browser = browser_cache.get(url) if USE_BROWSER_CACHE else None
+    # Check for browser already at URL. If none, get one from pool (or new one if not caching) and access page.
+    browser = browser_pool.get(url) if USE_BROWSER_CACHE else None
     if not browser:
-        if webdriver is None:
-            print("Error: Selenium library is not installed. Please install it using 'pip install selenium'.")
-            return None
         try:
-            # Make the browser hidden by default (i.e., headless)
-            # See https://stackoverflow.com/questions/46753393/how-to-make-firefox-headless-programmatically-in-selenium-with-python.
-            options_module = (webdriver.firefox.options if FIREFOX_WEBDRIVER else webdriver.chrome.options)
-            webdriver_options = options_module.Options()
-
-            if BROWSER_PATH:
-                webdriver_options.binary_location = BROWSER_PATH
-                debug.assertion(system.file_exists(BROWSER_PATH))
-                debug.trace(4, f"Warning: overriding webdriver path: {webdriver_options.binary_location=}")
-            if HEADLESS_WEBDRIVER:
-                webdriver_options.add_argument('-headless')
-            if KIOSK_MODE:
-                webdriver_options.add_argument('-kiosk')
-            if FIREFOX_PROFILE:
-                webdriver_options.add_argument('-profile')
-                webdriver_options.add_argument(FIREFOX_PROFILE)
-            if CHROME_PROFILE:
-                webdriver_options.add_argument(f'--user-data-dir={CHROME_PROFILE}')
-            debug.trace_object(5, webdriver_options)
-            debug.assertion(not (FIREFOX_WEBDRIVER and CHROME_WEBDRIVER))
-            if FIREFOX_WEBDRIVER:
-                service = FirefoxService(executable_path=WEBDRIVER_PATH) if WEBDRIVER_PATH else None
-                browser = webdriver.Firefox(service=service, options=webdriver_options)
-            else:                        # CHROME_WEBDRIVER
-                service = ChromeService(executable_path=WEBDRIVER_PATH) if WEBDRIVER_PATH else None
-                browser = webdriver.Chrome(service=service, options=webdriver_options)
-            if BROWSER_DIMENSIONS:
-                dims = [system.to_float(d) for d in misc_utils.extract_string_list(BROWSER_DIMENSIONS)]
-                debug.assertion(len(dims) == 2)
-                browser.set_window_size(*dims)
-            if debug.get_level() >= 6:
-                debug.trace_fmt(1, "Window dimensions: {w}x{h}",
-                                w=browser.execute_script("return window.outerWidth"),
-                                h=browser.execute_script("return window.outerHeight"))
-            if timeout:
-                ## TODO2: determine way for timeout to honored without timeout exception during get below
-                debug.assertion(False, "Selenium timeout support not functional")
-                browser.set_page_load_timeout(system.to_float(timeout))
-            debug.trace_object(5, browser)
-    
-            # Load the page, setting optional cache entry
-            if USE_BROWSER_CACHE:
-                browser_cache[url] = browser
-            browser.get(url)
-    
-            # Optionally pause after accessing the URL (to avoid overloading the same server).
-            # Note: This assumes that the URL's are accessed sequentially. ("Post-download" is
-            # a bit of a misnomer as this occurs before the download from browser, as in get_inner_html.)
-            if POST_DOWNLOAD_SLEEP_SECONDS:
-                system.sleep(POST_DOWNLOAD_SLEEP_SECONDS, message="Post-download")
+            browser = (browser_pool.acquire(url, timeout=timeout) if USE_BROWSER_CACHE
+                       else create_browser(timeout=timeout))
+            if browser:
+                browser.get(url)
+
+                # Optionally pause after accessing the URL (to avoid overloading the same server).
+                # Note: This assumes that the URL's are accessed sequentially. ("Post-download" is
+                # a bit of a misnomer as this occurs before the download from browser, as in get_inner_html.)
+                if POST_DOWNLOAD_SLEEP_SECONDS:
+                    system.sleep(POST_DOWNLOAD_SLEEP_SECONDS, message="Post-download")
         except:
-            browser = None
-            debug.raise_exception(6)
             system.print_exception_info("get_browser")
-            ## UPDATE: 5/10/2026: Diagnostics based on Gemini 3.1 tips
-            exc_info = str(system.get_exception())
-            debug.trace(4, f"Error initializing Selenium WebDriver: {exc_info}")
-            if my_re.search(r"geckodriver|firefox", exc_info.lower()):
-                debug.trace(4, "Hint: You may need to install geckodriver or set WEBDRIVER_PATH.")
-            elif my_re.search(r"chrome(driver)?", exc_info.lower()):
-                debug.trace(4, "Hint: You may need to install chromedriver or set WEBDRIVER_PATH.")
-            else:
-                debug.trace(4, "FYI: You might need more selenium diagnostics")
+            if USE_BROWSER_CACHE:
+                browser_pool.discard(url)
+            browser = None
 
     # Make sure the bare minimum is included (i.e., "<body></body>" of length 13)
     if browser:
@@ -784,9 +937,207 @@ def old_download_web_document(url : str, filename: Optional[str] = None, downloa
     return data
 
 
-def download_web_document(url : str, filename: Optional[str] = None, download_dir: Optional[str] = None, meta_hash: Optional[Dict[str, Any]] = None, use_cached : bool = False, as_binary : bool = False, ignore : bool = False) -> OptStrBytes:
+class DownloadCache:
+    """On-disk HTTP cache metadata for download_web_document: sidecar index in the download directory
+    with validators (ETag and Last-Modified), content type, fetch time and TTL per file, used for
+    conditional GETs. Also tracks hit/miss counts and evicts least-recently used files over MAX_BYTES.
+    Notes:
+    - This is only used for downloads with use_cached, so other files are not evicted.
+    - The index is saved every SAVE_INTERVAL updates (or 10% of the entries if more) and at exit (see flush)."""
+
+    def __init__(self, directory: str, max_bytes: Optional[int] = None, ttl: Optional[float] = None,
+                 save_interval: Optional[int] = None) -> None:
+        """Initializer: see class docstring (defaults from DOWNLOAD_CACHE_MAX_BYTES, DOWNLOAD_CACHE_TTL
+        and DOWNLOAD_CACHE_SAVE_INTERVAL)"""
+        self.directory = directory
+        self.index_path = gh.form_path(directory, CACHE_INDEX_FILENAME)
+        self.max_bytes = (max_bytes if max_bytes is not None else DOWNLOAD_CACHE_MAX_BYTES)
+        self.ttl = (ttl if ttl is not None else DOWNLOAD_CACHE_TTL)
+        self.save_interval = (save_interval if save_interval is not None else DOWNLOAD_CACHE_SAVE_INTERVAL)
+        self.num_unsaved = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+        self.index: Dict[str, Dict[str, Any]] = {}
+        if system.non_empty_file(self.index_path):
+            try:
+                self.index = json.loads(system.read_entire_file(self.index_path))
+            except:
+                system.print_exception_info("DownloadCache index load")
+        self.num_bytes = sum(entry.get("size", 0) for entry in self.index.values())
+        debug.trace_object(6, self, label="DownloadCache instance")
+
+    def lookup(self, filename: str, url: str) -> Optional[Dict[str, Any]]:
+        """Return index entry for FILENAME if for URL"""
+        entry = self.index.get(filename)
+        if entry and entry.get("url") != url:
+            debug.trace(5, f"Ignoring cache entry for {filename!r} from other URL {entry.get('url')!r}")
+            entry = None
+        return entry
+
+    def is_other_url(self, filename: str, url: str) -> bool:
+        """Whether FILENAME is indexed as the download of a URL other than URL"""
+        entry = self.index.get(filename)
+        return bool(entry and (entry.get("url") != url))
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        """Whether ENTRY can be used without revalidation"""
+        return (time.time() < (entry.get("fetched", 0) + entry.get("ttl", self.ttl)))
+
+    @staticmethod
+    def get_validators(entry: Dict[str, Any]) -> Dict[str, str]:
+        """Return conditional request headers for ENTRY"""
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    @staticmethod
+    def get_headers(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Return HTTP headers saved for ENTRY"""
+        headers = {}
+        for (key, header) in [("etag", "ETag"), ("last_modified", "Last-Modified"), ("content_type", "Content-Type")]:
+            if entry and entry.get(key):
+                headers[header] = entry[key]
+        return headers
+
+    def get_ttl(self, headers: Any) -> float:
+        """Determine TTL given response HEADERS, with Cache-Control max-age overriding the default"""
+        ttl = self.ttl
+        cache_control = (headers.get("Cache-Control") or "").lower()
+        if my_re.search(r"no-cache|no-store", cache_control):
+            ttl = 0
+        elif my_re.search(r"max-age=(\d+)", cache_control):
+            ttl = float(my_re.group(1))
+        return ttl
+
+    def record_hit(self, filename: str, revalidated: bool = False, headers: Any = None, stale: bool = False) -> None:
+        """Note use of cached FILENAME, which was REVALIDATED via conditional request (with response HEADERS)
+        or used as STALE fallback (e.g., server unavailable)"""
+        with self.lock:
+            self.hits += 1
+            if stale:
+                self.stale_hits += 1
+            entry = self.index.get(filename)
+            if entry is not None:
+                entry["accessed"] = time.time()
+                if revalidated:
+                    self.revalidations += 1
+                    entry["fetched"] = entry["accessed"]
+                    if headers is not None:
+                        entry["ttl"] = self.get_ttl(headers)
+                        for (key, header) in [("etag", "ETag"), ("last_modified", "Last-Modified")]:
+                            entry[key] = headers.get(header) or entry.get(key)
+                self.note_update()
+
+    def record_fetch(self, filename: str, url: str, headers: Any) -> None:
+        """Record download of URL into FILENAME with response HEADERS, evicting old files if needed"""
+        path = gh.form_path(self.directory, filename)
+        with self.lock:
+            self.misses += 1
+            now = time.time()
+            headers = (headers or {})
+            if filename in self.index:
+                self.num_bytes -= self.index[filename].get("size", 0)
+            self.index[filename] = {
+                "url": url,
+                "etag": headers.get("ETag"),
+                "last_modified": headers.get("Last-Modified"),
+                "content_type": headers.get("Content-Type"),
+                "fetched": now,
+                "accessed": now,
+                "ttl": self.get_ttl(headers),
+                "size": (os.path.getsize(path) if system.file_exists(path) else 0),
+            }
+            self.num_bytes += self.index[filename]["size"]
+            self.evict(keep=filename)
+            self.note_update()
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        """Remove least-recently used files until within max_bytes, other than KEEP
+        Note: lock should be held"""
+        if not self.max_bytes:
+            return
+        if self.num_bytes <= self.max_bytes:
+            return
+        for filename in sorted(self.index, key=lambda f: self.index[f].get("accessed", 0)):
+            if self.num_bytes <= self.max_bytes:
+                break
+            if filename == keep:
+                continue
+            self.num_bytes -= self.index[filename].get("size", 0)
+            del self.index[filename]
+            self.evictions += 1
+            debug.trace(5, f"Evicting cached download {filename!r}")
+            gh.delete_existing_file(gh.form_path(self.directory, filename))
+
+    def note_update(self) -> None:
+        """Note change to index, saving it every save_interval updates
+        Note: lock should be held; the interval grows with the index so that the cost of the saves is linear"""
+        self.num_unsaved += 1
+        if self.num_unsaved >= max(self.save_interval, (len(self.index) // 10)):
+            self.save()
+
+    def save(self) -> None:
+        """Write out the index (atomically)
+        Note: lock should be held"""
+        temp_path = self.index_path + ".temp"
+        system.write_file(temp_path, json.dumps(self.index))
+        os.replace(temp_path, self.index_path)
+        self.num_unsaved = 0
+
+    def flush(self) -> None:
+        """Save the index if there are unsaved updates (and directory still exists)"""
+        with self.lock:
+            if self.num_unsaved and gh.is_directory(self.directory):
+                self.save()
+
+    def info(self) -> Dict[str, Any]:
+        """Return cache statistics"""
+        return {"hits": self.hits, "stale_hits": self.stale_hits, "misses": self.misses, "revalidations": self.revalidations,
+                "evictions": self.evictions, "files": len(self.index),
+                "bytes": self.num_bytes}
+
+
+# note: caches are shared by download directory
+download_caches: Dict[str, DownloadCache] = {}
+download_caches_lock = threading.Lock()
+#
+def get_download_cache(download_dir: Optional[str] = None) -> DownloadCache:
+    """Return DownloadCache for DOWNLOAD_DIR (defaults to DOWNLOAD_DIR global)"""
+    if download_dir is None:
+        download_dir = DOWNLOAD_DIR
+    key = system.absolute_path(download_dir)
+    with download_caches_lock:
+        if key not in download_caches:
+            download_caches[key] = DownloadCache(download_dir)
+        return download_caches[key]
+
+
+def flush_download_caches() -> None:
+    """Save indexes with unsaved updates for the download caches"""
+    with download_caches_lock:
+        caches = list(download_caches.values())
+    for cache in caches:
+        cache.flush()
+#
+atexit.register(flush_download_caches)
+
+
+def download_cache_info(download_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Return hit/miss statistics for download cache in DOWNLOAD_DIR"""
+    return get_download_cache(download_dir).info()
+
+
+def download_web_document(url : str, filename: Optional[str] = None, download_dir: Optional[str] = None, meta_hash: Optional[Dict[str, Any]] = None, use_cached : bool = False, as_binary : bool = False, ignore : bool = False, post_download_sleep : Optional[float] = None) -> OptStrBytes:
     """Download document contents at URL, returning as unicode text (unless AS_BINARY).
-    Notes: An optional FILENAME can be given for the download, an optional DOWNLOAD_DIR[ectory] can be specified (defaults to 'downloads'), and an optional META_HASH can be specified for recording filename and headers. Existing files will be considered if USE_CACHED. If IGNORE, no exceptions reports are printed."""
+    Notes: An optional FILENAME can be given for the download, an optional DOWNLOAD_DIR[ectory] can be specified (defaults to 'downloads'), and an optional META_HASH can be specified for recording filename and headers. Existing files will be considered if USE_CACHED, subject to revalidation via DownloadCache when stale. If IGNORE, no exceptions reports are printed.
+    The POST_DOWNLOAD_SLEEP overrides POST_DOWNLOAD_SLEEP_SECONDS (e.g., 0 when throttled per host as with download_web_documents)."""
     # EX: "currency" in download_web_document("https://simple.wikipedia.org/wiki/Dollar")
     # EX: download_web_document("www. bogus. url.html") => None
     ## TODO: def download_web_document(url, /, filename=None, download_dir=None, meta_hash=None, use_cached=False):
@@ -814,13 +1165,53 @@ def download_web_document(url : str, filename: Optional[str] = None, download_di
     if meta_hash is not None:
         meta_hash[FILENAME] = local_filename
     doc_data: OptStrBytes = ""
+    ## OLD:
+    ## if use_cached and system.non_empty_file(local_filename):
+    ##     debug.trace_fmtd(5, "Using cached file for URL: {f}", f=local_filename)
+    ##     doc_data = _read_file(local_filename, as_binary)
+    # Use cached file if fresh; otherwise, revalidate via conditional GET given ETag, etc.
+    # Notes:
+    # - Cached files lacking metadata (e.g., prior to index) are used as is.
+    # - Files indexed as being from another URL (e.g., same basename) are refetched.
+    cache = (get_download_cache(download_dir) if (use_cached and USE_DOWNLOAD_CACHE_INDEX) else None)
+    entry = None
+    use_file = False
+    request_headers = None
     if use_cached and system.non_empty_file(local_filename):
+        entry = (cache.lookup(filename, url) if cache else None)
+        if cache and cache.is_other_url(filename, url):
+            debug.trace(4, f"FYI: Refetching {url!r} as {local_filename!r} cached for other URL")
+        elif (entry is None) or cache.is_fresh(entry):
+            use_file = True
+        else:
+            request_headers = cache.get_validators(entry)
+    if use_file:
         debug.trace_fmtd(5, "Using cached file for URL: {f}", f=local_filename)
         doc_data = _read_file(local_filename, as_binary)
+        if cache:
+            cache.record_hit(filename)
+        if (meta_hash is not None) and entry:
+            meta_hash[HEADERS] = cache.get_headers(entry)
     else:
-        doc_data = retrieve_web_document(url, meta_hash=meta_hash, as_binary=as_binary, ignore=ignore)
-        if doc_data:
+        fetch_meta: Dict[str, Any] = {}
+        doc_data = retrieve_web_document(url, meta_hash=fetch_meta, as_binary=as_binary, ignore=ignore,
+                                         post_download_sleep=post_download_sleep, request_headers=request_headers)
+        # note: only successful downloads are saved, with stale copy used if revalidation fails
+        status_code = fetch_meta.get(STATUS_CODE, DEFAULT_STATUS_CODE)
+        if (status_code == NOT_MODIFIED) and entry:
+            debug.trace_fmtd(5, "Using revalidated cached file for URL: {f}", f=local_filename)
+            doc_data = _read_file(local_filename, as_binary)
+            cache.record_hit(filename, revalidated=True, headers=fetch_meta.get(HEADERS))
+        elif (200 <= status_code < 300) and doc_data:
             _write_file(local_filename, doc_data, as_binary)
+            if cache:
+                cache.record_fetch(filename, url, fetch_meta.get(HEADERS))
+        elif entry:
+            debug.trace(4, f"FYI: Using stale cached file for {url!r} (status {status_code})")
+            doc_data = _read_file(local_filename, as_binary)
+            cache.record_hit(filename, stale=True)
+        if meta_hash is not None:
+            meta_hash.update(fetch_meta)
     debug.trace_expr(5, local_filename, meta_hash)
 
     ## TODO: show hex dump of initial data
@@ -871,12 +1262,128 @@ def download_binary_file(url : str, **kwargs) -> OptStrBytes:
     return (result)
     
 
-def retrieve_web_document(url : str, meta_hash: Optional[Dict[str, Any]] = None, as_binary : bool = False, ignore : bool = False) -> OptStrBytes:
+class HostRateLimiter:
+    """Per-host politeness throttling for concurrent downloads: at most LIMIT requests in flight per host, with request starts at least DELAY seconds apart"""
+
+    def __init__(self, limit: Optional[int] = None, delay: Optional[float] = None) -> None:
+        """Initializer: see class docstring (defaults from PER_HOST_LIMIT and PER_HOST_DELAY_SECONDS)"""
+        self.limit = max(1, (limit if limit is not None else PER_HOST_LIMIT))
+        self.delay = (delay if delay is not None else PER_HOST_DELAY_SECONDS)
+        self.lock = threading.Lock()
+        self.semaphores: Dict[str, threading.Semaphore] = {}
+        self.next_start: Dict[str, float] = {}
+        debug.trace_object(6, self, label="HostRateLimiter instance")
+
+    @contextmanager
+    def throttle(self, host: str):
+        """Context manager blocking until a request to HOST is allowed"""
+        with self.lock:
+            semaphore = self.semaphores.setdefault(host, threading.Semaphore(self.limit))
+        semaphore.acquire()
+        try:
+            # note: start time slots are reserved under lock, so waits don't overlap
+            with self.lock:
+                now = time.monotonic()
+                start = max(now, self.next_start.get(host, now))
+                self.next_start[host] = start + self.delay
+            if start > now:
+                debug.trace(6, f"Delaying {start - now:.3f}s for host {host!r}")
+                time.sleep(start - now)
+            yield
+        finally:
+            semaphore.release()
+
+
+def get_url_host(url: str) -> str:
+    """Return host[:port] for URL, which is assumed to be HTTP if no scheme given"""
+    # EX: get_url_host("www.tomasohara.trade/index.html") => "www.tomasohara.trade"
+    if "//" not in url:
+        url = "http://" + url
+    return urllib.parse.urlsplit(url).netloc.lower()
+
+
+# note: sessions are per-thread given that requests.Session isn't guaranteed thread-safe
+session_data = threading.local()
+#
+def get_session(pool_size: Optional[int] = None) -> requests.Session:
+    """Return the current thread's pooled requests session (with keep-alive), creating it if needed.
+    Notes:
+    - POOL_SIZE is the max connections kept per host (defaults to PER_HOST_LIMIT).
+    - Cookies are not retained, so that cookies from one site are not sent with later unrelated
+      requests (as when requests.get was used for each download).
+    - See close_session for closing it (e.g., at end of worker thread)."""
+    session = getattr(session_data, "session", None)
+    if session is None:
+        if pool_size is None:
+            pool_size = max(1, PER_HOST_LIMIT)
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({'User-Agent': USER_AGENT})
+        # note: rejects all cookies (e.g., Set-Cookie headers)
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        session_data.session = session
+        debug.trace(5, f"new session for thread {threading.get_ident()}: {session}")
+    return session
+
+
+def close_session() -> None:
+    """Close the current thread's pooled session, if any"""
+    session = getattr(session_data, "session", None)
+    if session is not None:
+        debug.trace(5, f"closing session for thread {threading.get_ident()}: {session}")
+        session.close()
+        session_data.session = None
+
+
+def download_web_documents(urls: List[str], max_workers: Optional[int] = None, per_host_limit: Optional[int] = None,
+                           per_host_delay: Optional[float] = None, download_dir: Optional[str] = None,
+                           use_cached: bool = False, as_binary: bool = False, ignore: bool = False) -> Dict[str, OptStrBytes]:
+    """Download URLS concurrently via download_web_document, returning dict from URL to contents.
+    Notes:
+    - Uses MAX_WORKERS threads (DOWNLOAD_WORKERS), each with a pooled session, which is closed when done.
+    - Instead of POST_DOWNLOAD_SLEEP_SECONDS after each download, requests are throttled per host: PER_HOST_LIMIT concurrent and PER_HOST_DELAY apart (see HostRateLimiter).
+    - The files are saved under DOWNLOAD_DIR as with download_web_document (e.g., for USE_CACHED)."""
+    debug.trace(4, f"download_web_documents({len(urls)} urls, w={max_workers}, l={per_host_limit}, d={per_host_delay})")
+    if max_workers is None:
+        max_workers = DOWNLOAD_WORKERS
+    limiter = HostRateLimiter(per_host_limit, per_host_delay)
+    worker_sessions: Dict[int, requests.Session] = {}
+
+    def download(url: str) -> OptStrBytes:
+        """Download URL subject to per-host limits"""
+        with limiter.throttle(get_url_host(url)):
+            doc_data = download_web_document(url, download_dir=download_dir, use_cached=use_cached,
+                                             as_binary=as_binary, ignore=ignore, post_download_sleep=0)
+        session = getattr(session_data, "session", None)
+        if session is not None:
+            worker_sessions[threading.get_ident()] = session
+        return doc_data
+
+    result: Dict[str, OptStrBytes] = {}
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {url: executor.submit(download, url) for url in urls}
+        for (url, future) in futures.items():
+            result[url] = future.result()
+    # note: worker sessions closed after the threads are done
+    for session in worker_sessions.values():
+        session.close()
+    debug.trace(5, f"download_web_documents() => {len(result)} results")
+    return result
+
+
+def retrieve_web_document(url : str, meta_hash: Optional[Dict[str, Any]] = None, as_binary : bool = False, ignore : bool = False,
+                          session: Optional[requests.Session] = None, post_download_sleep: Optional[float] = None,
+                          request_headers: Optional[Dict[str, str]] = None) -> OptStrBytes:
     """Get document contents at URL, using unicode text (unless AS_BINARY)
     Note:
     - Simpler version of old_download_web_document, using an optional META_HASH for recording headers
     - Works around Error 403's presumably due to urllib's user agent
-    - If IGNORE, no exceptions reports are printed."""
+    - If IGNORE, no exceptions reports are printed.
+    - Uses SESSION if given or the pooled one for the thread (see REUSE_CONNECTIONS), which doesn't keep cookies.
+    - POST_DOWNLOAD_SLEEP overrides POST_DOWNLOAD_SLEEP_SECONDS.
+    - REQUEST_HEADERS are added to the request (e.g., If-None-Match), and the status code is also recorded in META_HASH."""
     # EX: bool(my_re.search("Scrappy.*Cito", retrieve_web_document("www.tomasohara.trade")))
     # Note: See https://stackoverflow.com/questions/34957748/http-error-403-forbidden-with-urlretrieve.
     debug.trace_fmtd(5, "retrieve_web_document({u})", u=url)
@@ -889,7 +1396,12 @@ def retrieve_web_document(url : str, meta_hash: Optional[Dict[str, Any]] = None,
         headers = {
             'User-Agent': USER_AGENT
         }
-        r = requests.get(url, timeout=DOWNLOAD_TIMEOUT, headers=headers)
+        if request_headers:
+            headers.update(request_headers)
+        if (session is None) and REUSE_CONNECTIONS:
+            session = get_session()
+        ## OLD: r = requests.get(url, timeout=DOWNLOAD_TIMEOUT, headers=headers)
+        r = (session or requests).get(url, timeout=DOWNLOAD_TIMEOUT, headers=headers)
         status_code = r.status_code
         result = r.content
         debug.assertion(isinstance(result, bytes))
@@ -897,13 +1409,16 @@ def retrieve_web_document(url : str, meta_hash: Optional[Dict[str, Any]] = None,
             result = result.decode(errors='ignore')
         if meta_hash is not None:
             meta_hash[HEADERS] = r.headers
+            meta_hash[STATUS_CODE] = status_code
     ## TODO: except(AttributeError, ConnectionError):
     except:
         if not ignore:
             system.print_exception_info("retrieve_web_document")
     # Optionally pause after accessing the URL (to avoid overloading the same server).
-    if POST_DOWNLOAD_SLEEP_SECONDS:
-        system.sleep(POST_DOWNLOAD_SLEEP_SECONDS, message="Post-download")
+    if post_download_sleep is None:
+        post_download_sleep = POST_DOWNLOAD_SLEEP_SECONDS
+    if post_download_sleep:
+        system.sleep(post_download_sleep, message="Post-download")
     debug.trace(5, f"status_code={status_code}")
     debug.trace_fmtd(7, "retrieve_web_document() => {r}", r=result)
     return result
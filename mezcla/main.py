@@ -46,6 +46,16 @@
 #   dummy instance and then calling read_input (see randomize_lines.py):
 #      dummy = Main([]);   dummy.input_stream = str
 #      for line in dummy.process_input(): ...
+# - For high-throughput filters, block input mode (BLOCK_INPUT or block_input=True)
+#   reads large binary blocks and passes batches of lines to process_lines,
+#   which can be overridden to avoid the per-line overhead of process_line:
+#      def process_lines(self, batch):
+#          funny_lines = [line for line in batch if "funny" in line]
+#          if funny_lines:
+#              print("\n".join(funny_lines))
+#   The default process_lines updates line_num, etc. per line as usual, but with
+#   an override they reflect the end of the batch (see iterate_block_lines).
+#   This is not used with page tracking or file input mode.
 #
 # Note:
 # - PERL_SWITCH_PARSING allows for Perl-style -var=val command switches. This 
@@ -78,7 +88,9 @@
 
 # Standard packages
 import argparse
+import codecs
 import io
+import itertools
 import os
 import re
 import sys
@@ -175,6 +187,15 @@ INPUT_ERROR_OPTION = "input_error"
 INPUT_ERROR = system.getenv_value(
     INPUT_ERROR_OPTION.upper(), None,
     description="Override for strict input processing error handling")
+BLOCK_INPUT_OPTION = "block_input"
+BLOCK_INPUT = system.getenv_bool(
+    BLOCK_INPUT_OPTION.upper(), False,
+    description="Read input in large blocks with lines passed in batches to process_lines")
+BLOCK_INPUT_SIZE = system.getenv_int(
+    "BLOCK_INPUT_SIZE", (1024 * 1024),
+    description="Size in bytes of blocks read with BLOCK_INPUT")
+# Encodings where newline byte only occurs as newline (n.b., needed for splitting undecoded blocks)
+ASCII_COMPATIBLE_ENCODINGS = ["utf-8", "ascii", "iso8859-1", "iso8859-15", "cp1252"]
 DISABLE_RECURSIVE_DELETE = gh.DISABLE_RECURSIVE_DELETE
 VERBOSE_DEFAULT = bool(f"--{VERBOSE_ARG}" in sys.argv)
 VERBOSE_MODE = system.getenv_value(
@@ -252,6 +273,9 @@ class Main(object):
         self.line_num = -1
         self.char_offset = -1
         self.raw_line: Optional[str] = None
+        # note: counters at start of current block-input batch (see iterate_block_lines)
+        self.block_start = (0, 0, 0)
+        self.block_final_newline = True
         # note: auto_help is typically used when there is a filename argument
         debug.assertion(not (auto_help and skip_stdin))
         if (auto_help is None):
@@ -301,10 +325,11 @@ class Main(object):
         # Check miscellaneous options
         BINARY_INPUT_OPTION = "binary_input"
         PERL_SWITCH_PARSING_OPTION = "perl_switch_parsing"
-        bad_options = system.difference(list(kwargs.keys()), [BINARY_INPUT_OPTION, PERL_SWITCH_PARSING_OPTION, INPUT_ERROR_OPTION])
+        bad_options = system.difference(list(kwargs.keys()), [BINARY_INPUT_OPTION, PERL_SWITCH_PARSING_OPTION, INPUT_ERROR_OPTION, BLOCK_INPUT_OPTION])
         debug.assertion(not bad_options, f"Extraneous kwargs: {bad_options}")
         self.binary_input = kwargs.get(BINARY_INPUT_OPTION, False)
         self.input_error_mode = kwargs.get(INPUT_ERROR_OPTION, INPUT_ERROR)
+        self.block_input = kwargs.get(BLOCK_INPUT_OPTION, BLOCK_INPUT)
 
         # Setup temporary file and/or base directory
         # TODO: allow temp_base handling to be overridable by constructor options
@@ -800,6 +825,14 @@ class Main(object):
         print(line)
         return
 
+    def process_lines(self, batch: List[str]) -> None:
+        """Process BATCH of lines (without newlines) read in block input mode.
+        Note: This just invokes process_line for each, with line counters updated per line
+        (as in regular input). Override for faster processing, in which case the counters
+        reflect the end of the batch (unless iterate_block_lines is used)."""
+        for line in self.iterate_block_lines(batch):
+            self.process_line(line)
+
     def run_main_step(self) -> None:
         """Stub for main processing, along with error message"""
         # TODO: use decorator (e.g., @abstract)
@@ -1004,6 +1037,105 @@ class Main(object):
                     self.char_offset += len(self.raw_line)
         return
 
+    def read_input_blocks(self) -> Generator[List[str], None, None]:
+        """Generator for producing batches of lines from the input (without newlines),
+        reading large blocks and splitting the lines in bulk.
+        Notes:
+        - Used by process_input when block_input is in effect.
+        - The line counters and char_offset are updated per batch, with raw_line
+          set to the last line (e.g., for checking missing final newline). Use
+          iterate_block_lines for the lines with per-line counters.
+        - Falls back to batching the lines from the text stream if the bytes can't
+          be split directly (e.g., non-ASCII-compatible encoding or custom newlines).
+        """
+        debug.trace(5, f"Main.read_input_blocks(): {self.input_stream}")
+        if not self.input_stream:
+            debug.trace(4, "Warning: No input stream in read_input_blocks")
+            return
+        self.page_num = 1
+        self.para_num = 1
+        self.rel_para_num = 1
+        self.line_num = 0
+        self.rel_line_num = 0
+        self.char_offset = 0
+        #
+        def update_counters(batch: List[str], num_chars: int, final_newline: bool) -> None:
+            """Update line counters and offsets after BATCH of NUM_CHARS"""
+            self.block_start = (self.line_num, self.rel_line_num, self.char_offset)
+            self.block_final_newline = final_newline
+            self.line_num += len(batch)
+            self.rel_line_num += len(batch)
+            self.char_offset += num_chars
+            self.raw_line = (batch[-1] + ("\n" if final_newline else ""))
+            debug.trace(7, f"batch of {len(batch)} lines [L{self.line_num}]")
+        #
+        buffer = getattr(self.input_stream, "buffer", None)
+        encoding = (getattr(self.input_stream, "encoding", None) or "utf-8")
+        split_bytes = ((buffer is not None) and (not self.binary_input)
+                       and (self.newlines in [None, "\n"])
+                       and (codecs.lookup(encoding).name in ASCII_COMPATIBLE_ENCODINGS))
+        if not split_bytes:
+            debug.trace(4, f"FYI: Using text stream batching in read_input_blocks (encoding={encoding})")
+            while True:
+                raw_lines = self.input_stream.readlines(BLOCK_INPUT_SIZE)
+                if not raw_lines:
+                    break
+                final_newline = raw_lines[-1].endswith("\n")
+                num_chars = sum(map(len, raw_lines))
+                batch = [(line[:-1] if line.endswith("\n") else line) for line in raw_lines]
+                update_counters(batch, num_chars, final_newline)
+                yield batch
+            return
+        #
+        errors = (self.input_stream.errors or "strict")
+        translate_newlines = (self.newlines is None)
+        remainder = b""
+        while True:
+            block = buffer.read(BLOCK_INPUT_SIZE)
+            if block:
+                data = (remainder + block)
+                end = data.rfind(b"\n")
+                if end == -1:
+                    remainder = data
+                    continue
+                remainder = data[end + 1:]
+                text = data[:end].decode(encoding, errors)
+                final_newline = True
+            else:
+                if not remainder:
+                    break
+                text = remainder.decode(encoding, errors)
+                remainder = b""
+                final_newline = False
+            at_end = (not final_newline)
+            if translate_newlines and ("\r" in text):
+                # note: trailing \r is part of \r\n split above
+                if (final_newline and text.endswith("\r")):
+                    text = text[:-1]
+                text = text.replace("\r\n", "\n").replace("\r", "\n")
+            num_chars = (len(text) + int(final_newline))
+            batch = text.split("\n")
+            if (at_end and text.endswith("\n")):
+                batch.pop()
+                final_newline = True
+            update_counters(batch, num_chars, final_newline)
+            yield batch
+            if at_end:
+                break
+        return
+
+    def iterate_block_lines(self, batch: List[str]) -> Generator[str, None, None]:
+        """Generator over lines in BATCH from read_input_blocks, with the line counters,
+        char_offset and raw_line updated per line as in read_input"""
+        (self.line_num, self.rel_line_num, self.char_offset) = self.block_start
+        last = (len(batch) - 1)
+        for i, line in enumerate(batch):
+            self.line_num += 1
+            self.rel_line_num += 1
+            self.raw_line = (line + ("\n" if ((i < last) or self.block_final_newline) else ""))
+            yield line
+            self.char_offset += len(self.raw_line)
+
     def is_line_mode(self) -> bool:
         """Whether processing normal lines (not paragraphs or entire files)"""
         return  (not (self.paragraph_mode or self.file_input_mode))
@@ -1017,13 +1149,25 @@ class Main(object):
         self.rel_line_num = 0
         if self.paragraph_mode:
             self.para_num = 0
-        paragraph = ""
+        # note: paragraph lines are joined when complete to avoid quadratic str +=
+        paragraph_lines: List[str] = []
         last_line: Optional[str] = None
         line_mode = self.is_line_mode()
         debug.assertion(debug.xor3(line_mode, self.paragraph_mode, self.file_input_mode))
 
+        # Use block input unless page tracking or entire file input
+        # note: in regular line mode, batches go directly to process_lines
+        use_blocks = (self.block_input and not (self.track_pages or self.file_input_mode))
+        if (use_blocks and line_mode):
+            for batch in self.read_input_blocks():
+                self.process_lines(batch)
+            return
+        line_input = (itertools.chain.from_iterable(map(self.iterate_block_lines, self.read_input_blocks()))
+                      if use_blocks
+                      else self.read_input())
+
         # Read next line (or line segment if in page mode and form feed in line)
-        for line in self.read_input():
+        for line in line_input:
             # Process as is if in regular line mode
             if (line_mode or self.file_input_mode):
                 self.process_line(line)
@@ -1042,13 +1186,13 @@ class Main(object):
                 new_paragraph = None
                 if self.end_of_page:
                     new_paragraph = (line + "\n")
-                    paragraph = ""
+                    paragraph_lines = []
                 elif ((last_line == "") and line):
-                    new_paragraph = paragraph
-                    paragraph = (line + "\n")
+                    new_paragraph = "".join(paragraph_lines)
+                    paragraph_lines = [line + "\n"]
                 else:
-                    paragraph += (line + "\n")
-                debug.trace_expr(7, new_paragraph, paragraph)
+                    paragraph_lines.append(line + "\n")
+                debug.trace_expr(7, new_paragraph, paragraph_lines)
                 if new_paragraph:
                     self.rel_para_num += 1
                     self.para_num += 1
@@ -1061,6 +1205,7 @@ class Main(object):
 
         # Process the last set of lines if in paragraph mode
         # Note: Final newline is removed (as per process_line).
+        paragraph = "".join(paragraph_lines)
         if (self.paragraph_mode and paragraph):
             self.rel_para_num += 1
             self.para_num += 1
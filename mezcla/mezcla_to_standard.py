@@ -19,6 +19,10 @@
 # which have the majority of thin wrappers around PSL calls. The debugging
 # support in debug.py is also included as a bit idiosyncratic.
 #
+# In addition, the --strip-debug option produces an optimized copy of a script
+# with debug tracing above a given level removed (e.g., for production batch
+# jobs), along with debug.assertion calls dropped or converted to assert.
+#
 # TODO4: Try to create a table covering more of system.py and glue_helper.py.
 #
 # --------------------------------------------------------------------------------
@@ -222,6 +226,8 @@ Mezcla to Standard call conversion script
 
 Sample usage:
    {script} - <<<"debug.assertion(2 + 2 == 5)"
+
+   {script} --strip-debug --max-level 3 --assertions assert script.py > optimized/script.py
 """
 
 # Standard modules
@@ -269,6 +275,9 @@ TO_MEZCLA = "to-mezcla"
 METRICS = "metrics"
 IN_PLACE = "in-place"
 SKIP_WARNINGS = "skip-warnings"
+STRIP_DEBUG = "strip-debug"
+MAX_LEVEL = "max-level"
+ASSERTIONS = "assertions"
 
 # Types
 
@@ -302,6 +311,20 @@ USER_IMPORTS = system.getenv_value(
 DEFAULT_EQCALL_IMPORTS = ["debug", "system", "glue_helpers", "tpo_common", "spacy_nlp",
                           "sys", "os", "logging", "time"]
 EQCALL_IMPORTS = (misc_utils.extract_string_list(USER_IMPORTS) if USER_IMPORTS else DEFAULT_EQCALL_IMPORTS)
+#
+STRIP_DEBUG_LEVEL = system.getenv_int(
+    "STRIP_DEBUG_LEVEL", debug.WARNING,
+    desc="Highest trace level kept when stripping debug calls")
+STRIP_ASSERTIONS = system.getenv_text(
+    "STRIP_ASSERTIONS", "drop",
+    desc="How to strip debug.assertion calls: drop, assert, or keep")
+ASSERTION_MODES = ["drop", "assert", "keep"]
+# Debug functions with trace level as first argument, which are only stripped
+# when used as standalone statements (i.e., result not used)
+STRIPPABLE_TRACE_FUNCTIONS = [
+    "trace", "trace_fmt", "trace_fmtd", "trace_expr", "trace_lazy", "trace_pct",
+    "trace_object", "trace_values", "trace_current_context", "trace_exception",
+    "trace_exception_info", "trace_frame", "trace_stack", "code"]
 
 # Globals
 global_sandbox = {}
@@ -2213,6 +2236,232 @@ class ReplaceMezclaWithWarningTransformer(StoreAliasesTransformer, StoreMetrics)
         return updated_node
 
 
+class NameUsageVisitor(cst.CSTVisitor):
+    """Collects names referenced outside of import statements"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.names = set()
+
+    # pylint: disable=invalid-name
+    def visit_Import(self, node: cst.Import) -> bool:
+        """Skip Import nodes"""
+        return False
+
+    # pylint: disable=invalid-name
+    def visit_ImportFrom(self, node: cst.ImportFrom) -> bool:
+        """Skip ImportFrom nodes"""
+        return False
+
+    # pylint: disable=invalid-name
+    def visit_Name(self, node: cst.Name) -> None:
+        """Visit a Name node"""
+        self.names.add(node.value)
+
+
+class StripDebugTransformer(StoreAliasesTransformer, StoreMetrics):
+    """Modify the CST to remove debug tracing above a given level
+    Note:
+    - Only calls used as standalone statements are removed (e.g., not x = debug.trace_fmt(...)).
+    - Calls with levels that cannot be resolved statically are kept (e.g., debug.trace(BDL + 1, ...)).
+    - Likewise, if blocks guarded just by debug.enabled_at(level), debug.debugging(level)
+      or flags like debug.VERBOSE_ENABLED are removed if there is no else clause.
+    - With ASSERTIONS of "drop", debug.assertion statements are removed, so side
+      effects in the expression are lost, as with assert under python -O.
+    - With "assert", they become regular assert statements, which raise an
+      exception instead of just issuing a warning.
+    """
+
+    def __init__(self, max_level: int = STRIP_DEBUG_LEVEL,
+                 assertions: str = STRIP_ASSERTIONS) -> None:
+        debug.trace(8, f"StripDebugTransformer.__init__({max_level}, {assertions!r})")
+        StoreAliasesTransformer.__init__(self)
+        StoreMetrics.__init__(self)
+        if assertions not in ASSERTION_MODES:
+            raise ValueError(f"Invalid assertions mode: {assertions!r}; should be one of {ASSERTION_MODES}")
+        self.max_level = max_level
+        self.assertions = assertions
+        self.debug_modules = set()
+        self.debug_functions = set()
+
+    # pylint: disable=invalid-name
+    def visit_ImportFrom(self, node: cst.ImportFrom) -> None:
+        """Visit an ImportFrom node to record names bound to debug module and functions"""
+        debug.trace(8, f"StripDebugTransformer.visit_ImportFrom(node={node})")
+        module = cst_to_path(node.module) if node.module else ""
+        if isinstance(node.names, cst.ImportStar):
+            return
+        for alias in node.names:
+            name = cst_to_path(alias.name)
+            bound_name = (alias.asname.name.value if alias.asname else name)
+            if ((module in ["mezcla", ""]) and (name == "debug")):
+                self.debug_modules.add(bound_name)
+            elif module in ["mezcla.debug", "debug"]:
+                self.debug_functions.add(bound_name)
+
+    # pylint: disable=invalid-name
+    def visit_Import(self, node: cst.Import) -> None:
+        """Visit an Import node to record names bound to debug module"""
+        debug.trace(8, f"StripDebugTransformer.visit_Import(node={node})")
+        for alias in node.names:
+            if cst_to_path(alias.name) == "mezcla.debug":
+                self.debug_modules.add(alias.asname.name.value if alias.asname else "mezcla.debug")
+
+    def get_debug_function(self, node: cst.CSTNode) -> Optional[str]:
+        """Return name of debug function for NODE if a call to one, or None"""
+        result = None
+        if isinstance(node, cst.Call):
+            try:
+                path = cst_to_path(node.func)
+            except ValueError:
+                path = ""
+            parts = path.split(".")
+            if ((parts[:2] == ["mezcla", "debug"]) and ("mezcla.debug" in self.debug_modules)):
+                parts = ["mezcla.debug"] + parts[2:]
+            if ((len(parts) == 2) and (parts[0] in self.debug_modules)):
+                result = parts[1]
+            elif ((len(parts) == 1) and (parts[0] in self.debug_functions)):
+                result = self.replace_alias_in_path(parts[0])
+        debug.trace(9, f"StripDebugTransformer.get_debug_function({node}) => {result}")
+        return result
+
+    def resolve_level(self, node: cst.CSTNode) -> Optional[int]:
+        """Return integer trace level for expression NODE or None if not static
+        Note: handles integers, debug level constants (e.g., debug.VERBOSE or T.VERBOSE), and sums"""
+        result = None
+        if isinstance(node, cst.Integer):
+            result = int(node.value)
+        elif isinstance(node, cst.Attribute):
+            name = node.attr.value
+            if name in debug.TL.__members__:
+                result = int(getattr(debug, name))
+        elif isinstance(node, cst.UnaryOperation) and isinstance(node.operator, cst.Minus):
+            value = self.resolve_level(node.expression)
+            result = (-value if (value is not None) else None)
+        elif isinstance(node, cst.BinaryOperation) and isinstance(node.operator, (cst.Add, cst.Subtract)):
+            left = self.resolve_level(node.left)
+            right = self.resolve_level(node.right)
+            if ((left is not None) and (right is not None)):
+                result = ((left + right) if isinstance(node.operator, cst.Add) else (left - right))
+        debug.trace(9, f"StripDebugTransformer.resolve_level({node}) => {result}")
+        return result
+
+    def get_arg(self, call: cst.Call, position: int, keyword: str) -> Optional[cst.Arg]:
+        """Return argument for CALL given by POSITION or KEYWORD, or None if not found"""
+        positional = []
+        for arg in call.args:
+            if arg.keyword and (arg.keyword.value == keyword):
+                return arg
+            if arg.star:
+                break
+            if not arg.keyword:
+                positional.append(arg)
+        return (positional[position] if (position < len(positional)) else None)
+
+    def is_stripped_level(self, call: cst.Call, default: Optional[int] = None) -> bool:
+        """Whether level for CALL is static and above max level
+        Note: DEFAULT is used when level not specified (e.g., debugging())"""
+        level_arg = self.get_arg(call, 0, "level")
+        level = (self.resolve_level(level_arg.value) if level_arg else default)
+        return ((level is not None) and (level > self.max_level))
+
+    def is_disabled_guard(self, node: cst.BaseExpression) -> bool:
+        """Whether NODE is a test like debug.enabled_at(level) with level above max level"""
+        result = False
+        function = self.get_debug_function(node)
+        if function == "enabled_at":
+            result = self.is_stripped_level(node)
+        elif function == "debugging":
+            result = self.is_stripped_level(node, default=debug.USUAL)
+        elif (isinstance(node, cst.Attribute) and isinstance(node.value, cst.Name)
+              and (node.value.value in self.debug_modules)
+              and (node.attr.value in debug.ENABLED_FLAG_LEVELS)):
+            result = (debug.ENABLED_FLAG_LEVELS[node.attr.value] > self.max_level)
+        return result
+
+    def assertion_to_assert(self, call: cst.Call) -> Optional[cst.Assert]:
+        """Convert debug.assertion CALL to assert statement, or None if assert level above max"""
+        level_arg = self.get_arg(call, 3, "assert_level")
+        level = (self.resolve_level(level_arg.value) if level_arg else None)
+        if ((level is not None) and (level > self.max_level)):
+            return None
+        def wrap(arg):
+            """Parenthesize ARG value if it spans multiple lines"""
+            value = arg.value
+            if (("\n" in cst.Module([]).code_for_node(value)) and not value.lpar):
+                value = value.with_changes(lpar=[cst.LeftParen()], rpar=[cst.RightParen()])
+            return value
+        expression_arg = self.get_arg(call, 0, "expression")
+        message_arg = (self.get_arg(call, 2, "message") or self.get_arg(call, 1, "issue"))
+        return cst.Assert(test=wrap(expression_arg),
+                          msg=(wrap(message_arg) if message_arg else None))
+
+    # pylint: disable=invalid-name
+    def leave_Expr(
+            self,
+            original_node: cst.Expr,
+            updated_node: cst.Expr
+        ) -> Union[cst.BaseSmallStatement, cst.RemovalSentinel]:
+        """Leave an Expr node, removing stripped debug calls"""
+        result = updated_node
+        function = self.get_debug_function(updated_node.value)
+        if ((function in STRIPPABLE_TRACE_FUNCTIONS) and self.is_stripped_level(updated_node.value)):
+            result = cst.RemoveFromParent()
+            self.add_to_history(f"debug.{function}", "removed")
+        elif ((function == "assertion") and (self.assertions != "keep")
+              and self.get_arg(updated_node.value, 0, "expression")):
+            new_node = (self.assertion_to_assert(updated_node.value)
+                        if (self.assertions == "assert") else None)
+            result = (new_node or cst.RemoveFromParent())
+            self.add_to_history("debug.assertion", ("assert" if new_node else "removed"))
+        debug.trace(8, f"StripDebugTransformer.leave_Expr(original_node={original_node}, updated_node={updated_node}) => {result}")
+        return result
+
+    # pylint: disable=invalid-name
+    def leave_If(
+            self,
+            original_node: cst.If,
+            updated_node: cst.If
+        ) -> Union[cst.BaseStatement, cst.RemovalSentinel]:
+        """Leave an If node, removing blocks guarded by disabled trace levels"""
+        result = updated_node
+        if ((not updated_node.orelse) and self.is_disabled_guard(updated_node.test)):
+            result = cst.RemoveFromParent()
+            self.add_to_history(f"if {cst.Module([]).code_for_node(updated_node.test)}", "removed")
+        debug.trace(8, f"StripDebugTransformer.leave_If(original_node={original_node}, updated_node={updated_node}) => {result}")
+        return result
+
+    # pylint: disable=invalid-name
+    def leave_Module(
+            self,
+            original_node: cst.Module,
+            updated_node: cst.Module
+        ) -> cst.Module:
+        """Leave a Module node, removing debug imports no longer used"""
+        usage = NameUsageVisitor()
+        updated_node.visit(usage)
+        unused = ({name for name in (self.debug_modules | self.debug_functions)
+                   if (name.split(".")[0] not in usage.names)}
+                  if self.total else set())
+        new_body = []
+        for node in updated_node.body:
+            if (isinstance(node, cst.SimpleStatementLine)
+                    and isinstance(node.body[0], (cst.Import, cst.ImportFrom))
+                    and not isinstance(node.body[0].names, cst.ImportStar)):
+                import_node = node.body[0]
+                names = [alias for alias in import_node.names
+                         if (cst_to_path(alias.asname.name if alias.asname else alias.name) not in unused)]
+                if not names:
+                    continue
+                if len(names) < len(import_node.names):
+                    names[-1] = names[-1].with_changes(comma=cst.MaybeSentinel.DEFAULT)
+                    node = node.with_changes(body=[import_node.with_changes(names=names)])
+            new_body.append(node)
+        result = updated_node.with_changes(body=new_body)
+        debug.trace(8, f"StripDebugTransformer.leave_Module(original_node={original_node}, updated_node={updated_node}) => {result}")
+        return result
+
+
 def transform(to_module, code: str, skip_warnings:bool=False) -> tuple[str,dict]:
     """
     Transform the code
@@ -2291,6 +2540,48 @@ def transform(to_module, code: str, skip_warnings:bool=False) -> tuple[str,dict]
     debug.trace(5, f"transform(...) => {modified_code!r}")
     return modified_code, metrics
 
+
+def strip_debug(code: str, max_level: int = STRIP_DEBUG_LEVEL,
+                assertions: str = STRIP_ASSERTIONS) -> tuple[str,dict]:
+    """
+    Remove debug tracing from CODE for trace levels above MAX_LEVEL, with ASSERTIONS
+    specifying how to handle debug.assertion calls: drop, assert, or keep
+
+    ```
+    >>> code = (
+    >>>    '''
+    >>>    from mezcla import debug
+    >>>    debug.trace(5, "in fubar")
+    >>>    debug.assertion(2 + 2 == 4)
+    >>>    ''')
+    >>> strip_debug(code, assertions="assert")
+    assert 2 + 2 == 4
+    ```
+    Note: The metrics use the same keys as with transform.
+    """
+    debug.trace(6, f"in strip_debug(code='{code!r}', max_level={max_level}, assertions={assertions!r})")
+    tree = cst.parse_module(code)
+    strip_transformer = StripDebugTransformer(max_level=max_level, assertions=assertions)
+    tree = tree.visit(strip_transformer)
+    modified_code = tree.code
+    if TRACE_DIFF:
+        code_diff = misc_utils.string_diff(code, modified_code)
+        debug.trace(1, f"code diff:\n{gh.indent_lines(code_diff)}")
+
+    # Build metrics
+    metrics = {}
+    metrics["number_calls_replaced"] = strip_transformer.total
+    metrics["number_unique_calls_replaced"] = strip_transformer.unique
+    metrics["calls_replaced"] = strip_transformer.get_unique_history()
+    metrics["number_warnings_added"] = 0
+    metrics["number_unique_warnings_added"] = 0
+    metrics["warnings_added"] = []
+    metrics["total"] = strip_transformer.total
+    metrics["unique_total"] = strip_transformer.unique
+
+    debug.trace(5, f"strip_debug(...) => {modified_code!r}")
+    return modified_code, metrics
+
 #-------------------------------------------------------------------------------
     
 class MezclaToStandardScript(Main):
@@ -2304,6 +2595,9 @@ class MezclaToStandardScript(Main):
     metrics = False
     in_place = False
     skip_warnings = False
+    strip_debug = False
+    max_level = STRIP_DEBUG_LEVEL
+    assertions = STRIP_ASSERTIONS
 
     def setup(self) -> None:
         """Process arguments"""
@@ -2313,6 +2607,9 @@ class MezclaToStandardScript(Main):
         self.metrics = self.get_parsed_option(METRICS, self.metrics)
         self.in_place = self.get_parsed_option(IN_PLACE, self.in_place)
         self.skip_warnings = self.get_parsed_option(SKIP_WARNINGS, self.skip_warnings)
+        self.strip_debug = self.get_parsed_option(STRIP_DEBUG, self.strip_debug)
+        self.max_level = self.get_parsed_option(MAX_LEVEL, self.max_level)
+        self.assertions = self.get_parsed_option(ASSERTIONS, self.assertions)
 
     def show_continue_warning(self) -> None:
         """Show warning if user want to continue"""
@@ -2408,8 +2705,12 @@ class MezclaToStandardScript(Main):
         else:
             to_module = ToStandard()
         try:
-            modified_code, metrics = transform(to_module, code,
-                skip_warnings=self.skip_warnings)
+            if self.strip_debug:
+                modified_code, metrics = strip_debug(code, max_level=self.max_level,
+                                                     assertions=self.assertions)
+            else:
+                modified_code, metrics = transform(to_module, code,
+                    skip_warnings=self.skip_warnings)
         except:
             modified_code = ""
             metrics = {}
@@ -2434,6 +2735,13 @@ def main():
             (METRICS, 'Show metrics for the conversion'),
             (IN_PLACE, 'Modify the file in place, useful if you want to compare changes using Git'),
             (SKIP_WARNINGS, 'Skip warnings'),
+            (STRIP_DEBUG, 'Remove debug tracing above --max-level (e.g., for production copy)'),
+        ],
+        int_options = [
+            (MAX_LEVEL, f'Highest trace level kept with --{STRIP_DEBUG}', STRIP_DEBUG_LEVEL),
+        ],
+        text_options = [
+            (ASSERTIONS, f'How to handle debug.assertion with --{STRIP_DEBUG}: {", ".join(ASSERTION_MODES)}', STRIP_ASSERTIONS),
         ],
         manual_input=True,
         skip_input=False,
@@ -6,6 +6,20 @@
 # Note: This provides tracing for commonly used functions (e.g., search and sub),
 # with aliasing used for miscellaneous others (e.g., subn).
 #
+# Note: For hot loops, use compile_wrapped to get a handle for a single regex,
+# which skips tracing unless enabled (i.e., within small factor of re overhead):
+#
+#    word_re = my_re.compile_wrapped(r"(\w+)")
+#    for token in tokens:
+#        if word_re.match(token):
+#            word = word_re.group(1)
+#
+# Note: The match state for my_re (e.g., used by group) is thread-local, so the
+# global instance can be used from multiple threads (e.g., CherryPy servers).
+# Tasks interleaved within the same thread (e.g., asyncio coroutines) should
+# instead use their own instance via make_regex_wrapper. Likewise, the handles
+# from compile_wrapped should not be shared across threads or tasks.
+#
 # Example usage:
 #
 #    from my_regex import my_re
@@ -31,7 +45,9 @@
 
 # Standard packages
 import re
-from typing import Any, AnyStr, List, Match, Optional, Tuple, Union
+import sys
+import threading
+from typing import Any, AnyStr, Dict, Iterator, List, Match, Optional, Set, Tuple, Union
 ## TODO: from re import *
 
 # Installed packages
@@ -52,7 +68,7 @@ from mezcla.validate_arguments_types import StrOrBytes
 ## DEBUG: system.print_error("checking SKIP_RE_ALL")
 RE_ALL = (not system.getenv_bool("SKIP_RE_ALL", False,
                                  "Don't use re.__all__: for sake of pylint"))
-__all__ = ['regex_wrapper', 'my_re']
+__all__ = ['regex_wrapper', 'compiled_regex_wrapper', 'my_re', 'make_regex_wrapper']
 if RE_ALL:
     ## TODO: __all__ = re.__all__ + ['regex_wrapper', 'my_re']
     __all__ += re.__all__
@@ -73,12 +89,64 @@ REGEX_TRACE_LEVEL = system.getenv_int(
 REGEX_WARNINGS = system.getenv_bool(
     "REGEX_WARNINGS", debug.debugging(debug.USUAL),
     desc="Include warnings about regex's such as f-string")
+REGEX_CACHE_SIZE = system.getenv_int(
+    "REGEX_CACHE_SIZE", 512,
+    desc="Maximum number of compiled patterns cached by my_regex")
 
 # Type aliases
 #
 # Alias for the return type of grouping(): tuple of matches OR a single match
 GroupsOrGroup = Union[Tuple[StrOrBytes, ...], StrOrBytes]
 
+#...............................................................................
+
+class PatternCache():
+    """Cache of compiled regex patterns with hit/miss statistics
+    Note: When full, the oldest entry is dropped (i.e., FIFO). This is shared by all
+    threads, so the statistics are approximate under concurrent usage."""
+
+    def __init__(self, max_size: int = REGEX_CACHE_SIZE) -> None:
+        """Initializer: cache up to MAX_SIZE patterns"""
+        self.max_size = max_size
+        self.patterns: Dict[Tuple[Any, int], re.Pattern[Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, regex: Union[AnyStr, re.Pattern[AnyStr]], flags: int = 0) -> re.Pattern[AnyStr]:
+        """Return compiled version of REGEX with FLAGS"""
+        key = (regex, flags)
+        pattern = self.patterns.get(key)
+        if pattern is not None:
+            self.hits += 1
+            return pattern
+        self.misses += 1
+        pattern = re.compile(regex, flags)
+        if (len(self.patterns) >= self.max_size):
+            # note: tolerates concurrent eviction by another thread
+            try:
+                self.patterns.pop(next(iter(self.patterns)), None)
+            except (RuntimeError, StopIteration):
+                debug.trace(7, "FYI: concurrent cache eviction")
+        self.patterns[key] = pattern
+        return pattern
+
+    def info(self) -> Dict[str, int]:
+        """Return statistics on cache usage"""
+        return {"hits": self.hits, "misses": self.misses,
+                "size": len(self.patterns), "max_size": self.max_size}
+
+    def clear(self) -> None:
+        """Remove cached patterns and reset the statistics"""
+        self.patterns.clear()
+        self.hits = self.misses = 0
+
+pattern_cache = PatternCache()
+
+# Patterns already checked via check_pattern (n.b., bounded by cache size)
+checked_patterns: Set[Any] = set()
+
+#...............................................................................
+
 ## TEST: Attempts to work around Python enum extension limitation
 ##
 ## OLD: class regex_wrapper(object):
@@ -107,9 +175,11 @@ GroupsOrGroup = Union[Tuple[StrOrBytes, ...], StrOrBytes]
 ##     pass
 ##
 
-class regex_wrapper():
+## OLD: class regex_wrapper():
+class regex_wrapper(threading.local):
     """Wrapper class over re to implement regex search that saves match results
-    note: Allows regex to be used directly in conditions"""
+    note: Allows regex to be used directly in conditions; also, match results are
+    thread-local (n.b., __init__ is invoked for each thread using the instance)."""
     # TODO: IGNORECASE = re.IGNORECASE, etc.
     # import from RE so other methods supported directly (and above constants)
     TRACE_LEVEL = REGEX_TRACE_LEVEL
@@ -148,7 +218,12 @@ class regex_wrapper():
 
     def check_pattern(self, regex: AnyStr) -> None:
         """Apply sanity checks to REGEX when debugging
-        Note: Added to account for potential missing f-string prefix"""
+        Note: Added to account for potential missing f-string prefix. Each distinct regex is only checked once."""
+        if (not REGEX_WARNINGS) or (regex in checked_patterns):
+            return
+        if (len(checked_patterns) >= pattern_cache.max_size):
+            checked_patterns.clear()
+        checked_patterns.add(regex)
         debug.trace(self.TRACE_LEVEL + 1, f"check_pattern({regex})")
         debug.reference_var(self)
         # note: checks for variable reference in braces (e.g., "Hi, {name}!")
@@ -176,32 +251,40 @@ class regex_wrapper():
         ## TODO: rename as match_anywhere for clarity
         if base_trace_level is None:
             base_trace_level = self.TRACE_LEVEL
-        debug.trace_fmtd((1 + base_trace_level), "my_regex.search({r!r}, {t!r}, {f}): self={s}",
-                         r=regex, t=text, f=flags, s=self, max_len=2048)
-        ## OLD: debug.assertion(isinstance(text, six.string_types))
-        debug.assertion(isinstance(text, (str, bytes)) and (isinstance(regex, type(text))))
+        # note: tracing checks guarded to minimize overhead (e.g., per-token usage)
+        tracing = debug.enabled_at(base_trace_level)
+        if tracing:
+            debug.trace_fmtd((1 + base_trace_level), "my_regex.search({r!r}, {t!r}, {f}): self={s}",
+                             r=regex, t=text, f=flags, s=self, max_len=2048)
+            ## OLD: debug.assertion(isinstance(text, six.string_types))
+            debug.assertion(isinstance(text, (str, bytes)) and (isinstance(regex, type(text))))
         self.search_text = text
         self.check_pattern(regex)
-        self.match_result = re.search(regex, text, flags)
-        if self.match_result:
+        ## OLD: self.match_result = re.search(regex, text, flags)
+        # note: uses local result to minimize thread-local attribute access
+        self.match_result = result = pattern_cache.get(regex, flags).search(text)
+        if (tracing and result):
             debug.trace_fmt(base_trace_level, "match: {m!r}; regex: {r!r}", m=self.grouping(), r=regex)
-            debug.trace_object(base_trace_level + 1, self.match_result)
-        return self.match_result
+            debug.trace_object(base_trace_level + 1, result)
+        return result
 
     def match(self, regex: AnyStr, text: AnyStr, flags: int = 0, base_trace_level: Optional[int] = None) -> Optional[Match[AnyStr]]:
         """Match REGEX to TEXT with optional FLAGS and BASE_TRACE_LEVEL (e.g., 6)"""
         ## TODO: rename as match_start for clarity; add match_all method (wrapper around fullmatch)
         if base_trace_level is None:
             base_trace_level = self.TRACE_LEVEL
-        debug.trace_fmtd((1 + base_trace_level), "my_regex.match({r!r}, {t!r}, {f}): self={s}",
-                         r=regex, t=text, f=flags, s=self, max_len=2048)
+        tracing = debug.enabled_at(base_trace_level)
+        if tracing:
+            debug.trace_fmtd((1 + base_trace_level), "my_regex.match({r!r}, {t!r}, {f}): self={s}",
+                             r=regex, t=text, f=flags, s=self, max_len=2048)
         self.search_text = text
         self.check_pattern(regex)
-        self.match_result = re.match(regex, text, flags)
-        if self.match_result:
+        ## OLD: self.match_result = re.match(regex, text, flags)
+        self.match_result = result = pattern_cache.get(regex, flags).match(text)
+        if (tracing and result):
             debug.trace_fmt(base_trace_level, "match: {m!r}; regex: {r!r}", m=self.grouping(), r=regex)
-            debug.trace_object(base_trace_level + 1, self.match_result)
-        return self.match_result
+            debug.trace_object(base_trace_level + 1, result)
+        return result
 
     def get_match(self) -> Optional[Match[Any]]:
         """Return match result object for last search or match"""
@@ -212,16 +295,19 @@ class regex_wrapper():
 
     def group(self, num: int) -> Optional[StrOrBytes]:
         """Return group NUM from match result from last search"""
-        debug.assertion(self.match_result)
-        result = self.match_result and self.match_result.group(num)
-        debug.trace_fmtd(self.TRACE_LEVEL, "my_regex.group({n}) => {r!r}: self={s}",
-                         n=num, r=result, s=self)
+        match_result = self.match_result
+        debug.assertion(match_result)
+        result = match_result and match_result.group(num)
+        if debug.enabled_at(self.TRACE_LEVEL):
+            debug.trace_fmtd(self.TRACE_LEVEL, "my_regex.group({n}) => {r!r}: self={s}",
+                             n=num, r=result, s=self)
         return result
 
     def groups(self) -> Optional[Tuple[StrOrBytes, ...]]:
         """Return all groups in match result from last search"""
-        debug.assertion(self.match_result)
-        result = self.match_result and self.match_result.groups()
+        match_result = self.match_result
+        debug.assertion(match_result)
+        result = match_result and match_result.groups()
         debug.trace_fmt(self.TRACE_LEVEL, "my_regex.groups() => {r!r}: self={s}",
                         r=result, s=self)
         return result
@@ -248,9 +334,11 @@ class regex_wrapper():
     def sub(self, pattern: AnyStr, replacement: AnyStr, string: AnyStr, *, count: int = 0, flags: int = 0) -> AnyStr:
         """Version of re.sub requiring explicit keyword parameters"""
         # Note: Explicit keywords enforced to avoid confusion
-        result = re.sub(pattern, replacement, string, count, flags)
+        ## OLD: result = re.sub(pattern, replacement, string, count, flags)
+        result = pattern_cache.get(pattern, flags).sub(replacement, string, count)
         debug.reference_var(self)
-        debug.trace(self.TRACE_LEVEL + 1, f"my_regex.sub({pattern!r}, {replacement!r}, {string!r}, [count=[count]], flags={flags}]) => {result!r}\n")
+        if debug.enabled_at(self.TRACE_LEVEL + 1):
+            debug.trace(self.TRACE_LEVEL + 1, f"my_regex.sub({pattern!r}, {replacement!r}, {string!r}, [count=[count]], flags={flags}]) => {result!r}\n")
         self.check_pattern(pattern)
         return result
 
@@ -302,7 +390,24 @@ class regex_wrapper():
 
     def compile(self, pattern: AnyStr, flags: int = 0) -> re.Pattern[AnyStr]:
         """Compile a regular expression PATTERN using FLAGS, returning a Pattern object."""
-        return re.compile(pattern, flags)
+        ## OLD: return re.compile(pattern, flags)
+        return pattern_cache.get(pattern, flags)
+
+    def compile_wrapped(self, pattern: AnyStr, flags: int = 0, base_trace_level: Optional[int] = None) -> "compiled_regex_wrapper":
+        """Return compiled_regex_wrapper for PATTERN using FLAGS, with tracing at BASE_TRACE_LEVEL
+        Note: This is intended for regex usage in loops (e.g., per token)."""
+        # EX: my_re.compile_wrapped(r"\d+").search("abc123").group(0) => "123"
+        self.check_pattern(pattern)
+        return compiled_regex_wrapper(pattern, flags, base_trace_level=base_trace_level)
+
+    def cache_info(self) -> Dict[str, int]:
+        """Return statistics for the compiled pattern cache (e.g., hits and misses)"""
+        return pattern_cache.info()
+
+    def clear_cache(self) -> None:
+        """Clear the compiled pattern cache and pattern check memo"""
+        pattern_cache.clear()
+        checked_patterns.clear()
 
     ## Note: Placeholder for other methods (n.b., to avoid silly errors like forgetting self)
     ##
@@ -310,6 +415,92 @@ class regex_wrapper():
     ##     """TODO: docstring"""
     ##     return re.TODO(...)
 
+#...............................................................................
+
+class compiled_regex_wrapper():
+    """Wrapper over single compiled regex that saves match results
+    Note: Tracing is skipped unless enabled at the base trace level (n.b., state is per instance)."""
+
+    def __init__(self, pattern: Union[AnyStr, re.Pattern[AnyStr]], flags: int = 0, base_trace_level: Optional[int] = None) -> None:
+        """Initializer: compile PATTERN with FLAGS, using BASE_TRACE_LEVEL for tracing"""
+        self.pattern = pattern_cache.get(pattern, flags)
+        self.trace_level = (REGEX_TRACE_LEVEL if (base_trace_level is None) else base_trace_level)
+        self.match_result: Optional[Match[Any]] = None
+        self.search_text: Optional[StrOrBytes] = None
+        if debug.enabled_at(self.trace_level):
+            debug.trace(self.trace_level, f"compiled_regex_wrapper({self.pattern.pattern!r})")
+
+    def search(self, text: AnyStr, pos: int = 0, endpos: int = sys.maxsize) -> Optional[Match[AnyStr]]:
+        """Search for regex in TEXT, optionally from POS up to ENDPOS"""
+        self.search_text = text
+        self.match_result = result = self.pattern.search(text, pos, endpos)
+        if debug.enabled_at(self.trace_level):
+            debug.trace(self.trace_level, f"search({self.pattern.pattern!r}, {text!r}) => {result!r}")
+        return result
+
+    def match(self, text: AnyStr, pos: int = 0, endpos: int = sys.maxsize) -> Optional[Match[AnyStr]]:
+        """Match regex at start of TEXT, optionally from POS up to ENDPOS"""
+        self.search_text = text
+        self.match_result = result = self.pattern.match(text, pos, endpos)
+        if debug.enabled_at(self.trace_level):
+            debug.trace(self.trace_level, f"match({self.pattern.pattern!r}, {text!r}) => {result!r}")
+        return result
+
+    def fullmatch(self, text: AnyStr, pos: int = 0, endpos: int = sys.maxsize) -> Optional[Match[AnyStr]]:
+        """Match regex against all of TEXT, optionally from POS up to ENDPOS"""
+        self.search_text = text
+        self.match_result = result = self.pattern.fullmatch(text, pos, endpos)
+        if debug.enabled_at(self.trace_level):
+            debug.trace(self.trace_level, f"fullmatch({self.pattern.pattern!r}, {text!r}) => {result!r}")
+        return result
+
+    def get_match(self) -> Optional[Match[Any]]:
+        """Return match result object for last search or match"""
+        return self.match_result
+
+    def group(self, num: int = 0) -> Optional[StrOrBytes]:
+        """Return group NUM from match result from last search"""
+        return (self.match_result and self.match_result.group(num))
+
+    def groups(self) -> Optional[Tuple[StrOrBytes, ...]]:
+        """Return all groups in match result from last search"""
+        return (self.match_result and self.match_result.groups())
+
+    def grouping(self) -> Optional[GroupsOrGroup]:
+        """Return groups for match result or entire matching string if no groups defined"""
+        return (self.match_result and (self.match_result.groups() or self.match_result.group(0)))
+
+    def start(self, group: int = 0) -> Optional[int]:
+        """Start index for GROUP"""
+        return (self.match_result and self.match_result.start(group))
+
+    def end(self, group: int = 0) -> Optional[int]:
+        """End index for GROUP"""
+        return (self.match_result and self.match_result.end(group))
+
+    def span(self, group: int = 0) -> Optional[Tuple[int, int]]:
+        """Tuple with GROUP start and end"""
+        return (self.match_result and self.match_result.span(group))
+
+    def sub(self, replacement: AnyStr, string: AnyStr, count: int = 0) -> AnyStr:
+        """Replace regex occurrences in STRING with REPLACEMENT, optionally up to COUNT"""
+        result = self.pattern.sub(replacement, string, count)
+        if debug.enabled_at(self.trace_level + 1):
+            debug.trace(self.trace_level + 1, f"sub({self.pattern.pattern!r}, {replacement!r}, {string!r}) => {result!r}")
+        return result
+
+    def split(self, string: AnyStr, maxsplit: int = 0) -> List[AnyStr]:
+        """Split STRING by regex, optionally up to MAXSPLIT"""
+        return self.pattern.split(string, maxsplit)
+
+    def findall(self, string: AnyStr) -> List[AnyStr]:
+        """Find all regex matches in STRING"""
+        return self.pattern.findall(string)
+
+    def finditer(self, string: AnyStr) -> Iterator[Match[AnyStr]]:
+        """Iterator over regex match objects in STRING"""
+        return self.pattern.finditer(string)
+
 #...............................................................................
 # Initialization
 #
@@ -317,6 +508,18 @@ class regex_wrapper():
 
 my_re = regex_wrapper()
 
+
+def make_regex_wrapper() -> regex_wrapper:
+    """Return new regex_wrapper with separate match state
+    Note: my_re is already thread-local, so this is only needed for tasks interleaved
+    in the same thread (e.g., asyncio coroutines), as in following:
+        task_re = make_regex_wrapper()
+        if task_re.search(r"([0-9]+)", text): value = task_re.group(1)
+    """
+    return regex_wrapper()
+
+#...............................................................................
+
 if __name__ == '__main__':
     system.print_error("Warning: not intended for command-line use")
     ## Note: truth in advertising:
@@ -267,6 +267,19 @@ class ngram_tfidf_analysis(object):
         if TFIDF_VP_BOOST:
             self.verb_phrases[doc_id] = self.text_proc.verb_phrases(text) 
 
+    def add_docs(self, docs, workers=None):
+        """Add DOCS, a list of (doc_id, text) pairs, to collection using WORKERS processes
+        Note: see tfidf.corpus.Corpus.add_documents"""
+        debug.trace(5, f"add_docs(_, workers={workers}); len(docs)={len(docs)}")
+        self.corpus.add_documents(docs, workers=workers)
+        self.noun_phrases = defaultdict(list)
+        self.verb_phrases = defaultdict(list)
+        for (doc_id, text) in docs:
+            if TFIDF_NP_BOOST:
+                self.noun_phrases[doc_id] = self.text_proc.noun_phrases(text) 
+            if TFIDF_VP_BOOST:
+                self.verb_phrases[doc_id] = self.text_proc.verb_phrases(text) 
+
     def get_doc(self, doc_id):
         """Return document data for DOC_ID"""
         return self.corpus[doc_id]
@@ -513,19 +526,24 @@ def simple_main_test():
     print(f"top ngrams in {__file__}:\n\t{init_top_ngram_spec}")
 
 
-def output_tfidf_analysis(main_app, good_text=None, bad_text=None):
-    """Output results for ngram TF/IDF analysis over input from MAIN_APP"""
-    debug.trace(4, f"output_tfidf_analysis({main_app})")
+def output_tfidf_analysis(main_app, good_text=None, bad_text=None, workers=None):
+    """Output results for ngram TF/IDF analysis over input from MAIN_APP
+    Note: WORKERS is number of processes for adding documents"""
+    debug.trace(4, f"output_tfidf_analysis({main_app}, workers={workers})")
     ## TODO3: let ngram_tfidf_analysis class do the splitting
     good_terms = ([] if not good_text else split_tokens(good_text))
     bad_terms = ([] if not bad_text else split_tokens(bad_text))
     ngram_analyzer = ngram_tfidf_analysis(min_ngram_size=MIN_NGRAM_SIZE, max_ngram_size=MAX_NGRAM_SIZE,
                                           good_terms=good_terms, bad_terms=bad_terms)
     all_text = main_app.read_entire_input()
-    num_docs = 0
-    for l, line in enumerate(all_text.splitlines()):
-        ngram_analyzer.add_doc(line, doc_id=(l + 1))
-        num_docs += 1
+    ## OLD:
+    ## num_docs = 0
+    ## for l, line in enumerate(all_text.splitlines()):
+    ##     ngram_analyzer.add_doc(line, doc_id=(l + 1))
+    ##     num_docs += 1
+    docs = [((l + 1), line) for (l, line) in enumerate(all_text.splitlines())]
+    ngram_analyzer.add_docs(docs, workers=workers)
+    num_docs = len(docs)
 
     # Output ngram sample
     SAMPLE_SIZE = 10
@@ -543,6 +561,7 @@ def main():
     REGULAR_OPT = "regular"
     GOOD_TERMS_OPT = "good-terms"
     BAD_TERMS_OPT = "bad-terms"
+    WORKERS_OPT = "workers"
     main_app = Main(
         description=__doc__.format(script=gh.basename(__file__),
                                    options=f"--{REGULAR_OPT}"),
@@ -550,15 +569,18 @@ def main():
                          (REGULAR_OPT, "Process regular input--not canned test")],
         text_options=[(GOOD_TERMS_OPT, "Overlap terms for boosting ngrams scores"),
                       (BAD_TERMS_OPT, "Overlap terms for de-boosting ngrams scores")],
+        int_options=[(WORKERS_OPT, "Number of processes for adding documents")],
         skip_input=False, manual_input=True)
     regular = main_app.get_parsed_option(REGULAR_OPT)
     simple_test = main_app.get_parsed_option(SIMPLE_TEST_OPT, not regular)
     good_terms_text = main_app.get_parsed_option(GOOD_TERMS_OPT)
     bad_terms_text = main_app.get_parsed_option(BAD_TERMS_OPT)
+    workers = main_app.get_parsed_option(WORKERS_OPT)
     if (simple_test):
         simple_main_test()
     else:
-        output_tfidf_analysis(main_app, good_text=good_terms_text, bad_text=bad_terms_text)
+        output_tfidf_analysis(main_app, good_text=good_terms_text, bad_text=bad_terms_text,
+                              workers=workers)
    
 #-------------------------------------------------------------------------------
 
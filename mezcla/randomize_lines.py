@@ -7,6 +7,16 @@
 #
 # Note:
 # - Inspired by examples under Stack Overflow (see below).
+# - The above is the sort engine, which requires Unix sort. The default python
+#   engine instead does the following in-process:
+#   -- For full shuffles, chunks of lines are shuffled via sorting by random keys
+#      and written to temporary run files, which are then merged by key (i.e.,
+#      external merge sort). The chunks can be sorted in parallel (see
+#      RANDOMIZE_WORKERS), with per-chunk seeds so results don't depend on this.
+#   -- For percentages, the lines are counted and then a reservoir sample of the
+#      needed size is drawn in a single pass (i.e., Algorithm L). Standard input
+#      is first copied to a temporary file for this.
+# - Paragraph mode (i.e., PARAGRAPH_MODE env. var) is only supported in the python engine.
 #
 #------------------------------------------------------------------------
 # via http://stackoverflow.com/questions/4618298/randomly-mix-lines-of-3-million-line-file
@@ -46,8 +56,13 @@ Sample usage:
 
 # Standard modules
 ## OLD: import argparse
+from concurrent.futures import ProcessPoolExecutor
+import heapq
+import math
 import os
+import itertools
 import random
+import shutil
 import sys
 
 # Local modules
@@ -59,6 +74,21 @@ from mezcla import system
 RANDOM_SEED = system.getenv_int(
     "RANDOM_SEED", 15485863,
     description="Integral seed for random number generation--use 0 for default based on time-of-day")
+PYTHON_ENGINE = "python"
+SORT_ENGINE = "sort"
+RANDOMIZE_ENGINE = system.getenv_text(
+    "RANDOMIZE_ENGINE", PYTHON_ENGINE,
+    description=f"Shuffling engine: {PYTHON_ENGINE} or {SORT_ENGINE} (i.e., Unix sort)")
+RANDOMIZE_CHUNK_SIZE = system.getenv_int(
+    "RANDOMIZE_CHUNK_SIZE", 100000,
+    description="Number of lines per in-memory chunk for python engine shuffle")
+RANDOMIZE_WORKERS = system.getenv_int(
+    "RANDOMIZE_WORKERS", 1,
+    description="Number of processes for sorting the chunks")
+# Key width: hex digits for 64-bit random keys (n.b., allows for string comparison)
+KEY_LEN = 16
+# Encoding for embedded newlines in run files (e.g., paragraph mode)
+NEWLINE_CODE = "\0"
 
 class Dummy_Main(Main):
     """Class for reading input using Main"""
@@ -74,24 +104,206 @@ class Dummy_Main(Main):
     ## def process_line(self, line):
     ##     self.all_lines.append(line)
     ##     return
-        
+
+    def read_units(self):
+        """Generator for lines or paragraphs from the input, depending on the mode
+        Note: paragraphs exclude the separating blank lines"""
+        if not self.paragraph_mode:
+            yield from self.read_input()
+            return
+        paragraph_lines = []
+        for line in self.read_input():
+            if line:
+                paragraph_lines.append(line)
+            elif paragraph_lines:
+                yield "\n".join(paragraph_lines)
+                paragraph_lines = []
+        if paragraph_lines:
+            yield "\n".join(paragraph_lines)
+
+#------------------------------------------------------------------------
+
+def reservoir_sample(units, sample_size, rng):
+    """Return random sample of SAMPLE_SIZE UNITS using RNG, in random order
+    Note: uses Algorithm L, which skips over geometrically distributed runs
+    (see Li 1994, "Reservoir-Sampling Algorithms of Time Complexity O(n(1+log(N/n)))")."""
+    # EX: len(reservoir_sample(range(100), 10, random.Random(1))) => 10
+    reservoir = []
+    if sample_size <= 0:
+        return reservoir
+    units = iter(units)
+    for unit in units:
+        reservoir.append(unit)
+        if len(reservoir) == sample_size:
+            break
+    # note: 1.0 - random() is in (0, 1], avoiding log(0)
+    weight = math.exp(math.log(1.0 - rng.random()) / sample_size)
+    while weight < 1.0:
+        skip = int(math.log(1.0 - rng.random()) / math.log(1.0 - weight))
+        unit = next(itertools.islice(units, skip, None), None)
+        if unit is None:
+            break
+        reservoir[rng.randrange(sample_size)] = unit
+        weight *= math.exp(math.log(1.0 - rng.random()) / sample_size)
+    rng.shuffle(reservoir)
+    debug.trace(5, f"reservoir_sample(_, {sample_size}) => {len(reservoir)} units")
+    return reservoir
+
+
+def encode_unit(unit):
+    """Encode UNIT for line-based run file"""
+    debug.assertion(NEWLINE_CODE not in unit)
+    return unit.replace("\n", NEWLINE_CODE)
+
+
+def decode_unit(line):
+    """Decode run file LINE (i.e., sans key)"""
+    return line[KEY_LEN + 1:].rstrip("\n").replace(NEWLINE_CODE, "\n")
+
+
+def sort_chunk(units, seed, run_file):
+    """Write UNITS sorted by random keys using SEED to RUN_FILE, returning filename
+    Note: top-level function so usable with multiprocessing"""
+    rng = random.Random(seed)
+    keyed_lines = sorted(f"{rng.getrandbits(64):016x}\t{encode_unit(unit)}\n" for unit in units)
+    with system.open_file(run_file, mode="w") as run_handle:
+        run_handle.writelines(keyed_lines)
+    debug.trace(5, f"sort_chunk: wrote {len(keyed_lines)} lines to {run_file}")
+    return run_file
+
+
+def external_shuffle(units, rng, temp_base, chunk_size=None, num_workers=None):
+    """Generator for random permutation of UNITS using RNG, with at most CHUNK_SIZE units per sorted run
+    Notes:
+    - Results are deterministic given the RNG state and CHUNK_SIZE (e.g., regardless of NUM_WORKERS).
+    - The run files are removed even if the generator is not exhausted (e.g., closed upon broken pipe)."""
+    if chunk_size is None:
+        chunk_size = RANDOMIZE_CHUNK_SIZE
+    if num_workers is None:
+        num_workers = RANDOMIZE_WORKERS
+    run_files = []
+    run_handles = []
+    pending = []
+    executor = (ProcessPoolExecutor(max_workers=num_workers) if (num_workers > 1) else None)
+    units = iter(units)
+    try:
+        while True:
+            chunk = list(itertools.islice(units, chunk_size))
+            if not chunk:
+                break
+            # Shuffle in memory if entire input fits in one chunk
+            if (not run_files) and (len(chunk) < chunk_size):
+                rng.shuffle(chunk)
+                yield from chunk
+                return
+            run_file = f"{temp_base}.run{len(run_files) + 1}"
+            run_files.append(run_file)
+            seed = rng.getrandbits(64)
+            if executor:
+                # note: keeps at most NUM_WORKERS chunks in flight to bound memory
+                if len(pending) >= num_workers:
+                    pending.pop(0).result()
+                pending.append(executor.submit(sort_chunk, chunk, seed, run_file))
+            else:
+                sort_chunk(chunk, seed, run_file)
+        for future in pending:
+            future.result()
+        debug.trace(4, f"Merging {len(run_files)} run files")
+
+        # Merge the runs by the random keys
+        for run_file in run_files:
+            run_handles.append(system.open_file(run_file))
+        for line in heapq.merge(*run_handles):
+            yield decode_unit(line)
+    finally:
+        # note: waits for chunks being sorted so their run files can be removed
+        if executor:
+            executor.shutdown(cancel_futures=True)
+        for run_handle in run_handles:
+            run_handle.close()
+        if not debug.detailed_debugging():
+            for run_file in run_files:
+                gh.delete_existing_file(run_file)
+
+
+def run_python_engine(main_app, input_stream, include_header, percent_lines, random_seed):
+    """Randomize INPUT_STREAM in-process, printing the result: see external_shuffle and reservoir_sample
+    Note: MAIN_APP is used for temporary files; and, the input is assumed to be a file or stdin."""
+    rng = random.Random(random_seed or None)
+    temp_base = main_app.temp_base
+
+    # Get input units, excluding the header along with any duplicates
+    header = None
+    reader = Dummy_Main(input_stream)
+    paragraph_mode = reader.paragraph_mode
+    def get_units(stream):
+        """Generator for units from STREAM, excluding the header"""
+        nonlocal header
+        reader.input_stream = stream
+        for (unit_num, unit) in enumerate(reader.read_units()):
+            if (unit_num == 0) and include_header:
+                header = unit
+            elif (include_header and (unit == header)):
+                debug.trace(5, f"Ignoring header at unit {unit_num + 1}")
+            else:
+                yield unit
+
+    # Get random sample or random permutation
+    if percent_lines < 100:
+        # note: counts units first, making copy of standard input for re-reading
+        if not input_stream.seekable():
+            temp_input_file = temp_base + ".input"
+            with system.open_file(temp_input_file, mode="w") as temp_input_handle:
+                shutil.copyfileobj(input_stream, temp_input_handle)
+            input_stream = system.open_file(temp_input_file)
+        num_units = sum(1 for _unit in get_units(input_stream))
+        input_stream.seek(0)
+        sample_size = int(round(percent_lines / 100 * num_units, 0))
+        debug.trace_expr(4, num_units, sample_size)
+        random_units = reservoir_sample(get_units(input_stream), sample_size, rng)
+    else:
+        random_units = external_shuffle(get_units(input_stream), rng, temp_base)
+
+    # Display result
+    # note: header only available after the first unit is read
+    random_units = iter(random_units)
+    first_unit = next(random_units, None)
+    num_output_units = 0
+    IO_error = False
+    try:
+        if include_header and (header is not None):
+            print(header)
+            if paragraph_mode:
+                print("")
+        for unit in ([] if (first_unit is None) else itertools.chain([first_unit], random_units)):
+            if paragraph_mode and num_output_units:
+                print("")
+            num_output_units += 1
+            print(unit)
+    except:
+        # note: closing the generator removes temporary files (see external_shuffle)
+        IO_error = True
+        debug.trace(4, "Exception printing unit %d: %s" % (num_output_units, str(sys.exc_info())))
+        if hasattr(random_units, "close"):
+            random_units.close()
+    debug.trace_expr(4, num_output_units, IO_error)
+
+
 
 def main():
     """Entry point for script"""
     debug.trace(4, "main(): sys.argv=%s" % sys.argv)
-    ## TODO: assert is_directory("/usr/bin"), "This requires Unix"
-    if ("--ignore-case" not in gh.run("sort --help")):
-        system.print_error("Error: This requires a Unix-type version of sort (e.g., GNU).")
-        sys.exit()
 
     # Check command-line arguments
     # TODO3: standardize name of instance (e.g., dummy_app vs app vs. script_app)
     HEADER_OPT = "header"
     SEED_OPT = "seed"
     PERCENT_OPT = "percent"
+    ENGINE_OPT = "engine"
     main_app = Main(description=__doc__.format(script=gh.basename(__file__), seed=RANDOM_SEED),
                     boolean_options=[(HEADER_OPT, "Keep first line for header columns")],
                     int_options=[(SEED_OPT, "random seed if nonzero (e.g., 122949823, the seven-millionth prime)")],
+                    text_options=[(ENGINE_OPT, f"Shuffling engine: {PYTHON_ENGINE} or {SORT_ENGINE}--defaults to {RANDOMIZE_ENGINE}")],
                     float_options=[(PERCENT_OPT, "Percent of lines to keep")],
                     skip_input=False, manual_input=True)
     debug.assertion(main_app.parsed_args)
@@ -111,6 +323,15 @@ def main():
         random.seed(random_seed)
     include_header = main_app.get_parsed_option(HEADER_OPT)
     percent_lines = main_app.get_parsed_option(PERCENT_OPT, 100)
+    engine = main_app.get_parsed_option(ENGINE_OPT, RANDOMIZE_ENGINE)
+    debug.assertion(engine in [PYTHON_ENGINE, SORT_ENGINE])
+    if (engine != SORT_ENGINE):
+        run_python_engine(main_app, input_stream, include_header, percent_lines, random_seed)
+        return
+    ## TODO: assert is_directory("/usr/bin"), "This requires Unix"
+    if ("--ignore-case" not in gh.run("sort --help")):
+        system.print_error("Error: This requires a Unix-type version of sort (e.g., GNU).")
+        sys.exit()
 
     # Initialize seed for optional random number generator
     if RANDOM_SEED:
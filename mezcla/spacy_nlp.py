@@ -8,6 +8,9 @@
 # - Unforunately Spacy's document omits important detail that sentiment analysis is not built in!
 # - To compensate, sentiment analyzer is based on vader:
 #      https://medium.com/swlh/simple-sentiment-analysis-for-nlp-beginners-and-everyone-else-using-vader-and-textblob-728da3dbe33d
+# - With --batch-size, the lines (or paragraphs) are buffered and run through nlp.pipe,
+#   optionally with multiple processes (--num-processes). The output is the same, with the
+#   location info for TRACK_PAGES restored per line.
 # TODO:
 # - ** Disable stupid tensorflow warnings (unless feature used): see https://stackoverflow.com/questions/72033928/python-spacy-module-warning-involving-tensorflow-and-libcudart!
 # - * Add part-of-speech tagging (see https://spacy.io/api/tagger).
@@ -47,6 +50,14 @@ LANG_MODEL = "lang-model"
 USE_SCI_SPACY = "use-scispacy"
 DOWNLOAD_MODEL = "download-model"
 SHOW_REPRESENTATION = "show-representation"
+SHOW_NOUN_CHUNKS = "show-noun-chunks"
+BATCH_SIZE = "batch-size"
+NUM_PROCESSES = "num-processes"
+# note: Main attributes for input location restored when processing batched lines
+LOCATION_ATTRIBUTES = ["page_num", "para_num", "rel_para_num", "line_num", "rel_line_num", "char_offset"]
+# Spacy pipeline components needed for particular output (n.b., others disabled)
+NER_COMPONENTS = ["ner"]
+NOUN_CHUNK_COMPONENTS = ["tok2vec", "tagger", "attribute_ruler", "parser"]
 
 # Environment options
 COUNT_ENTITIES = system.getenv_bool(
@@ -62,6 +73,15 @@ USE_PYSBD = system.getenv_bool(
 USE_NLTK = system.getenv_bool(
     "USE_NLTK", (SENT_TOKENIZER.lower() == "nltk"),
     description="Use NLTK--NL Toolkit")
+SPACY_BATCH_SIZE = system.getenv_int(
+    "SPACY_BATCH_SIZE", 0,
+    description="Number of lines per nlp.pipe batch--0 to process each line separately")
+SPACY_NUM_PROCESSES = system.getenv_int(
+    "SPACY_NUM_PROCESSES", 1,
+    description="Number of processes for nlp.pipe in batch mode (-1 for all CPUs)")
+SPACY_BUFFER_BATCHES = system.getenv_int(
+    "SPACY_BUFFER_BATCHES", 4,
+    description="Number of batches buffered per process before running nlp.pipe")
 SPACY_MODEL = system.getenv_text(
     ## TODO2: "SPACY_MODEL", "en_core_web_lg",
     "SPACY_MODEL", "en_core_web_md",
@@ -318,6 +338,10 @@ class Script(Main):
     download_model = False
     show_reprsentation = False
     sent_num = 0
+    show_noun_chunks = False
+    batch_size = SPACY_BATCH_SIZE
+    num_processes = SPACY_NUM_PROCESSES
+    pending = None
 
     def setup(self):
         """Check results of command line processing"""
@@ -334,6 +358,10 @@ class Script(Main):
         default_show_representation = ((not (do_specific_task or TRACK_PAGES))
                                        or self.verbose)
         self.show_representation = self.get_parsed_option(SHOW_REPRESENTATION, default_show_representation)
+        self.show_noun_chunks = self.get_parsed_option(SHOW_NOUN_CHUNKS, self.show_noun_chunks)
+        self.batch_size = self.get_parsed_option(BATCH_SIZE, self.batch_size)
+        self.num_processes = self.get_parsed_option(NUM_PROCESSES, self.num_processes)
+        self.pending = []
         self.doc = None
 
         # Download model from server
@@ -376,9 +404,13 @@ class Script(Main):
         debug.assertion(self.nlp)
 
         # Disable pipeline components not needed
-        unused = ["parser", "tok2vec"]
-        if not self.run_ner:
-            unused.append("ner")
+        ## OLD:
+        ## unused = ["parser", "tok2vec"]
+        ## if not self.run_ner:
+        ##     unused.append("ner")
+        # note: only components needed for the requested output are kept (e.g., just ner
+        # if --run-ner); the word information uses the vocabulary and the sentiment is via VADER.
+        unused = self.get_unused_components()
         for component in unused:
             try:
                 self.nlp.disable_pipe(component)
@@ -387,15 +419,18 @@ class Script(Main):
         debug.trace(4, f"Pipeline components: {[x[0] for x in self.nlp.pipeline]}")
 
         # Load in optional SpaCy components
+        # note: sentence boundaries are set before the parser (e.g., for noun chunks)
         use_spacy = (not SENT_TOKENIZER) or (SENT_TOKENIZER.lower() == "spacy")
+        before_parser = ({"before": "parser"} if ("parser" in self.nlp.component_names) else {})
         if USE_PYSBD:
             ## TODO: self.nlp.add_pipe(PySBDFactory(self.nlp))
-            self.nlp.add_pipe("pysbd_sentence_boundaries", before="parser")
+            self.nlp.add_pipe("pysbd_sentence_boundaries", **before_parser)
         elif USE_NLTK:
-            self.nlp.add_pipe("nltk_sentence_boundaries", before="parser")
+            self.nlp.add_pipe("nltk_sentence_boundaries", **before_parser)
         elif use_spacy:
             # Note: senticizer is implicitly used when parser enabled
-            self.nlp.add_pipe("sentencizer")
+            ## OLD: self.nlp.add_pipe("sentencizer")
+            self.nlp.add_pipe("sentencizer", **(before_parser if self.show_noun_chunks else {}))
         else:
             system.print_error(f"Error: Unknown tokenizer {SENT_TOKENIZER!r}: using default")
                 
@@ -406,6 +441,17 @@ class Script(Main):
         debug.trace_object(5, self, label="Script instance")
 
 
+    def get_unused_components(self):
+        """Return list of pipeline components not needed for requested output"""
+        needed = []
+        if self.run_ner:
+            needed += NER_COMPONENTS
+        if self.show_noun_chunks:
+            needed += NOUN_CHUNK_COMPONENTS
+        unused = [name for name in self.nlp.pipe_names if name not in needed]
+        debug.trace(5, f"get_unused_components() => {unused}")
+        return unused
+
     def get_entity_spec(self):
         """Return the named entities tagged in the input as string list of typed entities"""
         ## EX: "PERSON:Trump, ORG:the White House"
@@ -447,7 +493,40 @@ class Script(Main):
         # TODO: allow for embedded sentences
         ## self.doc = self.nlp(re.sub(r"\S", " ", line))
         line = (re.sub(r"\s", " ", line))
+        # note: in batch mode, the line is saved along with location info for process_batch
+        if (self.batch_size > 1):
+            self.pending.append((line, {a: getattr(self, a, None) for a in LOCATION_ATTRIBUTES}))
+            if (len(self.pending) >= (self.batch_size * max(1, self.num_processes) * SPACY_BUFFER_BATCHES)):
+                self.process_batch()
+            return
         self.doc = self.nlp(line)
+        self.process_doc(line)
+
+    def process_batch(self):
+        """Analyze pending lines via nlp.pipe and output in original order"""
+        debug.trace(5, f"Script.process_batch(); {len(self.pending)} lines")
+        if not self.pending:
+            return
+        pending = self.pending
+        self.pending = []
+        # note: location info is restored to reflect the line's position in the input
+        current_location = {a: getattr(self, a, None) for a in LOCATION_ATTRIBUTES}
+        docs = self.nlp.pipe([line for (line, _location) in pending],
+                             batch_size=self.batch_size, n_process=self.num_processes)
+        for ((line, location), doc) in zip(pending, docs):
+            for (attribute, value) in location.items():
+                setattr(self, attribute, value)
+            self.doc = doc
+            self.process_doc(line)
+        for (attribute, value) in current_location.items():
+            setattr(self, attribute, value)
+
+    def wrap_up(self):
+        """Process remaining lines in batch mode"""
+        self.process_batch()
+
+    def process_doc(self, line):
+        """Output analysis of self.doc for LINE"""
         debug.trace_object(7, self.doc, "doc")
         if self.verbose:
             line_text = re.sub(r"\r?\n", " <newline> ", line)
@@ -509,6 +588,10 @@ class Script(Main):
                     prefix = "{len} ".format(len=len(sent_info.ents))
                 prefix += "entities:"
             print(prefix + self.get_entity_spec())
+        # Optionally, show noun chunks
+        if self.show_noun_chunks:
+            prefix = "noun chunks: " if self.verbose else ""
+            print(prefix + self.entity_delim.join(chunk.text for chunk in sentence.noun_chunks))
         # Optionally, do sentiment analysis
         if self.analyze_sentiment:
             prefix = "sentiment: " if self.verbose else ""
@@ -530,7 +613,10 @@ if __name__ == '__main__':
         boolean_options=[RUN_NER, ANALYZE_SENTIMENT, VERBOSE,
                          (DOWNLOAD_MODEL, "Download Spacy model"),
                          (SHOW_REPRESENTATION, "Show final representation (e.g., word & token attributes"),
+                         (SHOW_NOUN_CHUNKS, "Show noun chunks per sentence"),
         ],
+        int_options=[(BATCH_SIZE, "Lines per batch for nlp.pipe (e.g., 256)--0 for line-by-line"),
+                     (NUM_PROCESSES, "Processes for nlp.pipe with batches")],
         text_options=[(LANG_MODEL, "Language model for NLP")])
     app.run()
     debug.trace_expr(5, pysbd)
@@ -292,6 +292,42 @@ def test_09_sampling_limits_interest_lines(monkeypatch):
     assert len(interest) == 1
     assert "warning: one" in interest[0]
 
+
+
+def test_11_streaming_matches_in_memory(monkeypatch):
+    """Verify analyze_stream/filter_stream agree with process, including sampling."""
+    monkeypatch.setattr(THE_MODULE, "SAMPLE_HEAD_SIZE", 20)
+    monkeypatch.setattr(THE_MODULE, "SAMPLE_TAIL_SIZE", 30)
+    flag_prefix = "-I/home/user/project/build/arm64-v8a"
+    input_data = []
+    for i in range(200):
+        input_data.append(f"\x1b[1m[DEBUG]\x1b[0m: gcc -c {flag_prefix}/include{i % 3} -o f{i}.o {BUILDOZER_BASE}src/f{i}.c")
+        input_data.append(f"Progress 10%\rProgress 100% {i}" if (i % 50) else f"error: failure {i}")
+    options = dict(collapse=True, adaptive=True, sample=True, substr=True)
+    refiner = THE_MODULE.LogRefiner(**options)
+    expected = refiner.process(input_data)
+    stream_refiner = THE_MODULE.LogRefiner(**options)
+    stream_refiner.analyze_stream(iter(input_data))
+    actual = list(stream_refiner.filter_stream(iter(input_data)))
+    assert stream_refiner.path_map == refiner.path_map
+    assert stream_refiner.substr_map == refiner.substr_map
+    assert actual == expected
+    assert "error: failure 100" in actual
+
+
+def test_12_count_min_sketch():
+    """Verify Count-Min sketch estimates are upper bounds and exact without collisions."""
+    sketch = THE_MODULE.CountMinSketch(width=64, depth=3)
+    for i in range(500):
+        sketch.add(f"item{i % 100}")
+    estimates = [sketch.estimate(f"item{i}") for i in range(100)]
+    assert all(estimate >= 5 for estimate in estimates)
+    wide_sketch = THE_MODULE.CountMinSketch()
+    for _i in range(7):
+        wide_sketch.add("/some/path/")
+    assert wide_sketch.estimate("/some/path/") == 7
+    assert wide_sketch.estimate("/other/path/") == 0
+
 #------------------------------------------------------------------------
 
 if __name__ == '__main__':
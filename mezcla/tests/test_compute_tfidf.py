@@ -102,6 +102,7 @@ from mezcla import debug
 from mezcla.unittest_wrapper import TestWrapper, invoke_tests
 from mezcla.my_regex import my_re
 import mezcla.glue_helpers as gh
+from mezcla import system
 
 # Note: Two references are used for the module to be tested:
 #    THE_MODULE:            global module object
@@ -176,6 +177,72 @@ class TestComputeTfidf(TestWrapper):
         self.do_assert("argentina 1.000 5.000 0.040 0.693 0.028" in docs[0])
         return
 
+    def test_matrix_option(self):
+        """Make sure vectorized scoring via --matrix gives same output"""
+        debug.trace(4, f"TestIt.test_matrix_option(); self={self}")
+        data_file = gh.resolve_path(gh.form_path("resources", "argentinian-attraction-snippets.csv"))
+        env_options = "MIN_NGRAM_SIZE=1 MAX_NGRAM_SIZE=2"
+        output = self.run_script(options="--csv --show-all", env_options=env_options,
+                                 data_file=data_file)
+        matrix_output = self.run_script(options="--csv --show-all --matrix", env_options=env_options,
+                                        data_file=data_file)
+        self.do_assert(output.strip())
+        self.do_assert(output == matrix_output)
+        return
+
+    def test_workers_option(self):
+        """Make sure parallel preprocessing via --workers gives same output"""
+        debug.trace(4, f"TestIt.test_workers_option(); self={self}")
+        data_file = gh.resolve_path(gh.form_path("resources", "argentinian-attraction-snippets.csv"))
+        env_options = "MIN_NGRAM_SIZE=1 MAX_NGRAM_SIZE=2"
+        output = self.run_script(options="--csv --show-all", env_options=env_options,
+                                 data_file=data_file)
+        workers_output = self.run_script(options="--csv --show-all --workers 2", env_options=env_options,
+                                         data_file=data_file)
+        self.do_assert(output.strip())
+        self.do_assert(output == workers_output)
+        return
+
+    def test_saved_corpus(self):
+        """Make sure corpus saved via --save-corpus gives same output via --load-corpus"""
+        debug.trace(4, f"TestIt.test_saved_corpus(); self={self}")
+        data_file = gh.resolve_path(gh.form_path("resources", "argentinian-attraction-snippets.csv"))
+        corpus_file = self.get_temp_file() + ".tfidf"
+        env_options = "MIN_NGRAM_SIZE=1 MAX_NGRAM_SIZE=2"
+        output = self.run_script(options=f"--csv --show-all --save-corpus {corpus_file}",
+                                 env_options=env_options, data_file=data_file)
+        loaded_output = self.run_script(options=f"--csv --show-all --load-corpus {corpus_file}",
+                                        env_options=env_options, data_file="")
+        # note: document headers differ in source filename
+        doc_header_regex = r"^\S+ \[.*\]$"
+        self.do_assert(output.strip())
+        self.do_assert(my_re.sub(doc_header_regex, "", output, flags=my_re.MULTILINE) ==
+                       my_re.sub(doc_header_regex, "", loaded_output, flags=my_re.MULTILINE))
+        return
+
+    def test_stream_option(self):
+        """Make sure streaming via --stream gives same output for repeated IDs"""
+        debug.trace(4, f"TestIt.test_stream_option(); self={self}")
+        # note: uses same document ID for all rows
+        data_file = self.create_temp_file("id,text\n" +
+                                          "1,the fox jumped\n" +
+                                          "1,over the dog. the dog\n" +
+                                          "2,the dog slept\n")
+        env_options = "MIN_NGRAM_SIZE=2 MAX_NGRAM_SIZE=2"
+        output = self.run_script(options="--csv --show-all", env_options=env_options,
+                                 data_file=data_file)
+        stream_output = self.run_script(options="--csv --show-all --stream", env_options=env_options,
+                                        data_file=data_file)
+        self.do_assert(my_re.search(r"^jumped over\s", output, flags=my_re.MULTILINE))
+        self.do_assert(sorted(output.splitlines()) == sorted(stream_output.splitlines()))
+
+        # Make sure warning given for sentence splitter (i.e., cross-row ngrams omitted)
+        log_file = self.temp_file + ".stream.log"
+        self.run_script(options="--csv --stream", env_options=(env_options + " TFIDF_SENT_SPLITTER=1"),
+                        data_file=data_file, log_file=log_file)
+        self.do_assert("TFIDF_SENT_SPLITTER" in system.read_file(log_file))
+        return
+
 
 if __name__ == '__main__':
     debug.trace_current_context()
@@ -94,6 +94,25 @@ class TestCutScript(TestWrapper):
         ## script_output = self.run_script(options='--csv --exclude 1-car-ID', data_file=CSV_EXAMPLE)
         ## (script_output.strip() != "")
 
+    def test_engines(self):
+        """Ensure the bulk and pandas engines give same output as csv engine"""
+        for (options, data_file) in [('--csv --max-field-len 3', CSV_EXAMPLE),
+                                     ('--tsv --fields 3,1-2 --single-line', TSV_EXAMPLE),
+                                     ('--csv --exclude 2-20 --output-tsv', CSV_EXAMPLE)]:
+            outputs = [self.run_script(options=f'--engine {engine} {options}', data_file=data_file)
+                       for engine in THE_MODULE.ENGINES]
+            debug.trace_expr(5, options, outputs)
+            assert outputs[0]
+            assert all((output == outputs[0]) for output in outputs[1:])
+
+    def test_ragged_rows(self):
+        """Ensure short rows get empty fields with the bulk and pandas engines"""
+        temp_file = self.create_temp_file("a,b,c\n1,2,3\n4\n5,6,7\n")
+        for engine in THE_MODULE.ENGINES:
+            script_output = self.run_script(options=f'--csv --engine {engine} --fields 3,1',
+                                            data_file=temp_file)
+            assert script_output == '"c","a"\n"3","1"\n"","4"\n"7","5"'
+
     @pytest.mark.xfail                   # TODO: remove xfail
     def test_empty_row(self):
         """Text handling of empty rows"""
@@ -59,6 +59,25 @@ class TestDataUtils(TestWrapper):
         df = THE_MODULE.read_csv(temp_tsv)
         assert df.shape == (1, 2)
 
+    def test_read_csv_engines(self):
+        """Make sure the C and python parsers agree, including usecols support"""
+        debug.trace(4, "test_read_csv_engines()")
+        assert THE_MODULE.choose_engine({"sep": None}) == "python"
+        assert THE_MODULE.choose_engine({"sep": ",", "comment": "#"}, engine="pyarrow") == "c"
+        python_df = THE_MODULE.read_csv(self.iris_csv_path, engine="python")
+        c_df = THE_MODULE.read_csv(self.iris_csv_path, engine="c")
+        assert python_df.equals(c_df)
+        df = THE_MODULE.read_csv(self.iris_csv_path, usecols=["petal_length", "class"])
+        assert list(df.columns) == ["petal_length", "class"]
+        assert df.equals(python_df[["petal_length", "class"]])
+
+    def test_read_csv_chunks(self):
+        """Ensure read_csv_chunks yields entire file"""
+        debug.trace(4, "test_read_csv_chunks()")
+        chunks = list(THE_MODULE.read_csv_chunks(self.iris_csv_path, chunksize=40))
+        assert [len(df) for df in chunks] == [40, 40, 40, 30]
+        assert pd.concat(chunks).equals(THE_MODULE.read_csv(self.iris_csv_path))
+
     def test_to_csv(self):
         """Ensure to_csv works as expected"""
         debug.trace(4, "test_to_csv()")
@@ -87,6 +106,18 @@ class TestDataUtils(TestWrapper):
         df = THE_MODULE.read_csv(self.iris_csv_path)
         assert THE_MODULE.lookup_df_value(df, "sepal_length", "petal_length", "3.8") == "5.5" 
 
+    def test_lookup_df_value_indexed(self):
+        """Ensure lookup_df_value_indexed agrees with lookup_df_value"""
+        debug.trace(4, "test_lookup_df_value_indexed()")
+        df = THE_MODULE.read_csv(self.iris_csv_path)
+        for value in ["3.8", "1.4", "999"]:
+            assert (THE_MODULE.lookup_df_value_indexed(df, "sepal_length", "petal_length", value)
+                    == THE_MODULE.lookup_df_value(df, "sepal_length", "petal_length", value))
+        assert THE_MODULE.lookup_df_value_indexed(df, "sepal_length", "petal_length", "3.8") == "5.5"
+        # note: index rebuilt when rows added
+        df.loc[len(df)] = ["1", "2", "123", "4", "new"]
+        assert THE_MODULE.lookup_df_value_indexed(df, "class", "petal_length", "123") == "new"
+
     def test_main(self):
         """Ensure main works as expected"""
         debug.trace(4, "main()")
@@ -459,6 +459,40 @@ class TestDebug(TestWrapper):
         assert level5_value == test_value
         assert level0_value is None
 
+    def test_enabled_at(self):
+        """Ensure enabled_at and cached flags reflect trace level"""
+        debug.trace(4, f"test_enabled_at(): self={self}")
+        self.patch_trace_level(4)
+        assert THE_MODULE.enabled_at(4) or (not __debug__)
+        assert not THE_MODULE.enabled_at(5)
+        assert THE_MODULE.DETAILED_ENABLED or (not __debug__)
+        assert not THE_MODULE.VERBOSE_ENABLED
+        assert THE_MODULE.enabled_flags(6)["QUITE_DETAILED_ENABLED"]
+        assert not THE_MODULE.enabled_flags(6)["QUITE_VERBOSE_ENABLED"]
+
+    def test_trace_lazy(self):
+        """Ensure trace_lazy only invokes function when enabled"""
+        debug.trace(4, f"test_trace_lazy(): self={self}")
+        calls = []
+        def get_text():
+            """Return trace text, recording call"""
+            calls.append(1)
+            return "lazy text"
+        self.patch_trace_level(4)
+        THE_MODULE.trace_lazy(5, get_text)
+        assert not calls
+        THE_MODULE.trace_lazy(4, get_text)
+        assert ("lazy text" in self.get_stderr()) or (not __debug__)
+        assert (len(calls) == 1) or (not __debug__)
+
+    def test_trace_pct(self):
+        """Ensure trace_pct formats %-style when enabled"""
+        debug.trace(4, f"test_trace_pct(): self={self}")
+        self.patch_trace_level(4)
+        assert THE_MODULE.trace_pct(5, "x=%d", "not a number") == ""
+        THE_MODULE.trace_pct(4, "x=%d y=%r", 1, "b")
+        assert ("x=1 y='b'" in self.get_stderr()) or (not __debug__)
+
     def test_code(self):
         """Ensure code works as expected"""
         debug.trace(4, f"test_code(): self={self}")
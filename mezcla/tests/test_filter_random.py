@@ -77,6 +77,42 @@ class TestFilterRandom(TestWrapper):
         ## OLD: self.setUp()
         return self.run_data_file_test(1.0, self.temp_file, temp_file_contents)
 
+    def test_skip_sampling(self):
+        """Make sure skip sampling keeps subset of lines in order, with all for ratio 1.0"""
+        debug.trace(4, f"TestFilterRandom.test_skip_sampling({self})")
+        data = [f"line {i}" for i in range(1000)]
+        system.write_lines(self.temp_file, data)
+        output = self.run_script(options="--ratio 0.1 --quiet --seed 13 --skip-sampling",
+                                 data_file=self.temp_file).splitlines()
+        assert 50 < len(output) < 150
+        assert output == [line for line in data if line in output]
+        output = self.run_script(options="--ratio 1.0 --quiet --skip-sampling",
+                                 data_file=self.temp_file).splitlines()
+        assert output == data
+        output = self.run_script(options="--ratio 0.0 --quiet --skip-sampling --include-header",
+                                 data_file=self.temp_file).splitlines()
+        assert output == data[:1]
+
+    def test_block_input(self):
+        """Make sure block input mode gives same output as regular input (e.g., header line)"""
+        debug.trace(4, f"TestFilterRandom.test_block_input({self})")
+        data = [f"line {i}" for i in range(100)]
+        system.write_lines(self.temp_file, data)
+        for options in ["--ratio 0 --include-header", "--ratio 0.3 --seed 13 --include-header"]:
+            regular_output = self.run_script(options=f"{options} --quiet", data_file=self.temp_file)
+            block_output = self.run_script(options=f"{options} --quiet", data_file=self.temp_file,
+                                           env_options="BLOCK_INPUT=1")
+            assert regular_output.startswith(data[0])
+            assert block_output == regular_output
+
+    def test_find_nth_newline(self):
+        """Test find_nth_newline over small and large buffers"""
+        debug.trace(4, f"TestFilterRandom.test_find_nth_newline({self})")
+        assert THE_MODULE.find_nth_newline(b"a\nb\nc\n", 0, 2) == 3
+        assert THE_MODULE.find_nth_newline(b"a\nb\nc\n", 2, 1) == 3
+        buffer = b"line\n" * 10000
+        assert THE_MODULE.find_nth_newline(buffer, 0, 5000) == (5000 * 5 - 1)
+
 #------------------------------------------------------------------------
 
 if __name__ == '__main__':
@@ -22,7 +22,11 @@
 """Tests for html_utils module"""
 
 # Standard packages
+import functools
+import http.server
 import os
+import threading
+import time
 import urllib.request
 
 # Installed packages
@@ -120,6 +124,19 @@ def resolve_mezcla_url(filename):
     debug.trace(6, f"resolve_mezcla_url({filename!r}) => {url!r}")
     return url
 
+def start_local_server(directory):
+    """Start threaded HTTP server over DIRECTORY on free localhost port, returning (server, base_url)
+    Note: stand-in for remote sites; use server.shutdown() when done"""
+    handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=directory)
+    # note: keep-alive requires HTTP/1.1 (n.b., SimpleHTTPRequestHandler sends Content-Length)
+    handler.func.protocol_version = "HTTP/1.1"
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    debug.trace(5, f"start_local_server({directory!r}) => {base_url}")
+    return (server, base_url)
+
 #-------------------------------------------------------------------------------
 
 class TestHtmlUtils(TestWrapper):
@@ -549,6 +566,231 @@ class TestHtmlUtils(TestWrapper):
         debug.trace(4, "test_retrieve_web_document()")
         assert my_re.search("Scrappy.*Cito", THE_MODULE.retrieve_web_document(self.tomasohara_trade_like_url))
 
+    def test_download_web_documents(self):
+        """Ensure download_web_documents() saves concurrent downloads under download dir"""
+        debug.trace(4, "test_download_web_documents()")
+        server_dir = self.get_temp_dir()
+        for i in range(6):
+            system.write_file(gh.form_path(server_dir, f"doc{i}.html"), f"<p>document {i}</p>")
+        (server, base_url) = start_local_server(server_dir)
+        try:
+            download_dir = self.get_temp_dir()
+            urls = [f"{base_url}/doc{i}.html" for i in range(6)]
+            result = THE_MODULE.download_web_documents(urls, max_workers=4, per_host_limit=2,
+                                                       per_host_delay=0, download_dir=download_dir)
+            assert list(result.keys()) == urls
+            for i, url in enumerate(urls):
+                assert result[url].strip() == f"<p>document {i}</p>"
+                assert system.read_file(gh.form_path(download_dir, f"doc{i}.html")).strip() == f"<p>document {i}</p>"
+
+            # Make sure cached files used (i.e., server not needed)
+            server.shutdown()
+            cached = THE_MODULE.download_web_documents(urls[:2], per_host_delay=0, download_dir=download_dir,
+                                                       use_cached=True, ignore=True)
+            assert cached[urls[1]].strip() == "<p>document 1</p>"
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_pooled_sessions(self):
+        """Ensure pooled sessions don't keep cookies and are closed after download_web_documents"""
+        debug.trace(4, "test_pooled_sessions()")
+        #
+        class CookieHandler(http.server.BaseHTTPRequestHandler):
+            """Handler setting cookie and echoing cookie received"""
+            protocol_version = "HTTP/1.1"
+            def do_GET(self):
+                """Handle GET request"""
+                body = (self.headers.get("Cookie") or "no cookie").encode()
+                self.send_response(200)
+                self.send_header("Set-Cookie", "id=123; Path=/")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            def log_message(self, *_args):
+                """Omit logging"""
+        #
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), CookieHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        closed = []
+        self.monkeypatch.setattr(THE_MODULE.requests.Session, "close", lambda session: closed.append(session))
+        try:
+            for _i in range(2):
+                assert THE_MODULE.retrieve_web_document(f"{base_url}/a.html", post_download_sleep=0) == "no cookie"
+            urls = [f"{base_url}/doc{i}.html" for i in range(4)]
+            result = THE_MODULE.download_web_documents(urls, max_workers=2, per_host_delay=0,
+                                                       download_dir=self.get_temp_dir())
+            assert set(result.values()) == {"no cookie"}
+            assert 1 <= len(closed) <= 2
+            assert THE_MODULE.get_session() not in closed
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_download_cache_revalidation(self):
+        """Ensure stale cached downloads are revalidated via conditional GET"""
+        debug.trace(4, "test_download_cache_revalidation()")
+        self.monkeypatch.setattr(THE_MODULE, "DOWNLOAD_CACHE_TTL", 0)
+        self.monkeypatch.setattr(THE_MODULE, "POST_DOWNLOAD_SLEEP_SECONDS", 0)
+        server_dir = self.get_temp_dir()
+        doc_path = gh.form_path(server_dir, "page.html")
+        system.write_file(doc_path, "original")
+        (server, base_url) = start_local_server(server_dir)
+        try:
+            download_dir = self.get_temp_dir()
+            url = f"{base_url}/page.html"
+            meta_hash = {}
+            assert THE_MODULE.download_web_document(url, download_dir=download_dir, use_cached=True,
+                                                    meta_hash=meta_hash).strip() == "original"
+            assert meta_hash[THE_MODULE.STATUS_CODE] == 200
+            cache = THE_MODULE.get_download_cache(download_dir)
+            assert cache.lookup("page.html", url)["last_modified"]
+            # note: index saved periodically and at exit
+            THE_MODULE.flush_download_caches()
+            assert system.non_empty_file(gh.form_path(download_dir, THE_MODULE.CACHE_INDEX_FILENAME))
+
+            # Unchanged: server returns 304 (Not Modified) so local copy used
+            meta_hash = {}
+            assert THE_MODULE.download_web_document(url, download_dir=download_dir, use_cached=True,
+                                                    meta_hash=meta_hash).strip() == "original"
+            assert meta_hash[THE_MODULE.STATUS_CODE] == THE_MODULE.NOT_MODIFIED
+            info = THE_MODULE.download_cache_info(download_dir)
+            assert (info["hits"], info["misses"], info["revalidations"]) == (1, 1, 1)
+
+            # Changed: full download
+            system.write_file(doc_path, "revised")
+            mod_time = time.time() + 10
+            os.utime(doc_path, (mod_time, mod_time))
+            assert THE_MODULE.download_web_document(url, download_dir=download_dir, use_cached=True).strip() == "revised"
+            assert THE_MODULE.download_cache_info(download_dir)["misses"] == 2
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_download_cache_fallback(self):
+        """Ensure stale cached downloads are kept on failed revalidation and other URL's file not used"""
+        debug.trace(4, "test_download_cache_fallback()")
+        self.monkeypatch.setattr(THE_MODULE, "DOWNLOAD_CACHE_TTL", 0)
+        self.monkeypatch.setattr(THE_MODULE, "POST_DOWNLOAD_SLEEP_SECONDS", 0)
+        server_dir = self.get_temp_dir()
+        system.write_file(gh.form_path(server_dir, "page.html"), "top page")
+        gh.full_mkdir(gh.form_path(server_dir, "b"))
+        system.write_file(gh.form_path(server_dir, "b", "page.html"), "b page")
+        (server, base_url) = start_local_server(server_dir)
+        download_dir = self.get_temp_dir()
+        local_path = gh.form_path(download_dir, "page.html")
+        url = f"{base_url}/page.html"
+        try:
+            assert THE_MODULE.download_web_document(url, download_dir=download_dir, use_cached=True).strip() == "top page"
+
+            # Same basename but other URL: refetched rather than using cached file
+            other_url = f"{base_url}/b/page.html"
+            assert THE_MODULE.download_web_document(other_url, download_dir=download_dir, use_cached=True).strip() == "b page"
+            assert THE_MODULE.download_web_document(url, download_dir=download_dir, use_cached=True).strip() == "top page"
+
+            # Error status: stale copy used and not overwritten
+            gh.delete_existing_file(gh.form_path(server_dir, "page.html"))
+            assert THE_MODULE.download_web_document(url, download_dir=download_dir, use_cached=True).strip() == "top page"
+            assert system.read_file(local_path).strip() == "top page"
+
+            # Downloads without use_cached don't use the index (e.g., so not evicted)
+            plain_dir = self.get_temp_dir()
+            assert THE_MODULE.download_web_document(other_url, download_dir=plain_dir).strip() == "b page"
+            THE_MODULE.flush_download_caches()
+            assert not system.file_exists(gh.form_path(plain_dir, THE_MODULE.CACHE_INDEX_FILENAME))
+            assert "page.html" not in THE_MODULE.get_download_cache(plain_dir).index
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        # Server unavailable: stale copy used
+        assert THE_MODULE.download_web_document(url, download_dir=download_dir, use_cached=True,
+                                                ignore=True).strip() == "top page"
+        assert THE_MODULE.download_cache_info(download_dir)["stale_hits"] == 2
+
+    def test_download_cache_eviction(self):
+        """Ensure DownloadCache evicts least-recently used files over byte limit"""
+        debug.trace(4, "test_download_cache_eviction()")
+        download_dir = self.get_temp_dir()
+        cache = THE_MODULE.DownloadCache(download_dir, max_bytes=25, ttl=60, save_interval=3)
+        for name in ["a", "b", "c"]:
+            system.write_file(gh.form_path(download_dir, name), name * 9)
+            cache.record_fetch(name, f"http://example.com/{name}", {"ETag": f'"{name}"', "Cache-Control": "max-age=5"})
+            time.sleep(0.01)
+            if name == "b":
+                cache.record_hit("a")
+        assert sorted(cache.index.keys()) == ["a", "c"]
+        assert not system.file_exists(gh.form_path(download_dir, "b"))
+        assert cache.info()["evictions"] == 1
+        assert cache.info()["bytes"] == 20
+        assert cache.index["c"]["ttl"] == 5
+        assert cache.get_validators(cache.index["c"]) == {"If-None-Match": '"c"'}
+        assert cache.lookup("c", "http://example.com/other") is None
+
+        # Index saved every 3 updates and when flushed
+        assert cache.num_unsaved == 1
+        assert sorted(THE_MODULE.DownloadCache(download_dir).index.keys()) == ["a", "b"]
+        cache.flush()
+        assert sorted(THE_MODULE.DownloadCache(download_dir).index.keys()) == ["a", "c"]
+
+    def test_host_rate_limiter(self):
+        """Ensure HostRateLimiter spaces out requests to same host but not different hosts"""
+        debug.trace(4, "test_host_rate_limiter()")
+        limiter = THE_MODULE.HostRateLimiter(limit=1, delay=0.1)
+        start = time.monotonic()
+        for _i in range(3):
+            with limiter.throttle("example.com"):
+                pass
+        assert time.monotonic() - start >= 0.2
+        start = time.monotonic()
+        with limiter.throttle("other.example.com"):
+            pass
+        assert time.monotonic() - start < 0.1
+        assert THE_MODULE.get_url_host("WWW.Example.com:8080/index.html") == "www.example.com:8080"
+
+    def test_browser_pool(self):
+        """Ensure BrowserPool reuses browsers across URLs with LRU order and recycling"""
+        debug.trace(4, "test_browser_pool()")
+
+        class FakeBrowser:
+            """Minimal stand-in for selenium webdriver"""
+            def __init__(self, **_kwargs):
+                self.pages = []
+                self.alive = True
+            def get(self, url):
+                self.pages.append(url)
+            def execute_script(self, _script):
+                if not self.alive:
+                    raise RuntimeError("browser gone")
+                return 1
+            def close(self):
+                self.alive = False
+            def quit(self):
+                self.alive = False
+
+        pool = THE_MODULE.BrowserPool(max_size=2, max_pages=3, factory=FakeBrowser)
+        b1 = pool.acquire("u1")
+        b2 = pool.acquire("u2")
+        assert pool.get("u1") is b1
+        # note: u2 least recently used, so its browser gets reused
+        assert pool.acquire("u3") is b2
+        assert pool.get("u2") is None
+        assert len(pool) == 2 and pool.num_created == 2
+        assert pool.acquire("u4") is b1
+        assert pool.acquire("u5") is b2
+        assert pool.acquire("u6") is b1
+        # note: b2 is at page limit (u2, u3 and u5) so recycled
+        b3 = pool.acquire("u7")
+        assert b3 not in (b1, b2) and not b2.alive and pool.num_recycled == 1
+
+        # Unhealthy browsers discarded
+        b1.alive = False
+        assert pool.get("u6") is None
+        pool.clear()
+        assert len(pool) == 0 and not b3.alive
+
     def test_init_BeautifulSoup(self):
         """Ensure init_BeautifulSoup() works as expected"""
         debug.trace(4, "test_init_BeautifulSoup()")
@@ -265,6 +265,39 @@ class TestMain2:
         debug.trace_expr(5, main, num_lines)
         debug.trace(5, "out test_missing_newline")
 
+    def test_block_input(self, monkeypatch, tmp_path):
+        """Make sure block input gives same lines and paragraphs as regular input"""
+        debug.trace(4, f"in test_block_input(); self={self}")
+        contents = "1\r\n\n2 é\n\n\n3\n\n\n\n4"
+        input_file = tmp_path / "input.txt"
+        input_file.write_bytes(contents.encode("utf-8"))
+        # note: tiny blocks to exercise the line carry-over
+        monkeypatch.setattr(THE_MODULE, "BLOCK_INPUT_SIZE", 3)
+        batch_sizes = []
+        #
+        class Script(THE_MODULE.Main):
+            """Script collecting the processed lines"""
+            lines = []
+            def process_line(self, line):
+                self.lines.append((line, self.line_num, self.char_offset, self.raw_line))
+            def process_lines(self, batch):
+                batch_sizes.append(len(batch))
+                super().process_lines(batch)
+        #
+        for paragraph_mode in [False, True]:
+            results = []
+            for block_input in [False, True]:
+                app = Script(runtime_args=[str(input_file)], paragraph_mode=paragraph_mode,
+                             block_input=block_input)
+                app.lines = []
+                app.run()
+                results.append((app.lines, app.line_num, app.char_offset, app.raw_line))
+            debug.trace_expr(5, paragraph_mode, results)
+            assert results[0] == results[1]
+        assert len(batch_sizes) > 1
+        assert sum(batch_sizes) == len(contents.replace("\r", "").split("\n"))
+        debug.trace(5, "out test_block_input")
+
     def test_has_parsed_option_hack(self):
         """Make sure (temporarily hacked) has_parsed_option differs from has_parsed_option_old"""
         debug.trace(4, f"in test_has_parsed_option_hack(); self={self}")
@@ -3080,6 +3080,78 @@ class TestUsage(TestWrapper):
             "from mezcla import system\nsystem.get_args()",
             "import sys\nsys.argv")
 
+
+@pytest.mark.skipif(not THE_MODULE, reason="Unable to load module")
+class TestStripDebug(TestWrapper):
+    """Class for test usage of debug call stripping"""
+
+    script_module = TestWrapper.get_testing_module_name(__file__, THE_MODULE)
+
+    def helper_strip(self, input_code, **kwargs) -> str:
+        """Helper function for stripping debug calls from INPUT_CODE"""
+        debug.trace(4, f"TestStripDebug.helper_strip({input_code!r}, {kwargs}); self={self}")
+        result, _metrics = THE_MODULE.strip_debug(fix_indent(input_code), **kwargs)
+        return result
+
+    def test_strip_levels(self):
+        """Make sure only traces above max level are removed, along with unused import"""
+        debug.trace(5, f"TestStripDebug.test_strip_levels(); self={self}")
+        input_code = (
+            """
+            from mezcla import debug
+            def fubar(x):
+                debug.trace(debug.VERBOSE, f"fubar({x})")
+                debug.trace_expr(4, x)
+                return x
+            """)
+        expected_code = (
+            """
+            def fubar(x):
+                return x
+            """)
+        self.assertEqual(self.helper_strip(input_code, max_level=3).strip(),
+                         fix_indent(expected_code).strip())
+        result = self.helper_strip(input_code, max_level=4)
+        assert "debug.trace_expr(4, x)" in result
+        assert "debug.VERBOSE" not in result
+        assert "from mezcla import debug" in result
+
+    def test_strip_kept_calls(self):
+        """Make sure non-static levels and traces used as values are kept"""
+        debug.trace(5, f"TestStripDebug.test_strip_kept_calls(); self={self}")
+        input_code = (
+            """
+            from mezcla import debug as dbg
+            dbg.trace(BDL + 1, "unknown")
+            text = dbg.trace_fmt(6, "fubar")
+            if dbg.enabled_at(6):
+                dbg.trace(6, "guarded")
+            """)
+        expected_code = (
+            """
+            from mezcla import debug as dbg
+            dbg.trace(BDL + 1, "unknown")
+            text = dbg.trace_fmt(6, "fubar")
+            """)
+        self.assertEqual(self.helper_strip(input_code, max_level=2).strip(),
+                         fix_indent(expected_code).strip())
+
+    def test_strip_assertions(self):
+        """Make sure debug.assertion dropped or converted to assert"""
+        debug.trace(5, f"TestStripDebug.test_strip_assertions(); self={self}")
+        input_code = (
+            """
+            from mezcla import debug
+            debug.assertion(x > 0, message="x positive")
+            """)
+        self.assertEqual(self.helper_strip(input_code, assertions="drop").strip(), "")
+        self.assertEqual(self.helper_strip(input_code, assertions="assert").strip(),
+                         'assert x > 0, "x positive"')
+        self.assertEqual(self.helper_strip(input_code, assertions="keep").strip(),
+                         fix_indent(input_code).strip())
+        with pytest.raises(ValueError):
+            self.helper_strip(input_code, assertions="fubar")
+
 if __name__ == "__main__":
     debug.trace_current_context()
     invoke_tests(__file__)
@@ -12,7 +12,8 @@
 """Tests for randomize_lines module"""
 
 # Standard packages
-## NOTE: this is empty for now
+import os
+import random
 
 # Installed packages
 import pytest
@@ -46,6 +47,58 @@ class TestRandomizeLines(TestWrapper):
         self.do_assert(tpo.is_subset(random_lines, data))
         return
 
+    def test_header_percent(self):
+        """Make sure header retained and sample size exact in python engine"""
+        debug.trace(4, f"TestIt.test_header_percent(); self={self}")
+        data = ["header"] + [f"line {l}" for l in range(200)]
+        system.write_lines(self.temp_file, data)
+        output = self.run_script(options="--header --percent 5 --engine python", data_file=self.temp_file)
+        random_lines = output.splitlines()
+        self.do_assert(random_lines[0] == "header")
+        self.do_assert(len(random_lines) == 11)
+        self.do_assert(tpo.is_subset(random_lines[1:], data[1:]))
+        return
+
+    def test_reservoir_sample(self):
+        """Test reservoir_sample size and determinism"""
+        debug.trace(4, f"TestIt.test_reservoir_sample(); self={self}")
+        sample = THE_MODULE.reservoir_sample(range(1000), 10, random.Random(13))
+        self.do_assert(len(set(sample)) == 10)
+        self.do_assert(sample == THE_MODULE.reservoir_sample(range(1000), 10, random.Random(13)))
+        self.do_assert(sorted(THE_MODULE.reservoir_sample(range(5), 10, random.Random(13))) == list(range(5)))
+        return
+
+    def test_external_shuffle(self):
+        """Make sure external_shuffle produces deterministic permutation, including paragraph units"""
+        debug.trace(4, f"TestIt.test_external_shuffle(); self={self}")
+        units = [f"unit {n}" for n in range(95)] + ["multi\nline"]
+        shuffle1 = list(THE_MODULE.external_shuffle(units, random.Random(3), self.temp_file, chunk_size=10))
+        shuffle2 = list(THE_MODULE.external_shuffle(units, random.Random(3), self.temp_file, chunk_size=10))
+        self.do_assert(sorted(shuffle1) == sorted(units))
+        self.do_assert(shuffle1 == shuffle2)
+        self.do_assert(shuffle1 != units)
+        return
+
+    def test_external_shuffle_cleanup(self):
+        """Make sure run files removed if shuffle stopped early (e.g., broken pipe)"""
+        debug.trace(4, f"TestIt.test_external_shuffle_cleanup(); self={self}")
+        units = [f"unit {n}" for n in range(100)]
+        for num_workers in [1, 2]:
+            temp_dir = self.get_temp_dir()
+            temp_base = os.path.join(temp_dir, "shuffle")
+            shuffle = THE_MODULE.external_shuffle(units, random.Random(3), temp_base, chunk_size=10,
+                                                  num_workers=num_workers)
+            self.do_assert(next(shuffle) in units)
+            self.do_assert(len(os.listdir(temp_dir)) == 10)
+            shuffle.close()
+            self.do_assert(not os.listdir(temp_dir))
+            # note: single chunk shuffled in memory
+            shuffle = THE_MODULE.external_shuffle(units, random.Random(3), temp_base, chunk_size=1000,
+                                                  num_workers=num_workers)
+            self.do_assert(sorted(shuffle) == sorted(units))
+            self.do_assert(not os.listdir(temp_dir))
+        return
+
 
 if __name__ == '__main__':
     debug.trace_current_context()
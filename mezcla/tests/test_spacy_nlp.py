@@ -141,6 +141,72 @@ class TestSpacy(TestWrapper):
         self.do_assert(sent_start_info[-5:] == ["False", "True", "True", "is_sent_start", "is_sent_start"])
         return
 
+    @pytest.mark.xfail
+    def test_batched_output(self):
+        """Make sure output via batched nlp.pipe matches line-by-line processing"""
+        debug.trace(4, f"TestIt.test_batched_output(); self={self}")
+        data = ["It came, it saw, it conquered.", "", "The food", "was bland.", "", "Paris is in France."]
+        system.write_lines(self.temp_file, data)
+        regular_output = self.run_script(options="--run-ner --analyze-sentiment", data_file=self.temp_file)
+        batched_output = self.run_script(options="--run-ner --analyze-sentiment --batch-size 2", data_file=self.temp_file)
+        self.do_assert(my_re.search(r"GPE:Paris", regular_output))
+        self.do_assert(batched_output == regular_output)
+        return
+
+    def test_batched_processing(self):
+        """Make sure batched lines are output in order with their location info (n.b., no Spacy needed)"""
+        debug.trace(4, f"TestIt.test_batched_processing(); self={self}")
+
+        class StandInNLP:
+            """Stand-in for Spacy pipeline, with documents as uppercase text"""
+            def __init__(self):
+                self.pipe_calls = []
+            def __call__(self, text):
+                return text.upper()
+            def pipe(self, texts, batch_size=None, n_process=None):
+                """Process TEXTS lazily, recording the batch arguments"""
+                texts = list(texts)
+                self.pipe_calls.append((len(texts), batch_size, n_process))
+                return (self(text) for text in texts)
+
+        class TestScript(THE_MODULE.Script):
+            """Script outputting location and document for each line"""
+            def process_doc(self, line):
+                print(f"Pg{self.page_num}:L{self.line_num}:{line}:{self.doc}")
+
+        def run_lines(batch_size):
+            """Process the lines via BATCH_SIZE, returning output and stand-in pipeline"""
+            script = TestScript(skip_input=True, manual_input=True, auto_help=False, runtime_args=[])
+            script.nlp = StandInNLP()
+            script.batch_size = batch_size
+            script.num_processes = 1
+            script.pending = []
+            self.get_stdout()
+            for (i, line) in enumerate(lines):
+                script.line_num = (i + 1)
+                script.page_num = (1 + i // 5)
+                script.process_line(line)
+            script.line_num = script.page_num = -1
+            script.wrap_up()
+            self.do_assert((script.line_num, script.page_num) == (-1, -1))
+            return (self.get_stdout(), script.nlp)
+
+        lines = [f"line {i}" for i in range(1, 12)]
+        expected = "".join(f"Pg{1 + i // 5}:L{i + 1}:{line}:{line.upper()}\n"
+                           for (i, line) in enumerate(lines))
+        regular_output, regular_nlp = run_lines(0)
+        batched_output, batched_nlp = run_lines(2)
+        self.do_assert(regular_output == expected)
+        self.do_assert(batched_output == expected)
+        self.do_assert(not regular_nlp.pipe_calls)
+        # note: lines are buffered for batch_size * num_processes * SPACY_BUFFER_BATCHES
+        buffer_size = (2 * THE_MODULE.SPACY_BUFFER_BATCHES)
+        num_full = (len(lines) // buffer_size)
+        expected_calls = ([(buffer_size, 2, 1)] * num_full
+                          + [(len(lines) - num_full * buffer_size, 2, 1)])
+        self.do_assert(batched_nlp.pipe_calls == expected_calls)
+        return
+
     @pytest.mark.xfail
     def test_chunker(self):
         """Test NP chunking"""
@@ -11,8 +11,11 @@
 
 # Standard packages
 ## OLD: import random
+import threading
+import time
 
 # Installed packages
+import numpy
 import pytest
 
 # Local packages
@@ -240,6 +243,163 @@ class TestTextCategorizerScript(TestWrapper):
                 num_ok += 1
         debug.trace_expr(4, num_ok)
         assert(num_ok >= num_to_test // 2)
+
+    def train_toy_model(self):
+        """Train categorizer over small synthetic data, returning (categorizer, test texts)"""
+        data = []
+        for i in range(10):
+            data.append(f"sports\tthe team won the game by {i} points")
+            data.append(f"weather\tthe rain and wind will last {i} days")
+        system.write_lines(self.temp_file, data)
+        tc = THE_MODULE.TextCategorizer(use_xgb=False)
+        tc.train(self.temp_file)
+        texts = ["game points", "rain", "wind days", "team won", "the", "unseen words"] * 3
+        return (tc, texts)
+
+    def test_prediction_batcher(self):
+        """Make sure batched predictions from concurrent requests match per-text ones"""
+        debug.trace(4, "test_prediction_batcher()")
+        (tc, texts) = self.train_toy_model()
+        expected_cats = [tc.categorize(text) for text in texts]
+        expected_probs = [tc.class_probabilities(text) for text in texts]
+        assert tc.categorize_list(texts) == expected_cats
+        assert tc.class_probabilities_list(texts) == expected_probs
+
+        batcher = THE_MODULE.PredictionBatcher(tc, max_size=8, max_wait=0.05)
+        actual_cats = [None] * len(texts)
+        actual_probs = [None] * len(texts)
+        def request(i):
+            actual_cats[i] = batcher.categorize(texts[i])
+            actual_probs[i] = batcher.class_probabilities(texts[i])
+        threads = [threading.Thread(target=request, args=(i,)) for i in range(len(texts))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert actual_cats == expected_cats
+        assert actual_probs == expected_probs
+        assert batcher.num_items == 2 * len(texts)
+        assert batcher.num_batches < batcher.num_items
+
+        # Check batch endpoint (n.b., invoked directly)
+        model_file = self.temp_file + ".model"
+        tc.save(model_file)
+        wc = THE_MODULE.web_controller(model_file)
+        assert wc.batch(texts=texts) == expected_cats
+        assert wc.batch(texts=texts, probs="1") == expected_probs
+        assert wc.categorize(texts[0]) == expected_cats[0]
+
+    def test_mapped_model(self):
+        """Make sure memory-mapped model format gives same results as pickled pipeline"""
+        debug.trace(4, "test_mapped_model()")
+        (tc, texts) = self.train_toy_model()
+        texts = texts + ["", "won won won rain"]
+        model_file = self.temp_file + THE_MODULE.MAPPED_MODEL_EXT
+        tc.save(model_file)
+        mapped_tc = THE_MODULE.TextCategorizer()
+        mapped_tc.load(model_file)
+        vectorizer = mapped_tc.classifier[THE_MODULE.TFIDF]
+        assert isinstance(vectorizer, THE_MODULE.MappedTfidfVectorizer)
+        assert isinstance(vectorizer.data, numpy.memmap)
+        assert mapped_tc.keys == tc.keys
+        assert (vectorizer.transform(texts) != tc.classifier[THE_MODULE.TFIDF].transform(texts)).nnz == 0
+        assert mapped_tc.categorize_list(texts) == tc.categorize_list(texts)
+        assert mapped_tc.class_probabilities_list(texts) == tc.class_probabilities_list(texts)
+        assert list(vectorizer.get_feature_names_out()) == list(tc.classifier[THE_MODULE.TFIDF].get_feature_names_out())
+
+    def test_mapped_vectorizer_terms(self):
+        """Make sure mapped vocabulary is compact and exact given hash collisions"""
+        debug.trace(4, "test_mapped_vectorizer_terms()")
+        texts = ["short words here", "more short words", "x" * 1000 + " words"]
+        original = THE_MODULE.TfidfVectorizer().fit(texts)
+        mapped = THE_MODULE.MappedTfidfVectorizer.from_vectorizer(original)
+        # note: terms not padded to the longest one
+        assert mapped.data.nbytes == sum(len(term) for term in original.vocabulary_)
+        # note: coarse hash so that most terms collide
+        self.monkeypatch.setattr(THE_MODULE, "term_hash", lambda term_bytes: (len(term_bytes) % 3))
+        mapped = THE_MODULE.MappedTfidfVectorizer.from_vectorizer(original)
+        new_texts = texts + ["words more or less", "shorts here xx"]
+        assert (mapped.transform(new_texts) != original.transform(new_texts)).nnz == 0
+
+    def test_prediction_cache(self):
+        """Make sure cached predictions match, with normalization, bounds and invalidation"""
+        debug.trace(4, "test_prediction_cache()")
+        (tc, texts) = self.train_toy_model()
+        expected_cats = tc.categorize_list(texts)
+        expected_probs = tc.class_probabilities_list(texts)
+        tc.cache = THE_MODULE.PredictionCache(max_entries=100, ttl=0)
+        tc.reset_cache()
+        assert tc.categorize_list(texts) == expected_cats
+        assert [tc.categorize(text) for text in texts] == expected_cats
+        assert tc.class_probabilities_list(texts) == expected_probs
+        assert [tc.class_probabilities(text) for text in texts] == expected_probs
+        info = tc.cache.info()
+        num_unique = len(set(texts))
+        assert info["entries"] == 2 * num_unique
+        # note: duplicates within batch are misses but predicted once
+        assert info["misses"] == 2 * len(texts)
+        assert info["hits"] == 2 * len(texts)
+        # note: word tokens are lowercased and independent of spacing
+        assert tc.lookup_cached(THE_MODULE.CATEGORY_KIND, "  GAME\tpoints ") == (True, tc.categorize("game points"))
+
+        # Check before prediction (as in web_controller) only counts miss once
+        num_misses = tc.cache.info()["misses"]
+        assert tc.lookup_cached(THE_MODULE.CATEGORY_KIND, "new text", count_miss=False) == (False, None)
+        tc.categorize_list(["new text"])
+        assert tc.cache.info()["misses"] == (num_misses + 1)
+
+        # Loading model invalidates cache
+        model_file = self.temp_file + ".model"
+        tc.save(model_file)
+        tc.load(model_file)
+        assert tc.cache.info()["entries"] == 0
+        assert tc.categorize_list(texts) == expected_cats
+
+        # Check stats via web controller (n.b., invoked directly)
+        wc = THE_MODULE.web_controller(model_file)
+        if not wc.text_cat.cache:
+            assert wc.cache_stats() == {"enabled": False}
+            wc.text_cat.cache = THE_MODULE.PredictionCache()
+            wc.text_cat.reset_cache()
+        assert wc.categorize(texts[0]) == wc.categorize(texts[0]) == expected_cats[0]
+        assert wc.cache_stats()["hits"] == 1
+
+        # Check bounds, TTL and stale generation
+        cache = THE_MODULE.PredictionCache(max_entries=3, max_bytes=10000, ttl=0)
+        for i in range(5):
+            cache.put(i, f"value{i}")
+        assert list(cache.entries) == [2, 3, 4] and cache.evictions == 2
+        cache = THE_MODULE.PredictionCache(max_entries=100, max_bytes=(3 * cache.ENTRY_OVERHEAD + 200), ttl=0)
+        for i in range(5):
+            cache.put(i, f"value{i}")
+        assert len(cache.entries) < 5 and cache.num_bytes <= cache.max_bytes
+        cache = THE_MODULE.PredictionCache(ttl=0.01)
+        cache.put("k", "v")
+        generation = cache.generation
+        cache.clear()
+        cache.put("stale", "v", generation)
+        assert cache.get("stale") == (False, None)
+        cache.put("k", "v")
+        assert cache.get("k") == (True, "v")
+        time.sleep(0.02)
+        assert cache.get("k") == (False, None)
+
+    def test_categorize_many(self):
+        """Make sure bulk scoring (including via process pool and files) matches per-text results"""
+        debug.trace(4, "test_categorize_many()")
+        (tc, texts) = self.train_toy_model()
+        expected_cats = [tc.categorize(text) for text in texts]
+        assert list(tc.categorize_many(iter(texts), batch_size=4)) == expected_cats
+        assert list(tc.categorize_many(texts, batch_size=4, n_jobs=2)) == expected_cats
+        expected_probs = [tc.class_probabilities(text) for text in texts]
+        assert list(tc.categorize_many(texts, batch_size=5, probs=True)) == expected_probs
+
+        # Score file, which retains original lines
+        input_file = self.temp_file + ".input.tsv"
+        output_file = self.temp_file + ".output.tsv"
+        system.write_lines(input_file, [f"{i}\t{text}" for (i, text) in enumerate(texts)])
+        assert tc.score_file(input_file, output_file, batch_size=4, n_jobs=2) == len(texts)
+        assert system.read_lines(output_file) == [f"{cat}\t{i}\t{text}" for (i, (cat, text)) in enumerate(zip(expected_cats, texts))]
         
 
 #------------------------------------------------------------------------
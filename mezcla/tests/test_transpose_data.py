@@ -10,7 +10,9 @@
 """Tests for transpose_data module"""
 
 # Standard packages
+import io
 import re
+import sys
 
 # Installed packages
 import pytest
@@ -92,6 +94,32 @@ class TestTransposeData(TestWrapper):
         self.do_assert(not my_re.search(r"v1.*v2", output.strip()))
         return
 
+    @trap_exception
+    def test_spilled_columns(self):
+        """Make sure output same when column data is spilled to disk"""
+        debug.trace(4, f"TestIt.test_spilled_columns(); self={self}")
+        data = ["H1\tH2\tH3"] + [f"v{i}\tw{i % 3}\tx\"y" for i in range(100)]
+        system.write_lines(self.temp_file, data)
+        output = self.run_script(options="--elide", data_file=self.temp_file)
+        spilled_output = self.run_script(options="--elide --memory-budget 50", data_file=self.temp_file)
+        self.do_assert(my_re.search(r"^H2\tw0\tw1\tw2\tw0", output, re.MULTILINE))
+        self.do_assert(my_re.search(r"^H3\tx\"y\t\.\t\.", output, re.MULTILINE))
+        self.do_assert(output == spilled_output)
+        return
+
+    @trap_exception
+    def test_column_striper(self):
+        """Test ColumnStriper directly with a small budget"""
+        debug.trace(4, f"TestIt.test_column_striper(); self={self}")
+        striper = THE_MODULE.ColumnStriper(2, "|", memory_budget=5)
+        for i in range(4):
+            striper.add_row([f"a{i}", f"b\u00e9{i}"])
+        self.do_assert(len(striper.block_offsets) > 1)
+        self.monkeypatch.setattr("sys.stdout", io.StringIO())
+        striper.output(["A", "B"])
+        self.do_assert(sys.stdout.getvalue() == "A|a0|a1|a2|a3\nB|b\u00e90|b\u00e91|b\u00e92|b\u00e93\n")
+        return
+
 if __name__ == '__main__':
     debug.trace_current_context()
     invoke_tests(__file__)
@@ -13,11 +13,11 @@
 # - See https://en.wikipedia.org/wiki/Evaluation_of_binary_classifiers#Single_metrics.
 # - Also see https://en.wikipedia.org/wiki/Accuracy_and_precision.
 # - Keep changes in sync with text_categorizer.py (e.g., XGBoost and GPU options).
+# - Categorization results can be cached (see PREDICTION_CACHE), which is cleared when models are loaded.
 # - CherryPy Web server based on following tutorial
 #     https://simpletutorials.com/c/2165/How%20to%20Create%20a%20Simple%20JSON%20Service%20with%20CherryPy
 #
 # TODO:
-# - Maintain cache of categorization results.
 # - Review categorization code and add examples for clarification of parameters.
 # - Fix SHOW_REPORT option for training.
 # - Put web server in separate module.
@@ -26,17 +26,25 @@
 """Text categorization support"""
 
 # Standard packages
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
 import json
-from itertools import zip_longest
+from itertools import islice, tee, zip_longest
 import os
+import queue
 import re
 import sys
+import threading
+import time
 
 # Installed packages
 import cherrypy
+import joblib
 import numpy
 import pandas
-from sklearn.base import BaseEstimator, ClassifierMixin
+from scipy import sparse
+from sklearn.base import BaseEstimator, ClassifierMixin, TransformerMixin
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.feature_extraction.text import _document_frequency
 from sklearn.naive_bayes import MultinomialNB
@@ -44,6 +52,7 @@ from sklearn.linear_model import SGDClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.svm import SVC
 from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import normalize
 from sklearn import metrics
 from sklearn.utils.multiclass import unique_labels
 
@@ -63,6 +72,8 @@ from mezcla.html_utils import format_html_message
 
 CLF = "clf"
 TFIDF = "tfidf"
+CATEGORY_KIND = "category"
+PROBS_KIND = "probs"
 SERVER_PORT = system.getenv_integer("SERVER_PORT", 9010,
                                     "TCP port for web interface")
 OUTPUT_BAD = system.getenv_bool("OUTPUT_BAD", False)
@@ -80,6 +91,27 @@ ENCODE_CLASSES = getenv_bool("ENCODE_CLASSES", not RETAIN_LABELS,
                              "Encode classes using enumeration")
 TRACE_IMPORTANCES = getenv_bool("TRACE_IMPORTANCES", False,
                                 "Trace feature importances")
+SCORING_BATCH_SIZE = getenv_int("SCORING_BATCH_SIZE", 1000,
+                                "Number of texts vectorized at once for bulk scoring")
+SCORING_JOBS = getenv_int("SCORING_JOBS", 1,
+                          "Number of processes for bulk scoring (-1 for all CPUs)")
+MAPPED_MODEL = getenv_bool("MAPPED_MODEL", False,
+                           "Save models in memory-mappable joblib format (see save_mapped)")
+MAPPED_MODEL_EXT = ".joblib"
+PREDICTION_CACHE = getenv_bool("PREDICTION_CACHE", False,
+                               "Cache categorization results by normalized text")
+PREDICTION_CACHE_SIZE = getenv_int("PREDICTION_CACHE_SIZE", 100000,
+                                   "Maximum number of cached predictions")
+PREDICTION_CACHE_BYTES = getenv_int("PREDICTION_CACHE_BYTES", 64 * 1024 * 1024,
+                                    "Maximum approximate bytes for cached predictions")
+PREDICTION_CACHE_TTL = getenv_float("PREDICTION_CACHE_TTL", 3600,
+                                    "Seconds before cached predictions expire (0 for never)")
+MICRO_BATCHING = getenv_bool("MICRO_BATCHING", True,
+                             "Coalesce concurrent web requests into batched predictions")
+MICRO_BATCH_SIZE = getenv_int("MICRO_BATCH_SIZE", 64,
+                              "Maximum number of requests per prediction batch")
+MICRO_BATCH_WAIT_MS = getenv_float("MICRO_BATCH_WAIT_MS", 5,
+                                   "Milliseconds to wait for other requests to batch")
 
 # Options for Support Vector Machines (SVM)
 #
@@ -207,6 +239,17 @@ def read_categorization_data(filename):
     return (labels, values)
 
 
+def iterate_chunks(items, size):
+    """Generator over lists of up to SIZE ITEMS (from any iterable)"""
+    # EX: list(iterate_chunks(range(5), 2)) => [[0, 1], [2, 3], [4]]
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            break
+        yield chunk
+
+
 def int_if_whole(num):
     """Return integral type if NUM is a whole number"""
     # EX: int_if_whole(2.0) => 2
@@ -334,6 +377,229 @@ class ClassifierWrapper(BaseEstimator, ClassifierMixin):
 
 #...............................................................................
 
+class PredictionCache:
+    """Thread-safe LRU cache for categorization results, bounded by entry count and approximate
+    size in bytes, with optional TTL. Entries put with an old generation (i.e., prior to clear) are ignored."""
+    # note: rough per-entry overhead for key tuple, digest, and list
+    ENTRY_OVERHEAD = 200
+
+    def __init__(self, max_entries=None, max_bytes=None, ttl=None):
+        """Class constructor (defaults from PREDICTION_CACHE_SIZE, PREDICTION_CACHE_BYTES and PREDICTION_CACHE_TTL)"""
+        self.max_entries = param_or_default(max_entries, PREDICTION_CACHE_SIZE)
+        self.max_bytes = param_or_default(max_bytes, PREDICTION_CACHE_BYTES)
+        self.ttl = param_or_default(ttl, PREDICTION_CACHE_TTL)
+        self.entries = OrderedDict()
+        self.num_bytes = 0
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __getstate__(self):
+        """Omit lock and entries from pickled state (e.g., for process pools)"""
+        state = self.__dict__.copy()
+        del state["lock"]
+        state["entries"] = OrderedDict()
+        state["num_bytes"] = 0
+        return state
+
+    def __setstate__(self, state):
+        """Restore from pickled STATE"""
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def get(self, key, count_miss=True):
+        """Return (found, value) for KEY
+        Note: Misses are not counted unless COUNT_MISS (e.g., if counted in subsequent lookup)"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if (entry is not None) and self.ttl and (time.monotonic() > entry[1]):
+                self.remove(key)
+                entry = None
+            if entry is None:
+                if count_miss:
+                    self.misses += 1
+                return (False, None)
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return (True, entry[0])
+
+    def put(self, key, value, generation=None):
+        """Cache VALUE for KEY, unless GENERATION is out of date"""
+        size = (self.ENTRY_OVERHEAD + sys.getsizeof(value))
+        with self.lock:
+            if (generation is not None) and (generation != self.generation):
+                return
+            if key in self.entries:
+                self.remove(key)
+            self.entries[key] = [value, (time.monotonic() + self.ttl), size]
+            self.num_bytes += size
+            while self.entries and ((len(self.entries) > self.max_entries) or (self.num_bytes > self.max_bytes)):
+                self.remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def remove(self, key):
+        """Remove KEY entry (n.b., lock should be held)"""
+        self.num_bytes -= self.entries.pop(key)[2]
+
+    def clear(self):
+        """Remove all entries and start new generation"""
+        with self.lock:
+            self.entries.clear()
+            self.num_bytes = 0
+            self.generation += 1
+
+    def info(self):
+        """Return dict with cache statistics"""
+        with self.lock:
+            num_lookups = (self.hits + self.misses)
+            return {"entries": len(self.entries), "bytes": self.num_bytes,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "hit_rate": (self.hits / num_lookups if num_lookups else 0.0),
+                    "generation": self.generation}
+
+#...............................................................................
+
+def term_hash(term_bytes):
+    """Return stable 64-bit hash for TERM_BYTES (i.e., unlike hash)"""
+    return int.from_bytes(hashlib.blake2b(term_bytes, digest_size=8).digest(), "little")
+
+
+def encode_terms(terms):
+    """Return (hashes, offsets, data) arrays for TERMS encoded as UTF-8"""
+    encoded = [term.encode("utf-8") for term in terms]
+    hashes = numpy.array([term_hash(term) for term in encoded], dtype=numpy.uint64)
+    offsets = numpy.zeros(len(encoded) + 1, dtype=numpy.int64)
+    numpy.cumsum([len(term) for term in encoded], out=offsets[1:])
+    data = numpy.frombuffer(b"".join(encoded), dtype=numpy.uint8)
+    return (hashes, offsets, data)
+
+
+def equal_terms(offsets1, data1, positions1, offsets2, data2, positions2):
+    """Whether terms at POSITIONS1 in (OFFSETS1, DATA1) equal those at POSITIONS2 in (OFFSETS2, DATA2),
+    with the bytes compared in bulk"""
+    starts1 = offsets1[positions1]
+    starts2 = offsets2[positions2]
+    lengths = (offsets1[positions1 + 1] - starts1)
+    result = (lengths == (offsets2[positions2 + 1] - starts2))
+    # note: compares bytes for same-length pairs, with mismatches counted per pair
+    pairs = numpy.flatnonzero(result & (lengths > 0))
+    if len(pairs):
+        pair_lengths = lengths[pairs]
+        pair_ids = numpy.repeat(numpy.arange(len(pairs)), pair_lengths)
+        within = (numpy.arange(pair_lengths.sum()) - numpy.repeat(numpy.cumsum(pair_lengths) - pair_lengths, pair_lengths))
+        differs = (data1[starts1[pairs][pair_ids] + within] != data2[starts2[pairs][pair_ids] + within])
+        result[pairs] = (numpy.bincount(pair_ids, weights=differs, minlength=len(pairs)) == 0)
+    return result
+
+
+class MappedTfidfVectorizer(BaseEstimator, TransformerMixin):
+    """Read-only replacement for fitted TfidfVectorizer, with vocabulary as arrays
+    instead of dict so that it can be memory mapped (see TextCategorizer.save_mapped).
+    Notes:
+    - The terms are a UTF-8 blob with offsets (i.e., not padded to the longest term),
+      sorted by 64-bit hash for vectorized search.
+    - Hash matches are checked against the term bytes, so the results are the same as the original."""
+
+    def __init__(self, params=None, hashes=None, offsets=None, data=None, indices=None, idf=None):
+        """Constructor: records TfidfVectorizer PARAMS, sorted term HASHES, term OFFSETS into UTF-8 DATA,
+        feature INDICES for terms and IDF weights"""
+        debug.trace_fmt(6, "{cl}.__init__()", cl=str(type(self)))
+        self.params = params
+        self.hashes = hashes
+        self.offsets = offsets
+        self.data = data
+        self.indices = indices
+        self.idf = idf
+        self.analyzer_fn = None
+
+    @classmethod
+    def from_vectorizer(cls, vectorizer):
+        """Create from fitted TfidfVectorizer"""
+        vocabulary = vectorizer.vocabulary_
+        terms = sorted(vocabulary, key=lambda term: term_hash(term.encode("utf-8")))
+        (hashes, offsets, data) = encode_terms(terms)
+        indices = numpy.array([vocabulary[term] for term in terms], dtype=numpy.int64)
+        params = {k: v for (k, v) in vectorizer.get_params().items() if k != "vocabulary"}
+        idf = (vectorizer.idf_ if vectorizer.use_idf else None)
+        return cls(params=params, hashes=hashes, offsets=offsets, data=data, indices=indices, idf=idf)
+
+    @property
+    def num_terms(self):
+        """Size of vocabulary"""
+        return len(self.indices)
+
+    def term(self, position):
+        """Return term at POSITION in sorted order"""
+        return self.data[self.offsets[position]: self.offsets[position + 1]].tobytes().decode("utf-8")
+
+    def lookup(self, tokens):
+        """Return (token positions, feature indices) for TOKENS in vocabulary"""
+        (hashes, offsets, data) = encode_terms(tokens)
+        matches = numpy.full(len(tokens), -1, dtype=numpy.int64)
+        token_positions = numpy.arange(len(tokens))
+        positions = numpy.searchsorted(self.hashes, hashes)
+        # note: checks terms with same hash until bytes match (i.e., normally just one)
+        while len(token_positions):
+            keep = (positions < self.num_terms)
+            keep[keep] = (self.hashes[positions[keep]] == hashes[token_positions[keep]])
+            token_positions = token_positions[keep]
+            positions = positions[keep]
+            same_term = equal_terms(self.offsets, self.data, positions, offsets, data, token_positions)
+            matches[token_positions[same_term]] = positions[same_term]
+            token_positions = token_positions[~same_term]
+            positions = (positions[~same_term] + 1)
+        token_positions = numpy.flatnonzero(matches >= 0)
+        return (token_positions, self.indices[matches[token_positions]])
+
+    def __getstate__(self):
+        """Omit cached analyzer from pickled state"""
+        state = self.__dict__.copy()
+        state["analyzer_fn"] = None
+        return state
+
+    def fit(self, _x, _y=None):
+        """Not supported: retrain with TfidfVectorizer"""
+        raise NotImplementedError("MappedTfidfVectorizer is read-only")
+
+    def __sklearn_is_fitted__(self):
+        """Always fitted"""
+        return True
+
+    def get_feature_names_out(self, _input_features=None):
+        """Return feature names in index order"""
+        names = numpy.empty(self.num_terms, dtype=object)
+        names[self.indices] = [self.term(i) for i in range(self.num_terms)]
+        return names
+
+    def transform(self, raw_documents):
+        """Return TF/IDF matrix for RAW_DOCUMENTS, as with TfidfVectorizer.transform"""
+        if self.analyzer_fn is None:
+            self.analyzer_fn = TfidfVectorizer(**self.params).build_analyzer()
+        doc_tokens = [self.analyzer_fn(doc) for doc in raw_documents]
+        lengths = numpy.array([len(tokens) for tokens in doc_tokens], dtype=numpy.int64)
+        tokens = [token for tokens in doc_tokens for token in tokens]
+        rows = numpy.repeat(numpy.arange(len(doc_tokens)), lengths)
+        (token_positions, cols) = self.lookup(tokens)
+        rows = rows[token_positions]
+        dtype = self.params.get("dtype", numpy.float64)
+        x = sparse.csr_matrix((numpy.ones(len(rows), dtype=dtype), (rows, cols)),
+                              shape=(len(doc_tokens), self.num_terms), dtype=dtype)
+        x.sum_duplicates()
+        if self.params.get("binary"):
+            x.data[:] = 1
+        if self.params.get("sublinear_tf"):
+            numpy.log(x.data, x.data)
+            x.data += 1.0
+        if self.idf is not None:
+            x.data *= self.idf[x.indices]
+        if self.params.get("norm"):
+            x = normalize(x, norm=self.params["norm"], copy=False)
+        return x
+
+#...............................................................................
+
 class TextCategorizer:
     """Class for building text categorization"""
     # TODO: add cross-fold validation support; make TF/IDF weighting optional
@@ -353,6 +619,9 @@ class TextCategorizer:
         #
         self.keys = []
         self.classifier = None
+        self.cache = (PredictionCache() if PREDICTION_CACHE else None)
+        self.normalize_whitespace = False
+        self.normalize_case = False
         classifier = None
         if use_xgb is None:
             use_xgb = USE_XGB
@@ -446,9 +715,64 @@ class TextCategorizer:
             label_indices = [self.keys.index(l) for l in labels]
             label_values = label_indices
         self.classifier = self.cat_pipeline.fit(values, label_values)
+        self.reset_cache()
         debug.trace_object(7, self, "TextCategorizer")
         return
 
+    def reset_cache(self):
+        """Invalidate cached predictions (e.g., after new model loaded), and determine safe text normalization for cache keys"""
+        if self.cache is None:
+            return
+        self.cache.clear()
+        self.normalize_whitespace = self.normalize_case = False
+        try:
+            vectorizer = self.classifier[TFIDF]
+            params = (vectorizer.params if isinstance(vectorizer, MappedTfidfVectorizer) else vectorizer.get_params())
+            # note: word tokens don't depend on spacing (unless custom processing)
+            custom = any(params.get(p) for p in ["preprocessor", "tokenizer"]) or callable(params.get("analyzer"))
+            self.normalize_whitespace = (params.get("analyzer") == "word") and not custom
+            self.normalize_case = bool(params.get("lowercase")) and not custom
+        except:
+            debug.trace_exception(5, "reset_cache")
+        debug.trace(5, f"reset_cache(): whitespace={self.normalize_whitespace} case={self.normalize_case}")
+
+    def cache_key(self, kind, text):
+        """Return prediction cache key for KIND of prediction over TEXT, using hash of normalized text"""
+        if self.normalize_whitespace:
+            text = " ".join(text.split())
+        if self.normalize_case:
+            text = text.lower()
+        return (kind, hashlib.blake2b(text.encode("utf-8", errors="surrogatepass"), digest_size=16).digest())
+
+    def lookup_cached(self, kind, text, count_miss=True):
+        """Return (found, result) for KIND of prediction for TEXT from cache (see cache_key)
+        Note: COUNT_MISS should be False if the prediction is done via cached_predictions upon miss."""
+        if self.cache is None:
+            return (False, None)
+        return self.cache.get(self.cache_key(kind, text), count_miss=count_miss)
+
+    def cached_predictions(self, kind, texts, predict_fn):
+        """Return PREDICT_FN over TEXTS, using the cache for KIND of predictions if enabled"""
+        if self.cache is None:
+            return predict_fn(texts)
+        generation = self.cache.generation
+        keys = [self.cache_key(kind, text) for text in texts]
+        results = [None] * len(texts)
+        # note: maps key of uncached text to positions (i.e., to predict duplicates once)
+        missing = {}
+        for (i, key) in enumerate(keys):
+            (found, results[i]) = self.cache.get(key)
+            if not found:
+                missing.setdefault(key, []).append(i)
+        if missing:
+            positions = list(missing.values())
+            for (indices, result) in zip(positions, predict_fn([texts[indices[0]] for indices in positions])):
+                for i in indices:
+                    results[i] = result
+                if result is not None:
+                    self.cache.put(keys[indices[0]], result, generation)
+        return results
+
     def test(self, filename, report=False, stream=sys.stdout):
         """Test classifier over tabular data from FILENAME with label and text, returning accuracy. Optionally, a detailed performance REPORT is output to STREAM."""
         debug.trace_fmtd(4, "tc.test({f})", f=filename)
@@ -529,8 +853,101 @@ class TextCategorizer:
             debug.trace_fmt(4, "Result ({f}):\n{r}", f=bad_filename, r=system.read_file(bad_filename))
         return accuracy
 
+    def categorize_list(self, texts):
+        """Return list of categories for TEXTS, using single vectorized prediction
+        Note: falls back to categorize per text if the batch fails (e.g., to isolate bad input)"""
+        debug.trace(4, f"tc.categorize_list(_); len={len(texts)}")
+        if self.cache is not None:
+            return self.cached_predictions(CATEGORY_KIND, texts, self.uncached_categorize_list)
+        return self.uncached_categorize_list(texts)
+
+    def uncached_categorize_list(self, texts):
+        """Version of categorize_list without caching"""
+        labels = None
+        try:
+            labels = [self.keys[index] for index in self.classifier.predict(texts)]
+        except:
+            debug.trace_exception(4, "categorize_list")
+            labels = [self.uncached_categorize(text) for text in texts]
+        debug.trace_fmtd(6, "categorize_list() => {r}", r=labels)
+        return labels
+
+    def categorize_many(self, texts, batch_size=None, n_jobs=None, probs=False):
+        """Generator over categories for TEXTS (any iterable), or probability distributions if PROBS.
+        Notes:
+        - Texts are vectorized BATCH_SIZE at a time (SCORING_BATCH_SIZE).
+        - With N_JOBS > 1 (or -1 for all CPUs), chunks are scored by a process pool that gets the model once per process.
+        - Results are in the same order as the texts and match per-text categorize."""
+        batch_size = max(1, param_or_default(batch_size, SCORING_BATCH_SIZE))
+        n_jobs = param_or_default(n_jobs, SCORING_JOBS)
+        if n_jobs < 0:
+            n_jobs = (os.cpu_count() or 1)
+        debug.trace(4, f"tc.categorize_many(_, {batch_size}, {n_jobs}, {probs})")
+        if n_jobs <= 1:
+            for chunk in iterate_chunks(texts, batch_size):
+                yield from (self.class_probabilities_list(chunk) if probs else self.categorize_list(chunk))
+            return
+
+        # Score chunks in parallel, keeping limited number in flight so input can be streamed
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=init_scoring_worker, initargs=(self,)) as executor:
+            pending = deque()
+            for chunk in iterate_chunks(texts, batch_size):
+                pending.append(executor.submit(score_chunk, chunk, probs))
+                if len(pending) >= (2 * n_jobs):
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
+    def score_file(self, input_filename, output_filename, batch_size=None, n_jobs=None, probs=False):
+        """Categorize each line of tabular INPUT_FILENAME, using last field as the text.
+        The output file gets the category (or distribution if PROBS) followed by the original line.
+        Returns the number of lines. See categorize_many for BATCH_SIZE and N_JOBS."""
+        debug.trace(4, f"tc.score_file({input_filename}, {output_filename})")
+        num_lines = 0
+        with system.open_file(input_filename) as input_file, system.open_file(output_filename, "w") as output_file:
+            # note: tee just buffers lines for chunks being scored
+            (lines, text_lines) = tee(input_file)
+            texts = (line.rstrip("\n").split("\t")[-1] for line in text_lines)
+            for (line, result) in zip(lines, self.categorize_many(texts, batch_size, n_jobs, probs)):
+                output_file.write(f"{result}\t{line.rstrip(chr(10))}\n")
+                num_lines += 1
+        debug.trace(5, f"score_file() => {num_lines}")
+        return num_lines
+
+    def format_probabilities(self, class_probs):
+        """Format CLASS_PROBS for the classes as sorted list of label: prob"""
+        class_names = self.keys
+        debug.trace_fmtd(6, "class_names: {cn}\nclass_probs: {cp}", cn=class_names, cp=class_probs)
+        sorted_scores = misc.sort_weighted_hash(dict(zip(class_names, class_probs)))
+        return " ".join([(k + ": " + system.round_as_str(s)) for (k, s) in sorted_scores])
+
+    def class_probabilities_list(self, texts):
+        """Return list of probability distributions for TEXTS (see class_probabilities), using single vectorized prediction"""
+        debug.trace(4, f"tc.class_probabilities_list(_); len={len(texts)}")
+        if self.cache is not None:
+            return self.cached_predictions(PROBS_KIND, texts, self.uncached_class_probabilities_list)
+        return self.uncached_class_probabilities_list(texts)
+
+    def uncached_class_probabilities_list(self, texts):
+        """Version of class_probabilities_list without caching"""
+        dists = None
+        try:
+            dists = [self.format_probabilities(class_probs)
+                     for class_probs in self.classifier.predict_proba(texts)]
+        except:
+            debug.trace_exception(4, "class_probabilities_list")
+            dists = [self.uncached_class_probabilities(text) for text in texts]
+        debug.trace_fmtd(6, "class_probabilities_list() => {r}", r=dists)
+        return dists
+
     def categorize(self, text):
         """Return category for TEXT"""
+        if self.cache is not None:
+            return self.cached_predictions(CATEGORY_KIND, [text], lambda texts: [self.uncached_categorize(texts[0])])[0]
+        return self.uncached_categorize(text)
+
+    def uncached_categorize(self, text):
+        """Version of categorize without caching"""
         debug.trace(4, "tc.categorize(_)")
         debug.trace_fmtd(6, "\ttext={t}", t=text)
         label = None
@@ -544,16 +961,19 @@ class TextCategorizer:
 
     def class_probabilities(self, text):
         """Return probability distribution for TEXT"""
+        if self.cache is not None:
+            return self.cached_predictions(PROBS_KIND, [text], lambda texts: [self.uncached_class_probabilities(texts[0])])[0]
+        return self.uncached_class_probabilities(text)
+
+    def uncached_class_probabilities(self, text):
+        """Version of class_probabilities without caching"""
         debug.trace(4, "tc.class_probabilities(_)")
         debug.trace_fmtd(6, "\ttext={t}", t=text)
         dist = None
         try:
-            class_names = self.keys
             class_probs = self.classifier.predict_proba([text])[0]
             debug.trace_object(7, self.classifier)
-            debug.trace_fmtd(6, "class_names: {cn}\nclass_probs: {cp}", cn=class_names, cp=class_probs)
-            sorted_scores = misc.sort_weighted_hash(dict(zip(class_names, class_probs)))
-            dist = " ".join([(k + ": " + system.round_as_str(s)) for (k, s) in sorted_scores])
+            dist = self.format_probabilities(class_probs)
         except:
              system.print_exception_info("class_probabilities")
         debug.trace_fmtd(5, "class_probabilities() => {r}", r=dist)
@@ -566,6 +986,9 @@ class TextCategorizer:
         In addition, the vectorizer compontent is omitted when JSON used.
         """
         debug.trace_fmtd(4, "tc.save({f})", f=filename)
+        if (MAPPED_MODEL or filename.endswith(MAPPED_MODEL_EXT)):
+            self.save_mapped(filename)
+            return
         try:
             # pylint: disable=no-value-for-parameter, no-else-raise, unreachable
             if XGB_JSON:
@@ -588,6 +1011,9 @@ class TextCategorizer:
         Note: with XGB_JSON, this uses the XGBoost JSON format but just for the classifier proper.
         """
         debug.trace_fmtd(4, "tc.load({f})", f=filename)
+        if (MAPPED_MODEL or filename.endswith(MAPPED_MODEL_EXT)):
+            self.load_mapped(filename)
+            return
         try:
             # pylint: disable=no-value-for-parameter, no-else-raise, unreachable, assignment-from-none
             if XGB_JSON:
@@ -604,8 +1030,54 @@ class TextCategorizer:
         except (TypeError, ValueError):
             system.print_stderr("Problem loading classifier from {f}: {exc}".
                                 format(f=filename, exc=sys.exc_info()))
+        self.reset_cache()
+        return
+
+    def save_mapped(self, filename):
+        """Save classifier to FILENAME in joblib format suitable for memory mapping (see load_mapped).
+        The vectorizer vocabulary is stored as sorted arrays (see MappedTfidfVectorizer), and the arrays
+        (e.g., vocabulary, IDF weights and classifier coefficients) are stored uncompressed.
+        Note: Used by save if MAPPED_MODEL or FILENAME ends in .joblib."""
+        debug.trace_fmtd(4, "tc.save_mapped({f})", f=filename)
+        try:
+            vectorizer = self.classifier[TFIDF]
+            if not isinstance(vectorizer, MappedTfidfVectorizer):
+                vectorizer = MappedTfidfVectorizer.from_vectorizer(vectorizer)
+            pipeline = Pipeline([(TFIDF, vectorizer), (CLF, self.classifier[CLF])])
+            joblib.dump([self.keys, pipeline], filename)
+        except:
+            system.print_exception_info("tc.save_mapped")
         return
 
+    def load_mapped(self, filename, mmap_mode="r"):
+        """Load classifier from FILENAME saved via save_mapped, with arrays memory mapped via MMAP_MODE.
+        Note: This allows for quick startup, and processes using the same model share the pages."""
+        debug.trace_fmtd(4, "tc.load_mapped({f})", f=filename)
+        try:
+            (self.keys, self.classifier) = joblib.load(filename, mmap_mode=mmap_mode)
+        except (TypeError, ValueError, OSError):
+            system.print_stderr("Problem loading classifier from {f}: {exc}".
+                                format(f=filename, exc=sys.exc_info()))
+        self.reset_cache()
+        return
+
+#...............................................................................
+# Process pool support for bulk scoring (see TextCategorizer.categorize_many)
+
+scoring_categorizer = None
+#
+def init_scoring_worker(text_cat):
+    """Initialize process pool worker with TEXT_CAT"""
+    global scoring_categorizer
+    scoring_categorizer = text_cat
+
+
+def score_chunk(texts, probs=False):
+    """Categorize list of TEXTS in pool worker (or get distributions if PROBS)"""
+    if probs:
+        return scoring_categorizer.class_probabilities_list(texts)
+    return scoring_categorizer.categorize_list(texts)
+
 #-------------------------------------------------------------------------------
 # CherryPy Web server based on following tutorial
 #     https://simpletutorials.com/c/2165/How%20to%20Create%20a%20Simple%20JSON%20Service%20with%20CherryPy
@@ -710,6 +1182,81 @@ def format_index_html(base_url=None):
                                       quoted_api_text=system.quote_url_text(API_TEXT))
     return index_html
 
+#................................................................................
+# Request coalescing
+
+class PredictionBatcher:
+    """Collects concurrent categorization requests (e.g., from CherryPy threads) for up to
+    MAX_WAIT seconds or MAX_SIZE items, and runs a single vectorized prediction over them.
+    Note: results are the same as with the per-text TextCategorizer methods."""
+    CATEGORIZE = "categorize"
+    PROBS = "probs"
+
+    def __init__(self, text_cat, max_size=None, max_wait=None):
+        """Class constructor: uses TEXT_CAT for predictions (defaults from MICRO_BATCH_SIZE and MICRO_BATCH_WAIT_MS)"""
+        debug.trace_fmtd(5, "PredictionBatcher.__init__(s:{s})", s=self)
+        self.text_cat = text_cat
+        self.max_size = max(1, param_or_default(max_size, MICRO_BATCH_SIZE))
+        self.max_wait = param_or_default(max_wait, MICRO_BATCH_WAIT_MS / 1000.0)
+        self.requests = queue.Queue()
+        self.worker = None
+        self.lock = threading.Lock()
+        self.num_batches = 0
+        self.num_items = 0
+
+    def categorize(self, text):
+        """Return category for TEXT (batched)"""
+        return self.submit(self.CATEGORIZE, text)
+
+    def class_probabilities(self, text):
+        """Return probability distribution for TEXT (batched)"""
+        return self.submit(self.PROBS, text)
+
+    def submit(self, kind, text):
+        """Queue request of KIND for TEXT and wait for result"""
+        with self.lock:
+            if self.worker is None:
+                self.worker = threading.Thread(target=self.run, name="PredictionBatcher", daemon=True)
+                self.worker.start()
+        # note: request is [kind, text, event, result]
+        request = [kind, text, threading.Event(), None]
+        self.requests.put(request)
+        request[2].wait()
+        return request[3]
+
+    def run(self):
+        """Worker loop collecting and processing batches"""
+        while True:
+            batch = [self.requests.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self.requests.get(timeout=remaining) if (remaining > 0)
+                                 else self.requests.get_nowait())
+                except queue.Empty:
+                    break
+            self.process(batch)
+
+    def process(self, batch):
+        """Run predictions for BATCH of requests, grouped by kind"""
+        debug.trace(6, f"PredictionBatcher.process(_); len={len(batch)}")
+        self.num_batches += 1
+        self.num_items += len(batch)
+        try:
+            for (kind, predict_fn) in [(self.CATEGORIZE, self.text_cat.categorize_list),
+                                       (self.PROBS, self.text_cat.class_probabilities_list)]:
+                requests = [request for request in batch if request[0] == kind]
+                if requests:
+                    results = predict_fn([request[1] for request in requests])
+                    for (request, result) in zip(requests, results):
+                        request[3] = result
+        except:
+            system.print_exception_info("PredictionBatcher.process")
+        finally:
+            for request in batch:
+                request[2].set()
+
 #................................................................................
 # Main class
 
@@ -722,6 +1269,7 @@ class web_controller:
                          s=self, a=args, k=kwargs)
         self.text_cat = TextCategorizer()
         self.text_cat.load(model_filename)
+        self.batcher = (PredictionBatcher(self.text_cat) if MICRO_BATCHING else None)
         return
 
     @cherrypy.expose
@@ -739,16 +1287,54 @@ class web_controller:
     def categorize(self, text, **kwargs):
         """Infer category for TEXT"""
         debug.trace_fmtd(5, "wc.categorize(s:{s}, _, kw:{kw})", s=self, kw=kwargs)
+        if self.batcher:
+            # note: avoids batching delay for cached results, with miss counted when batched
+            (found, label) = self.text_cat.lookup_cached(CATEGORY_KIND, text, count_miss=False)
+            return (label if found else self.batcher.categorize(text))
         return self.text_cat.categorize(text)
 
     @cherrypy.expose
     def class_probabilities(self, text, **kwargs):
         """Get category probability distribution for TEXT"""
         debug.trace_fmtd(5, "wc.class_probabilities(s:{s}, _, kw:{kw})", s=self, kw=kwargs)
+        if self.batcher:
+            (found, dist) = self.text_cat.lookup_cached(PROBS_KIND, text, count_miss=False)
+            return (dist if found else self.batcher.class_probabilities(text))
         return self.text_cat.class_probabilities(text)
     #
     probs = class_probabilities
 
+    @cherrypy.expose
+    @cherrypy.tools.json_out()
+    def cache_stats(self, **kwargs):
+        """Return JSON with prediction cache statistics (e.g., hit rate)"""
+        debug.trace_fmtd(5, "wc.cache_stats(s:{s}, kw:{kw})", s=self, kw=kwargs)
+        cache = self.text_cat.cache
+        return (cache.info() if cache else {"enabled": False})
+
+    @cherrypy.expose
+    @cherrypy.tools.json_in(force=False)
+    @cherrypy.tools.json_out()
+    def batch(self, texts=None, probs=False, **kwargs):
+        """Categorize list of TEXTS, returning JSON list of categories (or distributions if PROBS).
+        Note: The texts can also be given via JSON POST, either as list or {"texts": [...], "probs": true}."""
+        debug.trace_fmtd(5, "wc.batch(s:{s}, _, kw:{kw})", s=self, kw=kwargs)
+        data = getattr(cherrypy.request, "json", None)
+        if isinstance(data, dict):
+            texts = data.get("texts", texts)
+            probs = data.get("probs", probs)
+        elif isinstance(data, list):
+            texts = data
+        if texts is None:
+            texts = []
+        elif isinstance(texts, str):
+            texts = [texts]
+        if isinstance(probs, str):
+            probs = system.to_bool(probs)
+        if probs:
+            return self.text_cat.class_probabilities_list(texts)
+        return self.text_cat.categorize_list(texts)
+
     @cherrypy.expose
     def stop(self, **kwargs):
         """Stops the web search server and saves cached data to disk.
@@ -828,10 +1414,16 @@ def main(args):
     ## BAD: if ((len(args) > 0) and (args[1] == "--tag")):
     if ((len(args) > 1) and (args[1] == "--tag")):
         args[1:] = args[3:]
-    if ((len(args) != 2) or (args[1] == "--help")):
-        print("Usage: {p} model".format(p=args[0]))
+    if ((len(args) not in [2, 4]) or (args[1] == "--help")):
+        print("Usage: {p} model [input-tsv output-tsv]".format(p=args[0]))
+        print("Note: Starts web server unless given files to score (see SCORING_BATCH_SIZE and SCORING_JOBS).")
         return
     model = args[1]
+    if (len(args) == 4):
+        text_cat = TextCategorizer()
+        text_cat.load(model)
+        text_cat.score_file(args[2], args[3])
+        return
     start_web_controller(model)
     return
 
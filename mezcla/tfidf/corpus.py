@@ -40,7 +40,8 @@ from __future__ import absolute_import, division
 
 # Standard modules
 import math
-from collections import namedtuple
+import multiprocessing
+from collections import defaultdict, namedtuple
 ## TODO
 ## import os
 import sys
@@ -85,6 +86,33 @@ MAX_NGRAM_SIZE = system.getenv_int(
 USE_TFIDF_LOCK = system.getenv_bool(
     "USE_TFIDF_LOCK", False,
     description="Apply thread locking to TF/IDF objects")
+TFIDF_USE_MATRIX = system.getenv_bool(
+    "TFIDF_USE_MATRIX", False,
+    description="Use vectorized sparse-matrix scoring for get_keywords (via numpy/scipy)")
+TFIDF_WORKERS = system.getenv_int(
+    "TFIDF_WORKERS", 1,
+    description="Number of processes for preprocessing documents in add_documents")
+TFIDF_WORKER_CHUNKSIZE = system.getenv_int(
+    "TFIDF_WORKER_CHUNKSIZE", 16,
+    description="Number of documents sent to add_documents worker at a time")
+
+# Preprocessor for add_documents worker processes (see _init_worker)
+_worker_preprocessor = None
+
+
+def _init_worker(preprocessor):
+    """Initialize add_documents worker process to use PREPROCESSOR"""
+    global _worker_preprocessor
+    _worker_preprocessor = preprocessor
+
+
+def _preprocess_document(item):
+    """Return (document_id, text, ngram_spans) for ITEM (document_id, raw_text) via worker's preprocessor
+    Note: the text is cleaned as with Corpus.__setitem__ followed by Document.__init__"""
+    document_id, raw_text = item
+    text = clean_text(clean_text(raw_text))
+    return (document_id, text, list(_worker_preprocessor.yield_ngram_spans(text)))
+
 
 class Corpus(object):
     """A corpus is made up of Documents, and performs TF-IDF calculations on them.
@@ -116,7 +144,7 @@ class Corpus(object):
 
     def __init__(self, min_ngram_size=None, max_ngram_size=None,
                  language=None, preprocessor=None,
-                 gramsize=None, all_ngrams=None):
+                 gramsize=None, all_ngrams=None, use_matrix=None):
         """Initalize.
 
         Parameters:
@@ -137,15 +165,26 @@ class Corpus(object):
                 Note: deprecated (use min_ngram_size instead).
             gramsize (int): number of words in a keyword
                 deprecated: use max_ngram_size instead
+            use_matrix (bool):
+                if True, get_keywords uses vectorized scoring over a compiled
+                term-document matrix (see matrix.py); defaults to TFIDF_USE_MATRIX
         """
         debug.assertion(not (gramsize and max_ngram_size))
         debug.assertion(not (all_ngrams and min_ngram_size))
         self.__documents = {}
         self.__document_occurrences = {}
+        # note: histogram of DF counts (i.e., number of ngrams with given DF),
+        # used to maintain the max DF when documents are replaced
+        self.__doc_frequency_counts = defaultdict(int)
+        self.__max_doc_occurrences = 0
         self.__gramsize = (max_ngram_size or gramsize)
         self.__max_raw_frequency = None
-        self.__max_rel_doc_frequency = None
-        self.__max_doc_frequency = None
+        self.__matrix = None
+        # note: set when loaded from saved corpus (see load and storage.py)
+        self.__mapped_data = None
+        if use_matrix is None:
+            use_matrix = TFIDF_USE_MATRIX
+        self.use_matrix = use_matrix
         self.lock = threading.Lock()
         if preprocessor:
             self.preprocessor = preprocessor
@@ -188,9 +227,164 @@ class Corpus(object):
         return self.documents[document_id]
 
     def __setitem__(self, document_id, text):
-        """Add a Document to the Corpus using a unique id key."""
+        """Add a Document to the Corpus using a unique id key.
+        Note: The document frequency index is updated, discounting any document being replaced.
+        """
         text = clean_text(text)
-        self.documents[document_id] = Document(text, self.preprocessor)
+        self.add_document(document_id, Document(text, self.preprocessor))
+
+    def __delitem__(self, document_id):
+        """Remove Document with DOCUMENT_ID from the Corpus"""
+        if USE_TFIDF_LOCK:
+            with self.lock:
+                self._remove_document(document_id)
+        else:
+            self._remove_document(document_id)
+
+    def add_document(self, document_id, document):
+        """Add DOCUMENT object to the Corpus under DOCUMENT_ID, updating the DF index"""
+        if USE_TFIDF_LOCK:
+            with self.lock:
+                self._add_document(document_id, document)
+        else:
+            self._add_document(document_id, document)
+
+    def add_documents(self, documents, workers=None, chunksize=None):
+        """Add DOCUMENTS, an iterable of (document_id, text) pairs, to the Corpus.
+        The text preprocessing (i.e., ngram extraction) is done by a pool of WORKERS
+        processes, defaulting to TFIDF_WORKERS; CHUNKSIZE is number of documents per task.
+        Note: The documents are added in the input order, so the result is the same as
+        with serial ingestion via corpus[document_id] = text.
+        """
+        if workers is None:
+            workers = TFIDF_WORKERS
+        if chunksize is None:
+            chunksize = TFIDF_WORKER_CHUNKSIZE
+        debug.trace(BDL, f"add_documents(_, workers={workers}, chunksize={chunksize})")
+        if (workers <= 1):
+            for (document_id, text) in documents:
+                self[document_id] = text
+            return
+        # note: uses fork where available so that the preprocessor need not be pickled
+        # (e.g., lambda stemmer), and imap so results come back in input order
+        start_method = ("fork" if ("fork" in multiprocessing.get_all_start_methods()) else None)
+        context = multiprocessing.get_context(start_method)
+        with context.Pool(workers, initializer=_init_worker, initargs=(self.preprocessor,)) as pool:
+            for (document_id, text, ngram_spans) in pool.imap(_preprocess_document, documents, chunksize):
+                document = Document.from_ngram_spans(text, ngram_spans, self.preprocessor)
+                self.add_document(document_id, document)
+
+    def append_text(self, document_id, text, keep_text=True):
+        """Append TEXT to document with DOCUMENT_ID, creating it if needed.
+        The keywords and DF index are updated incrementally, so repeated appends avoid
+        re-processing the entire document (see Document.append_text). If not KEEP_TEXT,
+        the document text is not retained (e.g., for streaming large inputs).
+        """
+        if USE_TFIDF_LOCK:
+            with self.lock:
+                self._append_text(document_id, text, keep_text)
+        else:
+            self._append_text(document_id, text, keep_text)
+
+    def _append_text(self, document_id, text, keep_text):
+        """Helper to append_text without locking"""
+        self._materialize()
+        document = self.__documents.get(document_id)
+        if document is None:
+            document = Document("", self.preprocessor, compact=True)
+            self._add_document(document_id, document)
+        new_ngrams = document.append_text(text, keep_text=keep_text)
+        self._update_doc_occurrences(new_ngrams, 1)
+        self.__max_raw_frequency = None
+        self.__matrix = None
+
+    def _add_document(self, document_id, document):
+        """Helper to add_document without locking"""
+        self._materialize()
+        # note: a replaced document keeps its position (i.e., not removed first)
+        old_document = self.__documents.get(document_id)
+        if old_document is not None:
+            self._update_doc_occurrences(old_document.keywordset, -1)
+        self.__documents[document_id] = document
+        self._update_doc_occurrences(document.keywordset, 1)
+        self.__max_raw_frequency = None
+        self.__matrix = None
+
+    def _remove_document(self, document_id):
+        """Helper to __delitem__ without locking"""
+        self._materialize()
+        document = self.__documents.pop(document_id)
+        self._update_doc_occurrences(document.keywordset, -1)
+        self.__max_raw_frequency = None
+        self.__matrix = None
+
+    def save(self, path):
+        """Save corpus to PATH in binary format for memory-mapped loading (see storage.py)
+        Note: The ngram locations and document text are not saved."""
+        # pylint: disable=import-outside-toplevel
+        from mezcla.tfidf.storage import save_corpus
+        save_corpus(self, path)
+
+    @classmethod
+    def load(cls, path, preprocessor=None, **kwargs):
+        """Load corpus saved at PATH via save, memory-mapping the data (see storage.py).
+        The PREPROCESSOR defaults to one using the saved ngram sizes; KWARGS are passed
+        to the constructor (e.g., use_matrix).
+        Note: The documents are read-only views until the corpus is modified, and
+        text appended to a loaded document doesn't form ngrams with the prior text."""
+        # pylint: disable=import-outside-toplevel
+        from mezcla.tfidf.storage import MappedCorpusData, MappedDocuments, MappedDocFrequency
+        data = MappedCorpusData(path)
+        if preprocessor is None:
+            preprocessor = Preprocessor(min_ngram_size=data.header["min_ngram_size"],
+                                        max_ngram_size=data.header["max_ngram_size"])
+        corpus = cls(preprocessor=preprocessor, max_ngram_size=preprocessor.gramsize, **kwargs)
+        corpus.__mapped_data = data
+        corpus.__documents = MappedDocuments(data, preprocessor)
+        corpus.__document_occurrences = MappedDocFrequency(data)
+        corpus.__max_doc_occurrences = data.max_doc_occurrences
+        corpus.__max_raw_frequency = (data.max_raw_frequency if data.num_documents else None)
+        debug.trace(BDL, f"Loaded corpus with {len(corpus)} docs from {path}")
+        return corpus
+
+    def _materialize(self):
+        """Convert memory-mapped data from load into regular structures (e.g., prior to modification)"""
+        if self.__mapped_data is None:
+            return
+        debug.trace(BDL, f"Materializing corpus loaded from {self.__mapped_data.path}")
+        documents = {}
+        for (document_id, mapped_document) in self.__documents.items():
+            document = Document.from_keywordset(
+                "", mapped_document.keywordset.to_keyword_store(), self.preprocessor)
+            document.keywordset.document = document
+            documents[document_id] = document
+        self.__documents = documents
+        self.__document_occurrences = dict(self.__document_occurrences.items())
+        for count in self.__document_occurrences.values():
+            self.__doc_frequency_counts[count] += 1
+        self.__mapped_data = None
+
+    def _update_doc_occurrences(self, ngrams, delta):
+        """Adjust document frequency for each of the NGRAMS by DELTA (+1 or -1)"""
+        debug.trace(BDL + 3, f"_update_doc_occurrences(_, {delta}); len(ngrams)={len(ngrams)}")
+        occurrences = self.__document_occurrences
+        df_counts = self.__doc_frequency_counts
+        for ngram in ngrams:
+            old_count = occurrences.get(ngram, 0)
+            new_count = old_count + delta
+            debug.assertion(new_count >= 0)
+            if old_count:
+                df_counts[old_count] -= 1
+            if new_count > 0:
+                occurrences[ngram] = new_count
+                df_counts[new_count] += 1
+                if new_count > self.__max_doc_occurrences:
+                    self.__max_doc_occurrences = new_count
+            elif old_count:
+                del occurrences[ngram]
+        # note: the max only drops one step at a time with decrements
+        while (self.__max_doc_occurrences > 0) and (not df_counts.get(self.__max_doc_occurrences)):
+            self.__max_doc_occurrences -= 1
 
     @property
     def gramsize(self):
@@ -201,6 +395,16 @@ class Corpus(object):
         """The document ids in the corpus."""
         return self.documents.keys()
 
+    @property
+    def matrix(self):
+        """Compiled term-document matrix for vectorized scoring (see matrix.py)
+        Note: recompiled after the documents change."""
+        if self.__matrix is None:
+            # pylint: disable=import-outside-toplevel
+            from mezcla.tfidf.matrix import CorpusMatrix
+            self.__matrix = CorpusMatrix(self)
+        return self.__matrix
+
     @property
     def max_raw_frequency(self):
         """Highest frequency across all Documents in the Corpus."""
@@ -209,39 +413,32 @@ class Corpus(object):
             self.__max_raw_frequency = max(_.max_raw_frequency for _ in self.documents.values())
         return self.__max_raw_frequency
 
-    @lru_cache()
-    def count_doc_occurrences(self, ngram):
-        """Count the number of documents the corpus has with the matching ngram."""
-        # Note: caches the values as called multiple times for TFIDF calculation
-        ## TODO2: make copy of document values to avoid dict-changed runtime error
-        ## See https://stackoverflow.com/questions/11941817/how-to-avoid-runtimeerror-dictionary-changed-size-during-iteration-error.
-        if ngram in self.document_occurrences:
-            count = self.document_occurrences[ngram]
-        else:
-            count = sum((1 + NGRAM_EPSILON) if ngram in doc else 0 for doc in self.documents.values())
+    @staticmethod
+    def _adjust_doc_count(num_docs):
+        """Adjust NUM_DOCS for use as a DF count (e.g., epsilon for unknown ngrams)"""
+        count = num_docs * (1 + NGRAM_EPSILON)
         if ((count == 1) and PENALIZE_SINGLETONS):
             count = 0
         if (count == 0):
             count = NGRAM_EPSILON
         return count
 
+    def count_doc_occurrences(self, ngram):
+        """Count the number of documents the corpus has with the matching ngram.
+        Note: uses the DF index maintained by __setitem__, so this is O(1)."""
+        return self._adjust_doc_count(self.document_occurrences.get(ngram, 0))
+
     ## TPO
     @property
     def max_rel_doc_frequency(self):
         """"Highest relative document frequency for all ngrams in the corpus"""
-        if self.__max_rel_doc_frequency is None:
-            max_doc_frequency = max(self.count_doc_occurrences(ngram) for doc in self.documents.values() for ngram in doc.keywordset)
-            self.__max_rel_doc_frequency = max_doc_frequency / float(len(self))
-        return self.__max_rel_doc_frequency
-    
+        return (self.max_doc_frequency / float(len(self))) if len(self) else 0
+
     ## TPO
     @property
     def max_doc_frequency(self):
-        """"Highest relative document frequency for all ngrams in the corpus"""
-        if self.__max_doc_frequency is None:
-            max_doc_frequency = max(self.count_doc_occurrences(ngram) for doc in self.documents.values() for ngram in doc.keywordset)
-            self.__max_doc_frequency = max_doc_frequency
-        return self.__max_doc_frequency
+        """"Highest document frequency for all ngrams in the corpus"""
+        return self._adjust_doc_count(self.__max_doc_occurrences)
     
     def df_freq(self, ngram):
         """Return document frequency (DF) count for NGRAM"""
@@ -381,6 +578,11 @@ class Corpus(object):
                 debug.trace(BDL + 3, f"get_keywords() => {result}")
                 return result
             document = self[document_id]
+            if self.use_matrix:
+                result = self.matrix.get_keywords(document_id, idf_weight=idf_weight,
+                                                  tf_weight=tf_weight, limit=limit)
+                debug.trace(BDL + 3, f"get_keywords() => {result}")
+                return result
         if text:
             debug.assertion(document is None)
             text = clean_text(text)
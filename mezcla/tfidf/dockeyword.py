@@ -26,7 +26,10 @@ Example:
 
 # Standard modules
 from __future__ import absolute_import
+from array import array
 from collections import namedtuple
+from collections.abc import Mapping
+import sys
 
 # Local modules
 from mezcla.tfidf.config import BASE_DEBUG_LEVEL as BDL
@@ -47,6 +50,8 @@ SKIP_DOC_LOCATION = system.getenv_boolean(
 class DocKeyword(object):
     """Class for maintaining stemmed term and original"""
     # Note: debug tracing commented out to cut down on overhead
+    # Note: uses slots to avoid per-instance dict (see KeywordStore for more compact version)
+    __slots__ = ('locations', 'text', 'count', 'skip_location', 'add_dummy_location')
     
     def __init__(self, text, document=None, start=None, end=None,
                  skip_location=None, add_dummy_location=None):
@@ -80,6 +85,12 @@ class DocKeyword(object):
         out.update_locations(other.locations)
         return out
 
+    def __iadd__(self, other):
+        """In-place version of __add__: avoids copying locations for each repeat"""
+        assert self.text == other.text
+        self.locations.update(other.locations)
+        return self
+
     def __ladd__(self, other):
         if other == 0:
             return self
@@ -118,6 +129,105 @@ class DocKeyword(object):
         return ('Stem:%s, Instances:%s, Count:%d, Len:%d, #Locs:%d'
                 % (self.text, str(self.original_texts), self.count, len(self.locations), len(self)))
 
+
+class KeywordStore(Mapping):
+    """Compact store for the keywords of a document: maps ngram to DocKeyword.
+
+    The ngrams are interned and assigned integral IDs, with occurrence counts kept
+    in array('i') by ID. Offsets are kept in parallel arrays, along with a link to the
+    next occurrence of the same ngram, so adding an occurrence is O(1). DocKeyword
+    objects are only created upon access (e.g., store[ngram]).
+
+    Example:
+        >>> store = KeywordStore(skip_location=False)
+        >>> for (start, end) in [(0, 3), (8, 11)]:
+        ...     store.add('dog', start, end)
+        >>> store.add('cat', 4, 7)
+        >>> (list(store), store.count('dog'), store.count('cow'))
+        (['dog', 'cat'], 2, 0)
+        >>> sorted((loc.start, loc.end) for loc in store['dog'].locations)
+        [(0, 3), (8, 11)]
+    """
+    __slots__ = ('document', 'skip_location', 'ids', 'ngrams', 'counts',
+                 'first', 'last', 'starts', 'ends', 'next')
+
+    def __init__(self, document=None, skip_location=None):
+        if skip_location is None:
+            skip_location = SKIP_DOC_LOCATION
+        self.document = document
+        self.skip_location = skip_location
+        self.ids = {}
+        self.ngrams = []
+        self.counts = array('i')
+        # note: offsets of the first and last occurrence for each ngram ID
+        self.first = array('i')
+        self.last = array('i')
+        # note: per-occurrence data, with next giving following occurrence of ngram (or -1)
+        self.starts = array('i')
+        self.ends = array('i')
+        self.next = array('i')
+
+    def add(self, ngram, start=None, end=None, count=1):
+        """Add occurrence of NGRAM, optionally at offsets START to END
+        Note: COUNT allows for adding several occurrences without offsets"""
+        ngram_id = self.ids.get(ngram)
+        if ngram_id is None:
+            ngram_id = len(self.ngrams)
+            ngram = sys.intern(ngram)
+            self.ids[ngram] = ngram_id
+            self.ngrams.append(ngram)
+            self.counts.append(0)
+            self.first.append(-1)
+            self.last.append(-1)
+        self.counts[ngram_id] += count
+        if (start is not None) and (end is not None) and (not self.skip_location):
+            pos = len(self.starts)
+            self.starts.append(start)
+            self.ends.append(end)
+            self.next.append(-1)
+            if self.last[ngram_id] < 0:
+                self.first[ngram_id] = pos
+            else:
+                self.next[self.last[ngram_id]] = pos
+            self.last[ngram_id] = pos
+
+    def count(self, ngram):
+        """Number of occurrences of NGRAM (0 if not present)"""
+        ngram_id = self.ids.get(ngram)
+        return (self.counts[ngram_id] if (ngram_id is not None) else 0)
+
+    def item_counts(self):
+        """Iterator over (ngram, count) pairs"""
+        return zip(self.ngrams, self.counts)
+
+    def locations(self, ngram):
+        """Yield Location tuples for NGRAM"""
+        pos = self.first[self.ids[ngram]]
+        while pos >= 0:
+            yield Location(self.document, self.starts[pos], self.ends[pos])
+            pos = self.next[pos]
+
+    def __getitem__(self, ngram):
+        """Return DocKeyword for NGRAM, including locations"""
+        if ngram not in self.ids:
+            raise KeyError(ngram)
+        keyword = DocKeyword(ngram, skip_location=self.skip_location, add_dummy_location=False)
+        keyword.locations = set(self.locations(ngram))
+        keyword.count = self.count(ngram)
+        if not keyword.locations:
+            # note: makes sure len(keyword) reflects count if offsets not available
+            keyword.skip_location = True
+        return keyword
+
+    def __contains__(self, ngram):
+        return ngram in self.ids
+
+    def __iter__(self):
+        return iter(self.ngrams)
+
+    def __len__(self):
+        return len(self.ngrams)
+
 #-------------------------------------------------------------------------------
     
 if __name__ == '__main__':
@@ -23,7 +23,7 @@ Example:
 from __future__ import absolute_import, division
 
 # Standard packages
-from collections import defaultdict
+from collections import Counter, defaultdict
 import math
 import random
 
@@ -33,6 +33,7 @@ from mezcla import system
 
 # Local packages
 from mezcla.tfidf.config import BASE_DEBUG_LEVEL as BDL
+from mezcla.tfidf.dockeyword import DocKeyword, KeywordStore
 from mezcla.tfidf.preprocess import clean_text, Preprocessor
 
 # TPO: environment option for weight singleton occurrences low
@@ -40,6 +41,9 @@ PENALIZE_SINGLETONS = system.getenv_boolean("PENALIZE_SINGLETONS", False,
                                             "Ignore singleton ngrams")
 if PENALIZE_SINGLETONS:
     system.print_stderr("FYI: Penalizing singleton ngrams")
+COMPACT_KEYWORDS = system.getenv_boolean(
+    "COMPACT_KEYWORDS", False,
+    "Use compact array-based keyword store--better for large documents")
 
 
 class Document(object):
@@ -49,13 +53,15 @@ class Document(object):
         text (list): cleaned text, set on init
     """
 
-    def __init__(self, raw_text, preprocessor=None):
+    def __init__(self, raw_text, preprocessor=None, compact=None):
         """All you need is the text body and gramsize (number words in ngram).
 
         raw_text
             text string input. Will be run through text preprocessing
         preprocessor
             initalized instance of a preprocessor
+        compact
+            whether to use KeywordStore for keywordset (defaults to COMPACT_KEYWORDS)
         """
         ## TODO2: fix gramsize reference (in preprocessor)
         self.id = None
@@ -63,23 +69,51 @@ class Document(object):
         self.__keywordset = None
         self.__max_raw_frequency = None
         self.__length = None
+        self.__tail = None
+        self.__ngram_spans = None
+        if compact is None:
+            compact = COMPACT_KEYWORDS
+        self.compact = compact
         if (preprocessor is None):
             preprocessor = Preprocessor(stemmer=lambda x: x)
         self.preprocessor = preprocessor
 
+    @classmethod
+    def from_ngram_spans(cls, text, ngram_spans, preprocessor=None, compact=None):
+        """Create document for already cleaned TEXT using precomputed NGRAM_SPANS,
+        a list of (ngram, start, end) tuples as from Preprocessor.yield_ngram_spans.
+        Note: used for parallel corpus construction (see Corpus.add_documents).
+        """
+        document = cls("", preprocessor=preprocessor, compact=compact)
+        document.text = text
+        document.__ngram_spans = ngram_spans
+        return document
+
+    @classmethod
+    def from_keywordset(cls, text, keywordset, preprocessor=None):
+        """Create document for already cleaned TEXT using existing KEYWORDSET, which
+        must support the KeywordStore interface (e.g., count and item_counts).
+        Note: used for loading saved corpora (see storage.py).
+        """
+        document = cls("", preprocessor=preprocessor, compact=True)
+        document.text = text
+        document.__keywordset = keywordset
+        return document
+
     def __contains__(self, ngram):
         """Check if the ngram is present in the document."""
         return ngram in self.keywordset
 
     def __getitem__(self, ngram):
-        """Return the DocKeyword object with occurrences via the stemmed ngram."""
-        return self.keywordset[ngram]
+        """Return the DocKeyword object with occurrences via the stemmed ngram.
+        Note: returns "" if not present (without adding to keywordset)."""
+        return self.keywordset.get(ngram, "")
 
     def __len__(self):
         """The length of the document is the number of ngrams."""
         # TODO: rename to __size__??
         if not self.__length:
-            self.__length = sum(len(x) for x in self.keywordset.values())
+            self.__length = sum(count for (_ngram, count) in self.keyword_counts())
         return self.__length
 
     @property
@@ -87,13 +121,21 @@ class Document(object):
         """Max ngram frequency found in document."""
         ## if not self.__max_raw_frequency:
         if self.__max_raw_frequency is None:
-            biggest_kw = ''
-            for kw in self.keywordset.values():
-                if len(kw) > len(biggest_kw):
-                    biggest_kw = kw
-            self.__max_raw_frequency = len(biggest_kw)
+            self.__max_raw_frequency = max((count for (_ngram, count) in self.keyword_counts()), default=0)
         return self.__max_raw_frequency
 
+    def keyword_count(self, ngram):
+        """Number of occurrences of NGRAM in the document"""
+        if self.compact:
+            return self.keywordset.count(ngram)
+        return len(self[ngram]) if ngram in self else 0
+
+    def keyword_counts(self):
+        """Iterator over (ngram, count) pairs for the document"""
+        if self.compact:
+            return self.keywordset.item_counts()
+        return ((ngram, len(kw)) for (ngram, kw) in self.keywordset.items())
+
     @property
     def gramset(self):
         """Important for fast check if ngram in document.
@@ -104,7 +146,13 @@ class Document(object):
     @property
     def keywordset(self):
         """Return a set of keywords in the document with all their locations."""
-        if not self.__keywordset:
+        if (self.__keywordset is None) and self.compact:
+            # note: avoids DocKeyword objects altogether (see dockeyword.KeywordStore)
+            self.__keywordset = KeywordStore(document=self)
+            for (ngram, start, end) in self.ngram_spans():
+                self.__keywordset.add(ngram, start, end)
+            self.__ngram_spans = None
+        elif self.__keywordset is None:
             ## OLD: self.__keywordset = {}
             self.__keywordset = defaultdict(str)
             for kw in self.keywords:
@@ -112,12 +160,76 @@ class Document(object):
                     self.__keywordset[kw.text] = kw
                 else:
                     self.__keywordset[kw.text] += kw
+            self.__ngram_spans = None
         return self.__keywordset
 
+    def ngram_spans(self):
+        """Return iterable of (ngram, start, end) tuples for the text (or precomputed ones)"""
+        if self.__ngram_spans is not None:
+            return self.__ngram_spans
+        return self.preprocessor.yield_ngram_spans(self.text)
+
+    def append_text(self, raw_text, keep_text=True):
+        """Append RAW_TEXT to the document, updating the keywords incrementally.
+        Returns the list of ngrams new to the document (e.g., for updating DF counts).
+        Notes:
+        - The trailing words of the last sentence are re-processed along with the new
+          text, so ngrams spanning the boundary are included as if the text were combined.
+        - If not KEEP_TEXT, the text is not retained (e.g., so memory is bounded by the
+          vocabulary), and offsets are no longer tracked.
+        - Requires the compact keyword store; otherwise, the keywords are rebuilt.
+        - Without offsets (e.g., sklearn counter), the ngrams just in the trailing context
+          are excluded by matching against the context's own ngrams.
+        """
+        text = clean_text(raw_text)
+        if not text.strip():
+            return []
+        old_text = self.text
+        combined_text = ((old_text + " " + text) if old_text else text)
+        self.__length = None
+        self.__max_raw_frequency = None
+        if not self.compact:
+            debug.trace(BDL, "Warning: append_text rebuilding keywords for non-compact document")
+            old_ngrams = set(self.keywordset)
+            self.text = combined_text
+            self.__keywordset = None
+            return [ngram for ngram in self.keywordset if ngram not in old_ngrams]
+
+        # Add ngrams from trailing context plus new text, excluding those just in context
+        store = self.keywordset
+        if self.__tail is None:
+            self.__tail = self.preprocessor.trailing_context(old_text)
+        tail = self.__tail
+        new_text = ((tail + " " + text) if tail else text)
+        offset = (len(combined_text) - len(new_text))
+        if not keep_text:
+            store.skip_location = True
+        new_ngrams = []
+        tail_counts = None
+        for (ngram, start, end) in self.preprocessor.yield_ngram_spans(new_text):
+            if tail and (end is not None) and (end <= len(tail)):
+                continue
+            if tail and (end is None):
+                if tail_counts is None:
+                    tail_counts = Counter(tail_ngram for (tail_ngram, _start, _end)
+                                          in self.preprocessor.yield_ngram_spans(tail))
+                if tail_counts[ngram] > 0:
+                    tail_counts[ngram] -= 1
+                    continue
+            if ngram not in store:
+                new_ngrams.append(ngram)
+            if start is not None:
+                start, end = (offset + start), (offset + end)
+            store.add(ngram, start, end)
+        self.__tail = self.preprocessor.trailing_context(new_text)
+        self.text = (combined_text if keep_text else "")
+        debug.trace(BDL + 1, f"append_text(): {len(new_ngrams)} new ngrams")
+        return new_ngrams
+
     # Term Frequency weighting functions:
     def tf_raw(self, ngram):
         """The (relative) frequency of an ngram in a document."""
-        num_occurrences = len(self[ngram]) if ngram in self else 0
+        num_occurrences = self.keyword_count(ngram)
         # HACK: give singletons a max DF to lower IDF score
         if (num_occurrences == 1) and PENALIZE_SINGLETONS:
             num_occurrences = 0
@@ -146,7 +258,7 @@ class Document(object):
 
     def tf_freq(self, ngram):
         """Returns frequency count for NGRAM"""
-        num_occurrences = len(self[ngram]) if ngram in self else 0
+        num_occurrences = self.keyword_count(ngram)
         debug.trace_fmt(BDL + 1, "tf_freq({ng}): num_occ={no} len(self)={l} result={r}",
                         ng=ngram, no=num_occurrences, l=len(self), r=num_occurrences)
         return num_occurrences
@@ -197,6 +309,9 @@ class Document(object):
     @property
     def keywords(self):
         """Use the preprocessor to yield keywords from the source text."""
+        if self.__ngram_spans is not None:
+            return (DocKeyword(ngram, document=self, start=start, end=end)
+                    for (ngram, start, end) in self.__ngram_spans)
         return self.preprocessor.yield_keywords(self.text, document=self)
 
 
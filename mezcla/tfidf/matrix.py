@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+
+"""Vectorized TF-IDF scoring via a sparse term-document count matrix.
+
+The Corpus is compiled into a vocabulary plus a CSR matrix of ngram counts
+(one row per document), so that the TF and IDF weights for all documents can
+be computed in one pass with NumPy rather than per ngram via Document.tf and
+Corpus.idf. The scores are meant to match those of Corpus.get_keywords.
+
+Example:
+    >>> import mezcla.tfidf.corpus as mtc
+    >>> import mezcla.tfidf.matrix as mtm
+    >>> c = mtc.Corpus(gramsize=2)
+    >>> c['doc1'] = 'Mary had a little lamb.'
+    >>> c['doc2'] = 'Hannible is not a lamb.'
+    >>> c['doc3'] = 'The shark sleeps a little.'
+    >>> m = mtm.CorpusMatrix(c)
+    >>> m.shape
+    (3, 11)
+    >>> [kw.ngram for kw in m.get_keywords('doc1', limit=2)]
+    ['mary had', 'had a']
+"""
+
+# Standard modules
+from array import array
+
+# Installed modules
+import numpy as np
+from scipy import sparse
+
+# Local modules
+from mezcla import debug
+from mezcla import system
+from mezcla.tfidf.config import BASE_DEBUG_LEVEL as BDL
+from mezcla.tfidf import corpus as tfidf_corpus
+from mezcla.tfidf import document as tfidf_document
+
+TF_WEIGHTS = ('basic', 'norm', 'log', 'norm_50', 'binary', 'freq')
+IDF_WEIGHTS = ('basic', 'freq', 'smooth', 'max', 'prob')
+
+
+class CorpusMatrix(object):
+    """Compiled term-document count matrix for a Corpus, used for vectorized scoring
+    Note: This is a snapshot, so it must be recompiled if the corpus changes.
+    """
+
+    def __init__(self, corpus):
+        """Compile CORPUS into vocabulary and CSR matrix of ngram counts"""
+        debug.trace(BDL + 1, f"CorpusMatrix.__init__({corpus})")
+        self.corpus = corpus
+        self.doc_ids = list(corpus.keys())
+        self.doc_index = {doc_id: i for (i, doc_id) in enumerate(self.doc_ids)}
+        self.vocab = {}
+        indptr = array('l', [0])
+        indices = array('l')
+        data = array('l')
+        for doc_id in self.doc_ids:
+            # note: columns within a row follow keywordset order, as with get_keywords
+            for ngram, count in corpus[doc_id].keyword_counts():
+                indices.append(self.vocab.setdefault(ngram, len(self.vocab)))
+                data.append(count)
+            indptr.append(len(indices))
+        self.ngrams = list(self.vocab)
+        self.counts = sparse.csr_matrix(
+            (np.frombuffer(data, dtype=data.typecode),
+             np.frombuffer(indices, dtype=indices.typecode),
+             np.frombuffer(indptr, dtype=indptr.typecode)),
+            shape=(len(self.doc_ids), len(self.vocab)))
+        # note: nonzero row positions and column entries line up with counts.data
+        # (n.b., scipy reductions like max can sort the indices, so numpy is used instead)
+        self.rows = np.repeat(np.arange(len(self.doc_ids)), np.diff(self.counts.indptr))
+        self.doc_freq = np.bincount(self.counts.indices, minlength=len(self.vocab))
+        self.score_cache = {}
+        debug.trace(BDL, f"CorpusMatrix: {len(self.doc_ids)} docs; {len(self.vocab)} ngrams; {self.counts.nnz} non-zero")
+
+    @property
+    def shape(self):
+        """Dimensions of the count matrix: (number of documents, vocabulary size)"""
+        return self.counts.shape
+
+    def tf_values(self, tf_weight='basic'):
+        """Return TF values aligned with the non-zero entries of the count matrix.
+        Note: see Document.tf for the weighting schemes."""
+        if tf_weight == 'norm':
+            tf_weight = 'basic'
+        counts = self.counts.data.astype(float)
+        if tf_weight == 'freq':
+            return counts
+        if tf_weight == 'binary':
+            return np.ones_like(counts)
+        if tf_weight not in TF_WEIGHTS:
+            raise ValueError("Invalid tf_weight: " + tf_weight)
+        # note: document length is total ngram count, prior to singleton penalty
+        doc_len = np.bincount(self.rows, weights=counts, minlength=len(self.doc_ids))
+        num_occurrences = counts
+        if tfidf_document.PENALIZE_SINGLETONS:
+            num_occurrences = np.where(counts == 1, 0.0, counts)
+        tf_raw = num_occurrences / doc_len[self.rows]
+        if tf_weight == 'basic':
+            return tf_raw
+        if tf_weight == 'log':
+            with np.errstate(divide='ignore'):
+                return 1 + np.log(tf_raw)
+        # norm_50
+        doc_max = np.zeros(len(self.doc_ids))
+        np.maximum.at(doc_max, self.rows, counts)
+        return 0.5 + (0.5 * (tf_raw / doc_max[self.rows]))
+
+    def idf_values(self, idf_weight='basic'):
+        """Return IDF values for each ngram in the vocabulary.
+        Note: see Corpus.idf for the weighting schemes."""
+        num_docs = float(len(self.doc_ids))
+        counts = self.doc_freq * (1 + tfidf_corpus.NGRAM_EPSILON)
+        if tfidf_corpus.PENALIZE_SINGLETONS:
+            counts = np.where(counts == 1, 0.0, counts)
+        counts = np.where(counts == 0, tfidf_corpus.NGRAM_EPSILON, counts)
+        if idf_weight == 'basic':
+            result = np.log(num_docs / counts)
+        elif idf_weight == 'freq':
+            result = 1 / counts
+        elif idf_weight == 'smooth':
+            result = np.log(1 + (num_docs / counts))
+        elif idf_weight == 'max':
+            result = np.log(1 + self.corpus.max_raw_frequency / counts)
+        elif idf_weight == 'prob':
+            ratio = ((num_docs - counts) / counts) + tfidf_corpus.MISC_EPSILON
+            # note: math.log domain errors are treated as 0 by Corpus.idf_probabilistic
+            with np.errstate(divide='ignore', invalid='ignore'):
+                result = np.where(ratio > 0, np.log(np.where(ratio > 0, ratio, 1)), 0.0)
+        else:
+            raise ValueError("Invalid idf_weight: " + idf_weight)
+        return result
+
+    def scores(self, tf_weight='basic', idf_weight='basic'):
+        """Return CSR matrix of TF-IDF scores for all documents using TF_WEIGHT and IDF_WEIGHT"""
+        key = (tf_weight, idf_weight)
+        if key not in self.score_cache:
+            values = self.tf_values(tf_weight) * self.idf_values(idf_weight)[self.counts.indices]
+            if tfidf_corpus.TFIDF_NGRAM_LEN_WEIGHT:
+                ngram_len = np.array([len(ngram.split()) for ngram in self.ngrams])
+                values = values * (tfidf_corpus.TFIDF_NGRAM_LEN_WEIGHT ** ngram_len)[self.counts.indices]
+            self.score_cache[key] = sparse.csr_matrix(
+                (values, self.counts.indices, self.counts.indptr), shape=self.counts.shape)
+        return self.score_cache[key]
+
+    def top_positions(self, row_scores, limit):
+        """Return offsets for top LIMIT of ROW_SCORES in descending order
+        Note: ties are resolved by position, as with a stable sort."""
+        num = len(row_scores)
+        if limit < num:
+            kth = row_scores[np.argpartition(-row_scores, limit - 1)[limit - 1]]
+            higher = np.flatnonzero(row_scores > kth)
+            ties = np.flatnonzero(row_scores == kth)[:limit - len(higher)]
+            positions = np.concatenate((higher, ties))
+        else:
+            positions = np.arange(num)
+        return positions[np.lexsort((positions, -row_scores[positions]))]
+
+    def get_keywords(self, document_id, idf_weight='basic', tf_weight='basic', limit=100):
+        """Return list of CorpusKeyword tuples for DOCUMENT_ID with top LIMIT TF-IDF scores
+        Note: analogous to Corpus.get_keywords"""
+        doc_num = self.doc_index[document_id]
+        score_matrix = self.scores(tf_weight=tf_weight, idf_weight=idf_weight)
+        start, end = score_matrix.indptr[doc_num], score_matrix.indptr[doc_num + 1]
+        row_scores = score_matrix.data[start:end]
+        row_ngrams = score_matrix.indices[start:end]
+        document = self.corpus[document_id]
+        result = []
+        for pos in self.top_positions(row_scores, limit):
+            ngram = self.ngrams[row_ngrams[pos]]
+            result.append(tfidf_corpus.CorpusKeyword(document[ngram], ngram, float(row_scores[pos])))
+        debug.trace(BDL + 3, f"CorpusMatrix.get_keywords({document_id!r}) => {result}")
+        return result
+
+    def get_all_keywords(self, idf_weight='basic', tf_weight='basic', limit=100):
+        """Return hash from document ID to list of top keywords (see get_keywords)"""
+        return {doc_id: self.get_keywords(doc_id, idf_weight=idf_weight, tf_weight=tf_weight, limit=limit)
+                for doc_id in self.doc_ids}
+
+#-------------------------------------------------------------------------------
+
+def main():
+    """Entry point for script: just runs a simple test"""
+    c = tfidf_corpus.Corpus(min_ngram_size=1, max_ngram_size=2)
+    c["d1"] = "abc def ghi"
+    c["d2"] = "abc def jkl"
+    m = CorpusMatrix(c)
+    for (tf_weight, idf_weight) in [("basic", "basic"), ("log", "smooth")]:
+        old = [(k.ngram, system.round_num(k.score)) for k in c.get_keywords("d1", tf_weight=tf_weight, idf_weight=idf_weight)]
+        new = [(k.ngram, system.round_num(k.score)) for k in m.get_keywords("d1", tf_weight=tf_weight, idf_weight=idf_weight)]
+        debug.trace_expr(BDL - 3, tf_weight, idf_weight, old, new)
+        debug.assertion(old == new)
+
+#-------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    system.print_stderr(f"Warning: {__file__} is not intended to be run standalone. A simple test will be run.")
+    main()
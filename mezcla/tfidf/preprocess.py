@@ -262,7 +262,8 @@ class Preprocessor(object):
             self.__stemmer = lambda x: x  # no change to word
         if use_sklearn_counter is None:
             use_sklearn_counter = USE_SKLEARN_COUNTER
-        self.use_sklearn_counter = USE_SKLEARN_COUNTER
+        ## OLD: self.use_sklearn_counter = USE_SKLEARN_COUNTER
+        self.use_sklearn_counter = use_sklearn_counter
         debug.assertion(not (gramsize and max_ngram_size))
         debug.assertion(not (all_ngrams and min_ngram_size))
         self.__gramsize = (max_ngram_size or gramsize or 1)
@@ -310,6 +311,46 @@ class Preprocessor(object):
             out.append(word)
         return ' '.join(out)
 
+    def is_stopword(self, word):
+        """Whether WORD is a stopword, ignoring common contractions"""
+        check_me = re.sub(self.contractions, '', word)
+        return check_me in self.stopwords
+
+    def trailing_context(self, text):
+        """Return suffix of TEXT with words that can start an ngram continued by appended text.
+        This is the last (gramsize - 1) non-stopwords of the final sentence, if not
+        terminated by a gram break (e.g., comma); the result is a substring of TEXT.
+        Notes:
+        - Only supported for the simple sentence splitter (i.e., not TFIDF_SENT_SPLITTER).
+        - With the sklearn counter, this is just the last (gramsize - 1) tokens, as its
+          ngrams don't respect gram breaks or stopwords.
+        """
+        # EX: Preprocessor(gramsize=3).trailing_context("a, b c d") => "c d"
+        # EX: Preprocessor(gramsize=3).trailing_context("b c.") => ""
+        result = ""
+        num_words = (self.gramsize - 1)
+        if self.use_sklearn_counter:
+            # note: uses default CountVectorizer token_pattern (see quick_yield_ngram_spans)
+            tokens = list(re.finditer(r"(?u)\b\w\w+\b", text)) if (num_words > 0) else []
+            result = (text[tokens[-num_words:][0].start():] if tokens else "")
+            debug.trace(BDL + 2, f"trailing_context({text!r}) => {result!r}")
+            return result
+        if not USE_SIMPLE_SENT_SPLITTER:
+            debug.trace(BDL - 1, "Warning: trailing_context not supported with NLTK sentence splitting")
+            num_words = 0
+        last_sentence = None
+        if (num_words > 0):
+            for last_sentence in positional_splitter(self.negative_gram_breaks, text):
+                pass
+        if last_sentence and (last_sentence.end == len(text)):
+            words = [w for w in positional_splitter(WORD_REGEX, last_sentence.text)
+                     if not self.is_stopword(w.text)]
+            if words:
+                start = words[-num_words:][0].start
+                result = last_sentence.text[start:]
+        debug.trace(BDL + 2, f"trailing_context({text!r}) => {result!r}")
+        return result
+
     def normalize_term(self, text):
         """Cleans the text characters (optional), removes stopwords, and applies stemming
 
@@ -364,8 +405,22 @@ class Preprocessor(object):
         TRACE_LEVEL = (REGEX_TRACE_LEVEL + 1)
         return my_re.search(regex, text, base_trace_level=TRACE_LEVEL)
     
+    def yield_ngram_spans(self, raw_text):
+        """Yield (ngram, start, end) tuples for RAW_TEXT, as with yield_keywords
+        Note: The offsets are None if not supported (e.g., sklearn counter)."""
+        if self.use_sklearn_counter:
+            result = self.quick_yield_ngram_spans(raw_text)
+        else:
+            result = self.full_yield_ngram_spans(raw_text)
+        return result
+
     def full_yield_keywords(self, raw_text, document=None):
         """Full-featured version of keyword generation, including support for offsets"""
+        for (ngram, start, end) in self.full_yield_ngram_spans(raw_text):
+            yield DocKeyword(ngram, document=document, start=start, end=end)
+
+    def full_yield_ngram_spans(self, raw_text):
+        """Helper to full_yield_keywords that yields (ngram, start, end) tuples"""
         if sys.version_info[0] < 3:  # python2 support
             if isinstance(raw_text, str):
                 raw_text = raw_text.decode('utf-8', 'ignore')
@@ -388,12 +443,7 @@ class Preprocessor(object):
             debug.trace_expr(BDL + 2, sentence.text)
             words = positional_splitter(WORD_REGEX, sentence.text)
             # Remove all stopwords
-            words_no_stopwords = []
-            for w in words:
-                # Remove common contractions for stopwords when checking list
-                check_me = re.sub(self.contractions, '', w.text)
-                if check_me not in self.stopwords:
-                    words_no_stopwords.append(w)
+            words_no_stopwords = [w for w in words if not self.is_stopword(w.text)]
             if debug.debugging(BDL + 2):
                 words_text_no_stopwords = [w.text for w in words_no_stopwords]
                 debug.trace_expr(BDL + 2, words_text_no_stopwords)
@@ -421,7 +471,7 @@ class Preprocessor(object):
                         if not exclude:
                             word_global_start = sentence.start + word_list[0].start
                             word_global_end = sentence.start + word_list[-1].end
-                            yield DocKeyword(word_text, document=document, start=word_global_start, end=word_global_end)
+                            yield (word_text, word_global_start, word_global_end)
                         else:
                             debug.trace(BDL + 3, f"Ignoring {gramsize}-gram {word_text!r}")
         return
@@ -429,6 +479,11 @@ class Preprocessor(object):
     def quick_yield_keywords(self, raw_text, document=None):
         """Quick version for yielding keywords, using sklearn for ngram generation
         Note: the DocKeyword objects don't include offset information"""
+        for (ngram, _start, _end) in self.quick_yield_ngram_spans(raw_text):
+            yield DocKeyword(ngram, document=document)
+
+    def quick_yield_ngram_spans(self, raw_text):
+        """Helper to quick_yield_keywords that yields (ngram, None, None) tuples"""
         # TODO1: support BAD_WORD_PUNCT_REGEX
         # Do dynamic load(s)
         global CountVectorizer
@@ -440,7 +495,7 @@ class Preprocessor(object):
         ## DEBUG: debug.trace_expr(8, analyzer)
         for ngram in analyzer(raw_text):
             ## DEBUG: debug.trace_expr(9, ngram)
-            yield DocKeyword(ngram, document=document)
+            yield (ngram, None, None)
         return
 
 
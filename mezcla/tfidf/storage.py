@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+
+"""Versioned binary format for TF-IDF corpora, supporting memory-mapped loading.
+
+The file contains the vocabulary (sorted UTF-8 ngrams), the document frequency (DF)
+array, and the per-document ngram counts in CSR form (i.e., indptr, indices, and
+counts). The arrays are read via numpy.memmap, so a large corpus can be opened
+without parsing it, and the pages are shared by processes using the same file.
+
+Layout:
+    magic (8 bytes) | version (<u4) | header length (<u4) | JSON header | sections
+where the header gives the dtype, offset, and length of each section (relative to
+the first section, which is 8-byte aligned).
+
+Example:
+    >>> import os, tempfile
+    >>> import mezcla.tfidf.corpus as mtc
+    >>> c = mtc.Corpus(gramsize=1)
+    >>> c['doc1'] = 'red green red'
+    >>> c['doc2'] = 'red blue'
+    >>> path = os.path.join(tempfile.mkdtemp(), 'corpus.tfidf')
+    >>> c.save(path)
+    >>> c2 = mtc.Corpus.load(path)
+    >>> (list(c2.keys()), c2['doc1'].tf_freq('red'), c2.document_occurrences['red'])
+    (['doc1', 'doc2'], 2, 2)
+"""
+
+# Standard modules
+from collections.abc import Mapping
+import json
+import struct
+
+# Installed modules
+import numpy as np
+
+# Local modules
+from mezcla import debug
+from mezcla import system
+from mezcla.tfidf.config import BASE_DEBUG_LEVEL as BDL
+from mezcla.tfidf.dockeyword import DocKeyword, KeywordStore
+from mezcla.tfidf.document import Document
+
+# Constants
+FORMAT_MAGIC = b"MZTFIDF\x00"
+FORMAT_VERSION = 1
+PREFIX_FORMAT = "<8sII"
+ALIGNMENT = 8
+# note: dtypes are explicitly little-endian for portability
+SECTION_DTYPES = {
+    "vocab_offsets": "<i8",
+    "vocab_data": "|u1",
+    "doc_id_offsets": "<i8",
+    "doc_id_data": "|u1",
+    "doc_id_order": "<i8",
+    "doc_freq": "<i8",
+    "indptr": "<i8",
+    "indices": "<i4",
+    "counts": "<i4",
+}
+
+
+def _align(offset):
+    """Round OFFSET up to multiple of ALIGNMENT"""
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _encode_strings(strings):
+    """Return (offsets, data) arrays for STRINGS encoded as UTF-8"""
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=SECTION_DTYPES["vocab_offsets"])
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    data = np.frombuffer(b"".join(encoded), dtype=SECTION_DTYPES["vocab_data"])
+    return (offsets, data)
+
+
+def save_corpus(corpus, path):
+    """Save CORPUS to PATH in the binary format
+    Note: document IDs are saved as strings, and ngram locations are not saved."""
+    debug.trace(BDL, f"save_corpus({corpus}, {path!r})")
+    # note: vocabulary sorted by UTF-8 encoding to allow binary search
+    ngrams = sorted(corpus.document_occurrences, key=lambda ngram: ngram.encode("utf-8"))
+    ngram_ids = {ngram: i for (i, ngram) in enumerate(ngrams)}
+    doc_ids = [str(doc_id) for doc_id in corpus.keys()]
+    indptr = [0]
+    indices = []
+    counts = []
+    max_raw_frequency = 0
+    for doc_id in corpus.keys():
+        # note: row order follows keywordset order (e.g., for get_keywords ties)
+        for (ngram, count) in corpus[doc_id].keyword_counts():
+            indices.append(ngram_ids[ngram])
+            counts.append(count)
+            max_raw_frequency = max(max_raw_frequency, count)
+        indptr.append(len(indices))
+    vocab_offsets, vocab_data = _encode_strings(ngrams)
+    doc_id_offsets, doc_id_data = _encode_strings(doc_ids)
+    sections = {
+        "vocab_offsets": vocab_offsets,
+        "vocab_data": vocab_data,
+        "doc_id_offsets": doc_id_offsets,
+        "doc_id_data": doc_id_data,
+        "doc_id_order": sorted(range(len(doc_ids)), key=lambda i: doc_ids[i].encode("utf-8")),
+        "doc_freq": np.array([corpus.document_occurrences[ngram] for ngram in ngrams],
+                             dtype=SECTION_DTYPES["doc_freq"]),
+        "indptr": indptr,
+        "indices": indices,
+        "counts": counts,
+    }
+
+    # Determine section layout and write header followed by the sections
+    header = {
+        "num_documents": len(doc_ids),
+        "num_ngrams": len(ngrams),
+        "max_raw_frequency": max_raw_frequency,
+        "max_doc_occurrences": int(sections["doc_freq"].max()) if ngrams else 0,
+        "min_ngram_size": corpus.preprocessor.min_ngram_size,
+        "max_ngram_size": corpus.preprocessor.gramsize,
+        "sections": {},
+    }
+    offset = 0
+    for (name, values) in sections.items():
+        values = np.asarray(values, dtype=SECTION_DTYPES[name])
+        sections[name] = values
+        header["sections"][name] = [SECTION_DTYPES[name], offset, len(values)]
+        offset = _align(offset + values.nbytes)
+    header_data = json.dumps(header).encode("utf-8")
+    with open(path, "wb") as fh:
+        fh.write(struct.pack(PREFIX_FORMAT, FORMAT_MAGIC, FORMAT_VERSION, len(header_data)))
+        fh.write(header_data)
+        data_start = _align(fh.tell())
+        for (name, values) in sections.items():
+            fh.seek(data_start + header["sections"][name][1])
+            fh.write(values.tobytes())
+        # note: pads so final section is within the file even if empty
+        fh.seek(data_start + offset)
+        fh.truncate()
+    debug.trace(BDL, f"Saved {len(doc_ids)} docs and {len(ngrams)} ngrams to {path}")
+
+
+class MappedCorpusData(object):
+    """Memory-mapped arrays for corpus saved via save_corpus"""
+
+    def __init__(self, path):
+        """Open corpus file at PATH via numpy.memmap"""
+        debug.trace(BDL, f"MappedCorpusData.__init__({path!r})")
+        self.path = path
+        self.buffer = np.memmap(path, dtype=np.uint8, mode="r")
+        prefix_size = struct.calcsize(PREFIX_FORMAT)
+        if len(self.buffer) < prefix_size:
+            raise ValueError(f"Not a TF-IDF corpus file: {path}")
+        (magic, version, header_len) = struct.unpack(PREFIX_FORMAT, self.buffer[:prefix_size].tobytes())
+        if magic != FORMAT_MAGIC:
+            raise ValueError(f"Not a TF-IDF corpus file: {path}")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported TF-IDF corpus format version {version} (expected {FORMAT_VERSION}): {path}")
+        self.header = json.loads(self.buffer[prefix_size: prefix_size + header_len].tobytes())
+        data_start = _align(prefix_size + header_len)
+        # note: sections are plain ndarray views, avoiding memmap overhead for element access
+        buffer = self.buffer.view(np.ndarray)
+        for (name, (dtype, offset, length)) in self.header["sections"].items():
+            start = data_start + offset
+            section = buffer[start: start + (length * np.dtype(dtype).itemsize)].view(dtype)
+            setattr(self, name, section)
+        self.num_documents = self.header["num_documents"]
+        self.num_ngrams = self.header["num_ngrams"]
+        self.max_raw_frequency = self.header["max_raw_frequency"]
+        self.max_doc_occurrences = self.header["max_doc_occurrences"]
+
+    def ngram(self, ngram_id):
+        """Return ngram for NGRAM_ID"""
+        return self.vocab_data[self.vocab_offsets[ngram_id]: self.vocab_offsets[ngram_id + 1]].tobytes().decode("utf-8")
+
+    def doc_id(self, row):
+        """Return document ID for ROW"""
+        return self.doc_id_data[self.doc_id_offsets[row]: self.doc_id_offsets[row + 1]].tobytes().decode("utf-8")
+
+    def _search(self, key, num, offsets, data, order=None):
+        """Binary search for KEY (bytes) among NUM strings given by OFFSETS into DATA,
+        optionally via ORDER permutation; returns the position or -1 if not found"""
+        (low, high) = (0, num)
+        while low < high:
+            mid = (low + high) // 2
+            pos = (mid if (order is None) else order[mid])
+            value = data[offsets[pos]: offsets[pos + 1]].tobytes()
+            if value < key:
+                low = mid + 1
+            elif value > key:
+                high = mid
+            else:
+                return int(pos)
+        return -1
+
+    def ngram_id(self, ngram):
+        """Return ID for NGRAM or -1 if not in vocabulary"""
+        return self._search(ngram.encode("utf-8"), self.num_ngrams, self.vocab_offsets, self.vocab_data)
+
+    def doc_row(self, doc_id):
+        """Return row for DOC_ID or -1 if not present"""
+        return self._search(str(doc_id).encode("utf-8"), self.num_documents,
+                            self.doc_id_offsets, self.doc_id_data, order=self.doc_id_order)
+
+
+class MappedKeywords(Mapping):
+    """Read-only keywordset for a document row of MappedCorpusData, used in place of
+    KeywordStore (i.e., supports count and item_counts). There are no locations.
+    Note: The ngram counts are put in a hash on first lookup (e.g., for per-ngram tf calls)."""
+    __slots__ = ('data', 'indices', 'counts', 'ngram_counts')
+
+    def __init__(self, data, row):
+        self.data = data
+        self.indices = data.indices[data.indptr[row]: data.indptr[row + 1]]
+        self.counts = data.counts[data.indptr[row]: data.indptr[row + 1]]
+        self.ngram_counts = None
+
+    def count(self, ngram):
+        """Number of occurrences of NGRAM (0 if not present)"""
+        ## OLD: positions = np.flatnonzero(self.indices == self.data.ngram_id(ngram))
+        if self.ngram_counts is None:
+            self.ngram_counts = dict(self.item_counts())
+        return self.ngram_counts.get(ngram, 0)
+
+    def item_counts(self):
+        """Iterator over (ngram, count) pairs"""
+        return zip(self, self.counts.tolist())
+
+    @staticmethod
+    def _keyword(ngram, count):
+        """Return DocKeyword for NGRAM with COUNT"""
+        keyword = DocKeyword(ngram, skip_location=True, add_dummy_location=False)
+        keyword.count = count
+        return keyword
+
+    def get(self, ngram, default=None):
+        """Return DocKeyword for NGRAM or DEFAULT"""
+        count = self.count(ngram)
+        if not count:
+            return default
+        return self._keyword(ngram, count)
+
+    def items(self):
+        """Iterator over (ngram, DocKeyword) pairs (i.e., without per-ngram lookup)"""
+        return ((ngram, self._keyword(ngram, count)) for (ngram, count) in self.item_counts())
+
+    def __getitem__(self, ngram):
+        keyword = self.get(ngram)
+        if keyword is None:
+            raise KeyError(ngram)
+        return keyword
+
+    def __contains__(self, ngram):
+        return (self.count(ngram) > 0)
+
+    def __iter__(self):
+        return (self.data.ngram(ngram_id) for ngram_id in self.indices.tolist())
+
+    def __len__(self):
+        return len(self.indices)
+
+    def to_keyword_store(self):
+        """Return modifiable KeywordStore version (without locations)"""
+        store = KeywordStore(skip_location=True)
+        for (ngram, count) in self.item_counts():
+            store.add(ngram, count=count)
+        return store
+
+
+class MappedDocuments(Mapping):
+    """Read-only mapping from document ID to Document view over MappedCorpusData
+    Note: The last document accessed is cached (e.g., for repeated per-ngram calls)."""
+
+    def __init__(self, data, preprocessor):
+        self.data = data
+        self.preprocessor = preprocessor
+        self.last = (None, None)
+
+    def get(self, doc_id, default=None):
+        """Return Document for DOC_ID or DEFAULT"""
+        if (self.last[0] == doc_id) and (self.last[1] is not None):
+            return self.last[1]
+        row = self.data.doc_row(doc_id)
+        if row < 0:
+            return default
+        document = Document.from_keywordset("", MappedKeywords(self.data, row), self.preprocessor)
+        self.last = (doc_id, document)
+        return document
+
+    def __getitem__(self, doc_id):
+        document = self.get(doc_id)
+        if document is None:
+            raise KeyError(doc_id)
+        return document
+
+    def __contains__(self, doc_id):
+        return (self.data.doc_row(doc_id) >= 0)
+
+    def keys(self):
+        """Document IDs in the original order"""
+        return [self.data.doc_id(row) for row in range(self.data.num_documents)]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return self.data.num_documents
+
+
+class MappedDocFrequency(Mapping):
+    """Read-only mapping from ngram to document frequency over MappedCorpusData"""
+
+    def __init__(self, data):
+        self.data = data
+
+    def get(self, ngram, default=None):
+        """Return DF for NGRAM or DEFAULT"""
+        ngram_id = self.data.ngram_id(ngram)
+        return (int(self.data.doc_freq[ngram_id]) if (ngram_id >= 0) else default)
+
+    def __getitem__(self, ngram):
+        result = self.get(ngram)
+        if result is None:
+            raise KeyError(ngram)
+        return result
+
+    def __contains__(self, ngram):
+        return (self.data.ngram_id(ngram) >= 0)
+
+    def __iter__(self):
+        return (self.data.ngram(ngram_id) for ngram_id in range(self.data.num_ngrams))
+
+    def items(self):
+        """(ngram, DF) pairs"""
+        return zip(self, self.data.doc_freq.tolist())
+
+    def __len__(self):
+        return self.data.num_ngrams
+
+#-------------------------------------------------------------------------------
+
+def main():
+    """Entry point for script: just runs a simple test"""
+    # pylint: disable=import-outside-toplevel
+    from mezcla import glue_helpers as gh
+    from mezcla.tfidf.corpus import Corpus
+    c = Corpus(min_ngram_size=1, max_ngram_size=2)
+    c["d1"] = "abc def ghi"
+    c["d2"] = "abc def jkl"
+    path = gh.get_temp_file() + ".tfidf"
+    c.save(path)
+    c2 = Corpus.load(path)
+    old = [(k.ngram, system.round_num(k.score)) for k in c.get_keywords("d1")]
+    new = [(k.ngram, system.round_num(k.score)) for k in c2.get_keywords("d1")]
+    debug.trace_expr(BDL - 3, old, new)
+    debug.assertion(old == new)
+
+#-------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    system.print_stderr(f"Warning: {__file__} is not intended to be run standalone. A simple test will be run.")
+    main()
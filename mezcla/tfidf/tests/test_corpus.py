@@ -118,7 +118,56 @@ class TestPreprocess(TestWrapper):
         # Check for missing docs
         self.do_assert(len(self.corp.get_keywords('doc_-1')) == 0,
                        "Missing documents should return empty list")
-        
+
+    def test_10_df_index_replacement(self):
+        """Make sure document frequency index is updated when documents replaced"""
+        self.monkeypatch.setattr(THE_MODULE, "NGRAM_EPSILON", 0)
+        corp = THE_MODULE.Corpus(preprocessor=Preprocessor(gramsize=1, stemmer=lambda x: x))
+        corp["d1"] = "red green blue"
+        corp["d2"] = "red green"
+        corp["d3"] = "red"
+        assert corp.df_freq("red") == 3
+        assert corp.df_freq("green") == 2
+        assert corp.max_doc_frequency == 3
+        # note: replacing and deleting decrements the counts
+        corp["d3"] = "blue"
+        assert corp.df_freq("red") == 2
+        assert corp.df_freq("blue") == 2
+        assert corp.max_doc_frequency == 2
+        del corp["d1"]
+        assert corp.df_freq("green") == 1
+        assert corp.max_doc_frequency == 1
+        assert corp.max_rel_doc_frequency == 0.5
+        assert "d1" not in corp
+
+    def test_11_append_text(self):
+        """Make sure incremental appends update document frequency"""
+        self.monkeypatch.setattr(THE_MODULE, "NGRAM_EPSILON", 0)
+        corp = THE_MODULE.Corpus(preprocessor=Preprocessor(gramsize=1, stemmer=lambda x: x))
+        corp.append_text("d1", "red green")
+        corp.append_text("d2", "red")
+        corp.append_text("d1", "red blue", keep_text=False)
+        assert corp.df_freq("red") == 2
+        assert corp.df_freq("blue") == 1
+        assert corp["d1"].tf_freq("red") == 2
+        assert list(corp.keys()) == ["d1", "d2"]
+
+    def test_12_add_documents(self):
+        """Make sure parallel add_documents matches serial ingestion"""
+        docs = [("d1", "The dog and the fox."), ("d2", "A fox jumped over the dog"),
+                ("d3", "The <b>lazy</b> dog slept"), ("d1", "Dogs and foxes")]
+        preprocessor = Preprocessor(min_ngram_size=1, max_ngram_size=2, stemmer=lambda x: x)
+        serial_corp = THE_MODULE.Corpus(preprocessor=preprocessor)
+        serial_corp.add_documents(docs, workers=1)
+        parallel_corp = THE_MODULE.Corpus(preprocessor=preprocessor)
+        parallel_corp.add_documents(docs, workers=2, chunksize=1)
+        assert list(parallel_corp.keys()) == ["d1", "d2", "d3"]
+        assert parallel_corp.document_occurrences == serial_corp.document_occurrences
+        for doc_id in serial_corp.keys():
+            assert parallel_corp[doc_id].text == serial_corp[doc_id].text
+            assert dict(parallel_corp[doc_id].keyword_counts()) == dict(serial_corp[doc_id].keyword_counts())
+        assert parallel_corp["d2"]["fox"].original_texts == ["fox"]
+
 # ------------------------------------------------------------------------
 
 if __name__ == "__main__":
@@ -115,6 +115,49 @@ class TestPreprocess(TestWrapper):
     def test_07_len(self):
         """Tests the length of the document is calculated correctly"""
         assert len(self.doc) == 7
+
+    def test_08_compact_keywords(self):
+        """Make sure compact keyword store gives same results as regular one"""
+        preprocessor = Preprocessor(min_ngram_size=1, max_ngram_size=2, stemmer=lambda x: x)
+        regular_doc = THE_MODULE.Document(self.text, preprocessor, compact=False)
+        compact_doc = THE_MODULE.Document(self.text, preprocessor, compact=True)
+        assert list(compact_doc.keywordset) == list(regular_doc.keywordset)
+        assert len(compact_doc) == len(regular_doc)
+        assert compact_doc.max_raw_frequency == regular_doc.max_raw_frequency == 2
+        for ngram in ["man", "my man", "fran", "peter"]:
+            for tf_weight in ["basic", "binary", "freq", "norm_50"]:
+                assert compact_doc.tf(ngram, tf_weight) == regular_doc.tf(ngram, tf_weight)
+        keyword = compact_doc["man"]
+        assert len(keyword) == 2
+        assert keyword.original_texts == regular_doc["man"].original_texts == ["man"]
+        assert compact_doc["peter"] == ""
+
+    def test_09_append_text(self):
+        """Make sure incremental appends match keywords for the combined text"""
+        preprocessor = Preprocessor(min_ngram_size=1, max_ngram_size=3, language='english')
+        rows = ["The dog and the fox", "jumped over a cat, then", "", "the fox ran."]
+        full_doc = THE_MODULE.Document(" ".join(rows), preprocessor)
+        streamed_doc = THE_MODULE.Document("", preprocessor, compact=True)
+        new_ngrams = []
+        for row in rows:
+            new_ngrams += streamed_doc.append_text(row, keep_text=False)
+        assert dict(streamed_doc.keyword_counts()) == dict(full_doc.keyword_counts())
+        assert sorted(new_ngrams) == sorted(full_doc.keywordset)
+        assert "fox jump" in streamed_doc
+        assert not streamed_doc.text
+
+    def test_10_append_text_sklearn(self):
+        """Make sure incremental appends work with sklearn counter (i.e., without offsets)"""
+        preprocessor = Preprocessor(min_ngram_size=1, max_ngram_size=3, use_sklearn_counter=True)
+        rows = ["The dog and the fox", "jumped over a cat. Then", "", "the fox ran the dog"]
+        full_doc = THE_MODULE.Document(" ".join(rows), preprocessor, compact=True)
+        streamed_doc = THE_MODULE.Document("", preprocessor, compact=True)
+        new_ngrams = []
+        for row in rows:
+            new_ngrams += streamed_doc.append_text(row, keep_text=False)
+        assert dict(streamed_doc.keyword_counts()) == dict(full_doc.keyword_counts())
+        assert sorted(new_ngrams) == sorted(full_doc.keywordset)
+        assert "cat then the" in streamed_doc
         
     
     
@@ -0,0 +1,84 @@
+#! /usr/bin/env python3
+#
+# Test(s) for ../matrix.py
+
+"""Tests for tfidf matrix submodule"""
+
+# Standard packages
+## NOTE: this is empty for now
+
+# Installed modules
+import pytest
+
+# Local modules
+from mezcla.unittest_wrapper import TestWrapper
+from mezcla import debug
+from mezcla import misc_utils
+from mezcla.tfidf.corpus import Corpus
+from mezcla.tfidf.preprocess import Preprocessor
+
+# Note: Two references are used for the module to be tested:
+#    THE_MODULE:                        global module object
+import mezcla.tfidf.matrix as THE_MODULE
+
+# ------------------------------------------------------------------------
+
+
+class TestCorpusMatrix(TestWrapper):
+    """Class for testcase definition"""
+
+    script_module = TestWrapper.get_testing_module_name(__file__, THE_MODULE)
+    texts = ["The quick brown fox jumps over the lazy dog. The fox is cunning and swift.",
+             "A lazy cat sleeps in the warm sunlight. The cat ignores the playful dog nearby.",
+             "Dogs and foxes are both members of the canine family. Some dogs are as quick as foxes.",
+             "The dog and the fox and the dog again."]
+
+    def new_corpus(self, **kwargs):
+        """Return corpus with sample texts (passing along KWARGS)"""
+        corp = Corpus(preprocessor=Preprocessor(min_ngram_size=1, max_ngram_size=2, language='english'),
+                      **kwargs)
+        for i, text in enumerate(self.texts):
+            corp[f"doc{i + 1}"] = text
+        return corp
+
+    def test_01_matches_corpus(self):
+        """Make sure vectorized scores match those of Corpus.get_keywords for all weightings"""
+        corp = self.new_corpus()
+        corp_matrix = THE_MODULE.CorpusMatrix(corp)
+        assert corp_matrix.shape == (len(self.texts), len(corp.document_occurrences))
+        for tf_weight in THE_MODULE.TF_WEIGHTS:
+            for idf_weight in THE_MODULE.IDF_WEIGHTS:
+                for doc_id in corp.keys():
+                    expected = corp.get_keywords(doc_id, tf_weight=tf_weight, idf_weight=idf_weight, limit=5)
+                    actual = corp_matrix.get_keywords(doc_id, tf_weight=tf_weight, idf_weight=idf_weight, limit=5)
+                    debug.trace_expr(5, tf_weight, idf_weight, expected, actual)
+                    assert [kw.ngram for kw in actual] == [kw.ngram for kw in expected]
+                    assert all(misc_utils.is_close(new.score, old.score)
+                               for (new, old) in zip(actual, expected))
+
+    def test_02_use_matrix(self):
+        """Make sure Corpus delegates to matrix scoring and recompiles after changes"""
+        corp = self.new_corpus(use_matrix=True)
+        keywords = corp.get_keywords("doc4", limit=3)
+        assert len(keywords) == 3
+        assert ([(kw.ngram, kw.score) for kw in keywords] ==
+                [(kw.ngram, kw.score) for kw in corp.matrix.get_keywords("doc4", limit=3)])
+        old_matrix = corp.matrix
+        corp["doc5"] = "cats and more cats"
+        assert corp.matrix is not old_matrix
+        assert corp.matrix.shape[0] == 5
+
+    def test_03_invalid_weight(self):
+        """Make sure bad weighting schemes are flagged"""
+        corp_matrix = THE_MODULE.CorpusMatrix(self.new_corpus())
+        with pytest.raises(ValueError):
+            corp_matrix.scores(tf_weight="bogus")
+        with pytest.raises(ValueError):
+            corp_matrix.scores(idf_weight="bogus")
+
+# ------------------------------------------------------------------------
+
+if __name__ == "__main__":
+
+    debug.trace_current_context()
+    pytest.main([__file__])
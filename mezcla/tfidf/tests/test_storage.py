@@ -0,0 +1,100 @@
+#! /usr/bin/env python3
+#
+# Test(s) for ../storage.py
+
+"""Tests for tfidf storage submodule"""
+
+# Standard packages
+## NOTE: this is empty for now
+
+# Installed modules
+import pytest
+
+# Local modules
+from mezcla.unittest_wrapper import TestWrapper
+from mezcla import debug
+from mezcla import system
+from mezcla.tfidf.corpus import Corpus
+from mezcla.tfidf.preprocess import Preprocessor
+
+# Note: Two references are used for the module to be tested:
+#    THE_MODULE:                        global module object
+import mezcla.tfidf.storage as THE_MODULE
+
+# ------------------------------------------------------------------------
+
+
+class TestCorpusStorage(TestWrapper):
+    """Class for testcase definition"""
+
+    script_module = TestWrapper.get_testing_module_name(__file__, THE_MODULE)
+    texts = ["The quick brown fox jumps over the lazy dog. The fox is cunning and swift.",
+             "A lazy cat sleeps in the warm sunlight. The cat ignores the playful dog nearby.",
+             "Dogs and foxes are both members of the canine family. Some dogs are as quick as foxes.",
+             "The dog and the fox and the dog again."]
+    preprocessor = Preprocessor(min_ngram_size=1, max_ngram_size=2, language='english')
+
+    def new_corpus(self):
+        """Return corpus with sample texts"""
+        corp = Corpus(preprocessor=self.preprocessor)
+        for i, text in enumerate(self.texts):
+            corp[f"doc{i + 1}"] = text
+        return corp
+
+    def saved_corpus(self):
+        """Return (corpus, loaded corpus) pair, saving corpus to temp file"""
+        corp = self.new_corpus()
+        path = self.get_temp_file() + ".tfidf"
+        corp.save(path)
+        return (corp, Corpus.load(path, preprocessor=self.preprocessor))
+
+    def test_01_round_trip(self):
+        """Make sure loaded corpus gives same keywords and frequencies"""
+        corp, loaded_corp = self.saved_corpus()
+        assert list(loaded_corp.keys()) == list(corp.keys())
+        assert "doc2" in loaded_corp and "doc5" not in loaded_corp
+        assert dict(loaded_corp.document_occurrences.items()) == corp.document_occurrences
+        assert loaded_corp.max_doc_frequency == corp.max_doc_frequency
+        for doc_id in corp.keys():
+            assert dict(loaded_corp[doc_id].keyword_counts()) == dict(corp[doc_id].keyword_counts())
+            keywordset = loaded_corp[doc_id].keywordset
+            assert [(ngram, len(kw)) for (ngram, kw) in keywordset.items()] == list(keywordset.item_counts())
+            assert keywordset.count("fox") == corp[doc_id].keyword_count("fox")
+            assert keywordset.count("not-a-word") == 0
+            for idf_weight in ["basic", "smooth", "max"]:
+                expected = corp.get_keywords(doc_id, idf_weight=idf_weight, limit=5)
+                actual = loaded_corp.get_keywords(doc_id, idf_weight=idf_weight, limit=5)
+                debug.trace_expr(5, expected, actual)
+                assert [(kw.ngram, kw.score) for kw in actual] == [(kw.ngram, kw.score) for kw in expected]
+
+    def test_02_modify_loaded(self):
+        """Make sure loaded corpus can be modified"""
+        corp, loaded_corp = self.saved_corpus()
+        for c in [corp, loaded_corp]:
+            c["doc5"] = "cats and more cats"
+            del c["doc1"]
+        assert list(loaded_corp.keys()) == list(corp.keys())
+        assert loaded_corp.document_occurrences == corp.document_occurrences
+        assert loaded_corp.df_freq("cat") == corp.df_freq("cat")
+
+    def test_03_bad_file(self):
+        """Make sure non-corpus files and other versions are flagged"""
+        path = self.get_temp_file()
+        system.write_file(path, "not a corpus")
+        with pytest.raises(ValueError):
+            Corpus.load(path)
+        corp, _loaded_corp = self.saved_corpus()
+        path = self.get_temp_file() + ".tfidf"
+        corp.save(path)
+        data = bytearray(system.read_binary_file(path))
+        data[len(THE_MODULE.FORMAT_MAGIC)] += 1
+        system.write_binary_file(path, bytes(data))
+        with pytest.raises(ValueError, match="version"):
+            Corpus.load(path)
+
+# ------------------------------------------------------------------------
+
+if __name__ == "__main__":
+
+    debug.trace_current_context()
+    pytest.main([__file__])
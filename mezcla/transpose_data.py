@@ -22,6 +22,12 @@
 #
 #   via: ./transpose-data.py --elide --delim=' | ' < sample-transpose-input.data 
 #    
+# Note:
+# - The input is processed in streaming fashion. The column values are buffered
+#   up to a memory budget (see --memory-budget), beyond which blocks are spilled
+#   to a temporary file as per-column stripes that get merged at output time.
+#   This allows for transposing tables larger than available memory.
+#
 # TODO:
 # - Have option to disable use of labels alltogether.
 # - Have option to prefix values with column number.
@@ -37,6 +43,7 @@
 import csv
 import sys
 import argparse
+import tempfile
 
 # Local packages
 from mezcla import debug
@@ -48,7 +55,68 @@ from mezcla.glue_helpers import read_lines
 CSV_FORMAT = system.getenv_bool(
     "CSV_FORMAT", False,
     desc="Use CSV instead of TSV")
+MEMORY_BUDGET = system.getenv_int(
+    "TRANSPOSE_MEMORY_BUDGET", 64 * 1024 * 1024,
+    desc="Approximate bytes of column data to buffer before spilling to disk")
+
+#------------------------------------------------------------------------
+
+class ColumnStriper:
+    """Accumulates table rows as column stripes, spilling blocks to a temp file past a memory budget"""
+
+    def __init__(self, num_columns, delim, memory_budget=None):
+        """Initializer for NUM_COLUMNS with output DELIM and MEMORY_BUDGET (in bytes)"""
+        debug.trace(5, f"ColumnStriper.__init__({num_columns}, {delim!r}, {memory_budget})")
+        self.delim = delim
+        self.memory_budget = (MEMORY_BUDGET if (memory_budget is None) else memory_budget)
+        self.columns = [[] for _i in range(num_columns)]
+        self.buffer_size = 0
+        self.spill_file = None
+        # (offset, length) of each column stripe, per spilled block
+        self.block_offsets = []
+
+    def add_row(self, values):
+        """Add VALUES for next row (one per column)"""
+        for (i, value) in enumerate(values):
+            self.columns[i].append(value)
+            self.buffer_size += len(value) + len(self.delim)
+        if (self.buffer_size > self.memory_budget):
+            self.spill()
 
+    def get_stripe(self, i):
+        """Return buffered values for column I, each prefixed by the delimiter"""
+        return "".join(self.delim + value for value in self.columns[i])
+
+    def spill(self):
+        """Write buffered column stripes to the spill file as a new block"""
+        if not self.spill_file:
+            self.spill_file = tempfile.TemporaryFile(prefix="transpose-")
+        offsets = []
+        for i in range(len(self.columns)):
+            data = self.get_stripe(i).encode("UTF-8")
+            offsets.append((self.spill_file.tell(), len(data)))
+            self.spill_file.write(data)
+            self.columns[i] = []
+        self.block_offsets.append(offsets)
+        debug.trace(5, f"ColumnStriper.spill(): block {len(self.block_offsets)} with {self.buffer_size} bytes")
+        self.buffer_size = 0
+
+    def output(self, field_names, stream=None):
+        """Write each column as a line to STREAM, prefixed by its label from FIELD_NAMES"""
+        if stream is None:
+            stream = sys.stdout
+        for i in range(len(self.columns)):
+            stream.write(field_names[i])
+            for offsets in self.block_offsets:
+                (offset, length) = offsets[i]
+                self.spill_file.seek(offset)
+                stream.write(self.spill_file.read(length).decode("UTF-8"))
+            stream.write(self.get_stripe(i) + "\n")
+        if self.spill_file:
+            self.spill_file.close()
+            self.spill_file = None
+
+#------------------------------------------------------------------------
 
 def main():
     """Entry point for script"""
@@ -62,17 +130,20 @@ def main():
     parser.add_argument("--elide", dest='elide_fields', action='store_true', default=False, help="Replace repeated values by .'s")
     parser.add_argument("--elided-value", help="Value for repeated field")
     parser.add_argument("--single-field", dest='single_field', action='store_true', default=False, help="Only show a single field per output line")
+    parser.add_argument("--memory-budget", type=int, default=MEMORY_BUDGET, help="Approximate bytes of column data to keep in memory")
     parser.add_argument("filename", nargs='?', default='-')
     args = vars(parser.parse_args())
     debug.trace(5, "args = %s" % args)
     delim = "\t"
     elided_value = "."
     field_names = []
-    field_data = []
+    ## OLD: field_data = []
+    column_data = None
     single_field = args['single_field']
     elide_fields = args['elide_fields']
     encode_newlines = args['encode_newlines']
     csv_dialect = args['dialect']
+    memory_budget = args['memory_budget']
     previous_value = []
     if args['delim']:
         delim = args['delim']
@@ -84,11 +155,12 @@ def main():
         lines = read_lines(args['header'])
         ## OLD: field_names = [label.strip() for label in lines[0].split(delim)]
         header_reader = csv.reader(iter(lines), delimiter=delim, quotechar='"', dialect=csv_dialect)
-        field_names = header_reader[0]
+        ## BAD: field_names = header_reader[0]
+        field_names = next(header_reader)
         debug.trace_values(5, field_names, "field_names")
         if not single_field:
-            field_data = [[] for i in range(len(field_names))]
-            debug.trace_values(5, field_data, "field_data")
+            ## OLD: field_data = [[] for i in range(len(field_names))]
+            column_data = ColumnStriper(len(field_names), delim, memory_budget)
         previous_value = [None] * len(field_names)
     input_stream = sys.stdin
     if (args['filename'] and (args['filename'] != "-")):
@@ -96,7 +168,8 @@ def main():
 
     # Transpose each line of the table
     num_lines = 0
-    csv_reader = csv.reader(iter(input_stream.readlines()), delimiter=delim, quotechar='"', dialect=csv_dialect)
+    ## OLD: csv_reader = csv.reader(iter(input_stream.readlines()), delimiter=delim, quotechar='"', dialect=csv_dialect)
+    csv_reader = csv.reader(input_stream, delimiter=delim, quotechar='"', dialect=csv_dialect)
     ## OLD: for line in input_stream:
     for line_data in csv_reader:
         num_lines += 1
@@ -111,8 +184,8 @@ def main():
         if (len(field_names) == 0):
             field_names = line_data
             if not single_field:
-                field_data = [[] for i in range(len(field_names))]
-                debug.trace_values(5, field_data, "field_data")
+                ## OLD: field_data = [[] for i in range(len(field_names))]
+                column_data = ColumnStriper(len(field_names), delim, memory_budget)
             previous_value = [None] * len(field_names)
             continue
         ## OLD: elif ((num_lines == 1) and (field_names == line_data)):
@@ -120,10 +193,11 @@ def main():
             debug.trace(5, "Ignoring duplicate header")
             continue
 
-        # Append each field to respective list (of seen values)
+        # Append each field to respective column (of seen values)
         if (len(line_data) != len(field_names)):
             print_stderr("Warning: Found %d fields but expected %d" % (len(line_data), len(field_names)))
             line_data += (['n/a'] * max(0, len(field_names) - len(line_data)))
+        new_values = []
         for i in range(len(field_names)):
             debug.trace(7, "d[%d]: %s" % (i, line_data[i]))
             new_value = line_data[i]
@@ -137,15 +211,19 @@ def main():
             if single_field:
                 print("%s" % (delim.join([field_names[i], new_value])))
             else:
-                field_data[i].append(new_value)
-                previous_value[i] = line_data[i]
+                ## OLD: field_data[i].append(new_value)
+                new_values.append(new_value)
+            previous_value[i] = line_data[i]
         if not single_field:
-            debug.trace_values(8, field_data, "field_data")
+            debug.trace_values(8, new_values, "new_values")
+            column_data.add_row(new_values)
 
     # Output the transposed lines
-    if not single_field:
-        for i in range(len(field_names)):
-            print("%s" % delim.join([field_names[i]] + field_data[i]))
+    if column_data:
+        ## OLD:
+        ## for i in range(len(field_names)):
+        ##     print("%s" % delim.join([field_names[i]] + field_data[i]))
+        column_data.output(field_names)
 
     return
 
@@ -790,6 +790,8 @@ class TestWrapper(unittest.TestCase):
         ## NOTE: monkeypatch is set via the autouse monkeypatch_fixture (see __init__)
         assert self.monkeypatch is not None
         self.monkeypatch.setattr("mezcla.debug.trace_level", level)
+        for (name, value) in debug.enabled_flags(level).items():
+            self.monkeypatch.setattr(f"mezcla.debug.{name}", value)
 
     def tearDown(self) -> None:
         """Per-test cleanup: deletes temp file unless detailed debugging"""